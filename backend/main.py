@@ -7,6 +7,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from api.routes.llm_queue import init_llm_queue_runtime, shutdown_llm_queue_runtime
+from api.routes.metrics import router as metrics_router
 from infrastructure.db.seed.apply import apply_all_seeds
 from infrastructure.db.seed.registry import load_seed_bundles
 from src.api.routes import api_router
@@ -82,3 +83,5 @@ async def health_check():
 
 # 라우터 등록
 app.include_router(api_router, prefix="/api")
+# Prometheus 스크레이프(/metrics, 루트 경로)
+app.include_router(metrics_router)
@@ -322,6 +322,52 @@ CREATE INDEX IF NOT EXISTS ix_gjd_company_job ON generated_jds (company_code, jo
 CREATE INDEX IF NOT EXISTS ix_gjd_created ON generated_jds (created_at DESC);
 
 
+-- =========================================
+-- 테이블: llm_queue_items (LLM 대기열, 내구성 큐)
+-- =========================================
+CREATE TABLE IF NOT EXISTS llm_queue_items (
+  id            BIGSERIAL PRIMARY KEY,                -- FIFO 순번
+  request_id    TEXT NOT NULL UNIQUE,
+  user_id       TEXT NOT NULL,
+  payload       JSONB NOT NULL DEFAULT '{}'::jsonb,
+  priority      INTEGER NOT NULL DEFAULT 0,           -- 클수록 먼저 admit (interactive > batch)
+  status        TEXT NOT NULL DEFAULT 'queued',       -- queued|inflight|finished|failed|canceled|expired
+  enqueued_at   TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  admitted_at   TIMESTAMPTZ,
+  finished_at   TIMESTAMPTZ,
+  terminal_at   TIMESTAMPTZ,                          -- 종료 시각(보존 정책 기준)
+  fail_reason   TEXT,
+  eta_sec       DOUBLE PRECISION,
+  archived      BOOLEAN NOT NULL DEFAULT FALSE        -- 압축(payload 제거) 여부
+);
+
+CREATE INDEX IF NOT EXISTS ix_lqi_user_queued ON llm_queue_items (user_id, id) WHERE status = 'queued';
+CREATE INDEX IF NOT EXISTS ix_lqi_prio_queued ON llm_queue_items (priority DESC, id) WHERE status = 'queued';
+CREATE INDEX IF NOT EXISTS ix_lqi_status      ON llm_queue_items (status, user_id);
+CREATE INDEX IF NOT EXISTS ix_lqi_inflight    ON llm_queue_items (admitted_at) WHERE status = 'inflight';
+CREATE INDEX IF NOT EXISTS ix_lqi_terminal    ON llm_queue_items (terminal_at) WHERE terminal_at IS NOT NULL;
+
+-- =========================================
+-- 테이블: llm_tasks (sim-then-generate 비동기 태스크 상태)
+-- =========================================
+CREATE TABLE IF NOT EXISTS llm_tasks (
+  task_id       TEXT PRIMARY KEY,
+  user_id       TEXT NOT NULL,
+  status        TEXT NOT NULL DEFAULT 'queued',       -- queued|waiting|generating|finished|failed
+  stream_mode   BOOLEAN NOT NULL DEFAULT FALSE,
+  meta          JSONB NOT NULL DEFAULT '{}'::jsonb,
+  saved_id      INTEGER,                              -- generated_jds.id
+  error         TEXT,
+  result        JSONB,
+  result_ref    BOOLEAN NOT NULL DEFAULT FALSE,       -- TRUE면 markdown 생략(saved_id 참조)
+  req_json      JSONB,                                -- 종료 시 제거
+  created_at    TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  finished_at   TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS ix_llm_tasks_finished ON llm_tasks (finished_at) WHERE finished_at IS NOT NULL;
+
+
 
 BEGIN;
 COPY raw_job_descriptions (
@@ -1,5 +1,4 @@
 import json
-import logging
 from typing import Optional, AsyncIterator
 
 from fastapi import APIRouter, Depends, HTTPException, Query
@@ -8,14 +7,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from api.deps import db_session
 from api.schemas.jd_generation import JDGenerateRequest, JDGenerateResponse, JDGetResponse, JDListResponse, JDItem
-from domain.company_analysis.models import CompanyKnowledge, CompanyJDStyle
-from infrastructure.db.repository import (
-    JDRepository,
-    StyleSnapshotRepository,
-    DefaultStyleRepository,
-    GeneratedInsightRepository,
-    load_job_name,
-)
+from infrastructure.db.repository import JDRepository
 from infrastructure.llm.factory import make_llm
 from infrastructure.prompt.manager import PromptManager
 from service.jd_generation import JDGenerationService
@@ -23,41 +15,41 @@ from service.jd_generation import JDGenerationService
 router = APIRouter(prefix="/jd", tags=["jd"])
 
 
-def _title_from_markdown(md: str, fallback: str) -> str:
-    first = (md or "").splitlines()[0].strip()
-    if first.startswith("#"):
-        t = first.lstrip("#").strip()
-        return t or fallback
-    return fallback
+def make_jd_service(body: JDGenerateRequest) -> JDGenerationService:
+    # LLM / PM / Service
+    llm = make_llm(provider=body.provider, model=body.model)
+    return JDGenerationService(llm=llm, prompt_manager=PromptManager())
+
+
+def jd_prepare_kwargs(body: JDGenerateRequest) -> dict:
+    # JDGenerationService.prepare_request 인자(지식/스타일 조회)
+    return dict(
+        company_code=body.company_code,
+        job_code=body.job_code,
+        knowledge_override=body.knowledge_override,
+        style_override=body.style_override,
+        style_source=body.style_source,
+        default_style_name=body.default_style_name,
+    )
 
 
-async def _resolve_style_meta_for_saving(
-    session: AsyncSession,
-    *,
-    style_override: Optional[CompanyJDStyle],
-    style_source_req: str,  # request.style_source
-    default_style_name: Optional[str],
-    company_code: str,
-    job_code: str,
-) -> dict:
-    # 1) 명시 오버라이드(직접 전달) 우선
-    if style_override is not None:
-        return {"style_source": "override", "style_preset_name": None, "style_snapshot_id": None}
+def jd_request_kwargs(body: JDGenerateRequest) -> dict:
+    # JDGenerationService.generate_and_save / stream_and_save 인자
+    return dict(
+        **jd_prepare_kwargs(body),
+        provider=body.provider,
+        model=body.model,
+        language=body.language,
+    )
 
-    # 2) 생성 스냅샷 선택
-    if style_source_req == "generated":
-        snap = await StyleSnapshotRepository(session).latest_for(company_code=company_code, job_code=job_code)
-        return {
-            "style_source": "generated",
-            "style_preset_name": None,
-            "style_snapshot_id": (snap.id if snap else None),
-        }
 
-    # 3) 기본 프리셋
-    name = default_style_name or "일반적"
-    # 존재 확인은 선택적(저장 필드용으로 이름만 기록해도 됨)
-    _ = await DefaultStyleRepository(session).get_preset(style_name=name)
-    return {"style_source": "default", "style_preset_name": name, "style_snapshot_id": None}
+def _prepare_error(e: Exception) -> HTTPException:
+    # 서비스 준비 단계 오류 → HTTP 상태
+    if isinstance(e, LookupError):
+        return HTTPException(status_code=404, detail=str(e))
+    if isinstance(e, ValueError):
+        return HTTPException(status_code=422, detail=str(e))
+    return HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/generate", response_model=JDGenerateResponse)
@@ -65,94 +57,24 @@ async def generate_jd(
     body: JDGenerateRequest,
     session: AsyncSession = Depends(db_session),
 ):
-    # LLM / PM / Service
-    llm = make_llm(provider=body.provider, model=body.model)
-    pm = PromptManager()
-    svc = JDGenerationService(llm=llm, prompt_manager=pm)
-
-    # Knowledge: override 우선, 없으면 DB 최신
-    if body.knowledge_override is not None:
-        try:
-            knowledge = CompanyKnowledge.model_validate(body.knowledge_override)
-        except Exception as e:
-            raise HTTPException(status_code=422, detail=f"Invalid knowledge_override: {e}")
-    else:
-        kn_repo = GeneratedInsightRepository(session)
-        kn_payload = await kn_repo.latest_payload(company_code=body.company_code, job_code=body.job_code)
-        if not kn_payload:
-            raise HTTPException(status_code=404, detail="No saved knowledge for given company_code/job_code")
-        try:
-            knowledge = CompanyKnowledge.model_validate(kn_payload)
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Saved knowledge payload invalid: {e}")
-
-    # Style: override 있으면 사용, 없으면 서비스가 policy대로 해결
-    style: Optional[CompanyJDStyle] = None
-    if body.style_override is not None:
-        try:
-            style = CompanyJDStyle.model_validate(body.style_override)
-        except Exception as e:
-            raise HTTPException(status_code=422, detail=f"Invalid style_override: {e}")
-
-    # 프롬프트 라벨
-    company_label = body.company_code
-    job_label = (await load_job_name(session, body.job_code)) or body.job_code
-
-    # 생성
+    svc = make_jd_service(body)
+    # 준비 단계(지식/스타일) 오류만 404/422로 변환 — 생성/파싱 단계 오류는 500(LLM assertion은 502)
     try:
-        markdown = await svc.generate_jd_markdown(
-            company=company_label,
-            job=job_label,
-            job_code=body.job_code,
-            knowledge=knowledge,
-            jd_style=style,
-            style_source=body.style_source,
-            default_style_name=body.default_style_name,
-            model=body.model,
-            language=body.language,
-        )
+        prepared = await svc.prepare_request(session, **jd_prepare_kwargs(body))
+    except Exception as e:
+        raise _prepare_error(e)
+    try:
+        out = await svc.generate_and_save(session, prepared=prepared, **jd_request_kwargs(body))
     except AssertionError as e:
         raise HTTPException(status_code=502, detail=f"LLM assertion failed: {e}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-    # 제목 + 메타(가능하면 스타일 요약, 없으면 빈 dict)
-    title = _title_from_markdown(markdown, fallback=f"{company_label} {job_label}")
-    meta, style_meta = {}, {}
-    try:
-        style_meta = await _resolve_style_meta_for_saving(
-            session,
-            style_override=body.style_override,
-            style_source_req=body.style_source,
-            default_style_name=body.default_style_name,
-            company_code=body.company_code,
-            job_code=body.job_code,
-        )
-    except Exception as e:
-        pass
-
-    # ✅ 무조건 저장
-    repo = JDRepository(session)
-    saved_id = await repo.save_generated(
-        company_code=company_label,
-        job_code=body.job_code,
-        title=title,
-        markdown=markdown,
-        sections=None,
-        meta=meta,
-        provider=(body.provider or None),
-        model_name=(body.model or None),
-        prompt_meta={"key": "jd.generation", "version": "v1", "language": body.language},
-        style_source=style_meta.get("style_source", None),
-        style_preset_name=style_meta.get("style_preset_name", None),
-        style_snapshot_id=style_meta.get("style_snapshot_id", None),
-    )
-    logging.info(f"Save Complete: company_code={company_label}, job_code={job_label}, saved_id={saved_id}")
     return JDGenerateResponse(
-        company_code=company_label,
-        job_code=job_label,
-        markdown=markdown,
-        saved_id=saved_id,
+        company_code=out["company_code"],
+        job_code=out["job_code"],
+        markdown=out["markdown"],
+        saved_id=out["saved_id"],
     )
 
 
@@ -169,111 +91,29 @@ async def generate_jd_stream(
     - event: "end"    → 저장 결과(saved_id, title)
     - event: "error"  → 오류 메시지
     """
+    svc = make_jd_service(body)
+    events = svc.stream_and_save(session, **jd_request_kwargs(body))
 
-    # 1) LLM / PM / Service
-    llm = make_llm(provider=body.provider, model=body.model)
-    pm = PromptManager()
-    svc = JDGenerationService(llm=llm, prompt_manager=pm)
-
-    # 2) Knowledge 준비
-    if body.knowledge_override is not None:
-        try:
-            knowledge = CompanyKnowledge.model_validate(body.knowledge_override)
-        except Exception as e:
-            raise HTTPException(status_code=422, detail=f"Invalid knowledge_override: {e}")
-    else:
-        kn_repo = GeneratedInsightRepository(session)
-        kn_payload = await kn_repo.latest_payload(company_code=body.company_code, job_code=body.job_code)
-        if not kn_payload:
-            raise HTTPException(status_code=404, detail="No saved knowledge for given company_code/job_code")
-        try:
-            knowledge = CompanyKnowledge.model_validate(kn_payload)
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Saved knowledge payload invalid: {e}")
-
-    # 3) Style (override 있으면 그대로, 없으면 서비스에서 해석)
-    style: Optional[CompanyJDStyle] = None
-    if body.style_override is not None:
-        try:
-            style = CompanyJDStyle.model_validate(body.style_override)
-        except Exception as e:
-            raise HTTPException(status_code=422, detail=f"Invalid style_override: {e}")
-
-    # 4) 라벨
-    company_label = body.company_code
-    job_label = (await load_job_name(session, body.job_code)) or body.job_code
-
-    # 5) 저장 시 사용할 스타일 메타 미리 결정(오류 나더라도 스트림은 계속)
+    # 준비 단계(지식/스타일) 오류는 start 이전에 발생 → 스트림 시작 전에 HTTP 오류로 반환
     try:
-        style_meta = await _resolve_style_meta_for_saving(
-            session,
-            style_override=body.style_override,
-            style_source_req=body.style_source,
-            default_style_name=body.default_style_name,
-            company_code=body.company_code,
-            job_code=body.job_code,
-        )
-    except Exception:
-        style_meta = {"style_source": None, "style_preset_name": None, "style_snapshot_id": None}
+        first = await anext(events)
+    except Exception as e:
+        await events.aclose()
+        raise _prepare_error(e)
 
-    async def sse_gen() -> AsyncIterator[bytes]:
-        # start 이벤트
-        start_payload = {
-            "event": "start",
-            "company_code": company_label,
-            "job_code": job_label,
-            "provider": body.provider,
-            "model": body.model,
-            "style_source": style_meta.get("style_source"),
-            "style_preset_name": style_meta.get("style_preset_name"),
-            "style_snapshot_id": style_meta.get("style_snapshot_id"),
-        }
-        yield f"event: start\ndata: {json.dumps(start_payload, ensure_ascii=False)}\n\n".encode("utf-8")
+    def _sse(event: str, data: dict) -> bytes:
+        return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
 
-        buffer = []
-        saved_id = None
+    async def sse_gen() -> AsyncIterator[bytes]:
         try:
-            # LLM 스트림 시작
-            async for piece in svc.generate_jd_markdown_stream(
-                company=company_label,
-                job=job_label,
-                job_code=body.job_code,
-                knowledge=knowledge,
-                jd_style=style,
-                style_source=body.style_source,
-                default_style_name=body.default_style_name,
-                model=body.model,
-                language=body.language,
-            ):
-                buffer.append(piece)
-                yield f"event: delta\ndata: {json.dumps({'text': piece}, ensure_ascii=False)}\n\n".encode("utf-8")
-
-            # 전송 완료 → 저장
-            markdown = "".join(buffer).strip()
-            title = _title_from_markdown(markdown, fallback=f"{company_label} {job_label}")
-
-            repo = JDRepository(session)
-            saved_id = await repo.save_generated(
-                company_code=company_label,
-                job_code=body.job_code,
-                title=title,
-                markdown=markdown,
-                sections=None,
-                meta={},  # 필요 시 확장
-                provider=(body.provider or None),
-                model_name=(body.model or None),
-                prompt_meta={"key": "jd.generation", "version": "v1", "language": body.language},
-                style_source=style_meta.get("style_source", None),
-                style_preset_name=style_meta.get("style_preset_name", None),
-                style_snapshot_id=style_meta.get("style_snapshot_id", None),
-            )
-
-            end_payload = {"event": "end", "saved_id": saved_id, "title": title}
-            yield f"event: end\ndata: {json.dumps(end_payload, ensure_ascii=False)}\n\n".encode("utf-8")
-
+            yield _sse(*first)
+            async for event, data in events:
+                yield _sse(event, data)
         except Exception as e:
-            err = {"event": "error", "message": str(e)}
-            yield f"event: error\ndata: {json.dumps(err, ensure_ascii=False)}\n\n".encode("utf-8")
+            yield _sse("error", {"event": "error", "message": str(e)})
+        finally:
+            # 클라이언트 연결 종료(취소/aclose) → 서비스 제너레이터를 닫아 업스트림 LLM 스트림까지 중단
+            await events.aclose()
 
     return StreamingResponse(
         sse_gen(),
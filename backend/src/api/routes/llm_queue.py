@@ -3,28 +3,32 @@ toy service to simulate delayed llm response situation
 """
 
 import asyncio
+import itertools
 import json
 import logging
+import math
 import random
 import time
-import uuid
-from datetime import datetime, timezone
-from typing import Any, Dict, Set
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, Set, Tuple
 from typing import Optional, List, Literal
 
-import httpx
 from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from fastapi.responses import StreamingResponse
-from sqlalchemy.ext.asyncio import AsyncSession
 
-from api.schemas.jd_generation import JDGenerateResponse
+from api.routes.jd_generation import generate_jd, jd_request_kwargs, make_jd_service
+from api.schemas.jd_generation import JDGenerateRequest, JDGenerateResponse
 from api.schemas.llm_queue_schema import SimThenGenerateRequest, SimThenGenerateAnyResponse
 from api.schemas.llm_queue_schema import TaskStatusResponse, SimThenGenerateAsyncAccepted
-from domain.company_analysis.models import CompanyJDStyle
-from infrastructure.db.repository import (
-    StyleSnapshotRepository,
-    DefaultStyleRepository,
-)
+from infrastructure.db.database import SessionLocal
+from infrastructure.db.repository import JDRepository
+from infrastructure.queue.config import load_queue_config
+from infrastructure.queue.engine import QueueFullError
+from infrastructure.queue.models import Priority, Status
+from infrastructure.queue.eta import KIND_SIMULATED
+from infrastructure.queue.factory import make_task_store
+from infrastructure.queue.supervisor import TaskSupervisor
+from infrastructure.webhook import WebhookDispatcher, load_webhook_config
 from service.llm_queue import LLMQueueService
 
 logger = logging.getLogger(__name__)
@@ -32,99 +36,149 @@ router = APIRouter(prefix="/llm/queue", tags=["llm-queue"])
 DEFAULT_USER_ID = "demo-user"
 
 
-def _title_from_markdown(md: str, fallback: str) -> str:
-    first = (md or "").splitlines()[0].strip()
-    if first.startswith("#"):
-        t = first.lstrip("#").strip()
-        return t or fallback
-    return fallback
-
-
-async def _resolve_style_meta_for_saving(
-    session: AsyncSession,
-    *,
-    style_override: Optional[CompanyJDStyle],
-    style_source_req: str,
-    default_style_name: Optional[str],
-    company_code: str,
-    job_code: str,
-) -> dict:
-    if style_override is not None:
-        return {"style_source": "override", "style_preset_name": None, "style_snapshot_id": None}
-    if style_source_req == "generated":
-        snap = await StyleSnapshotRepository(session).latest_for(company_code=company_code, job_code=job_code)
-        return {
-            "style_source": "generated",
-            "style_preset_name": None,
-            "style_snapshot_id": (snap.id if snap else None),
-        }
-    name = default_style_name or "일반적"
-    _ = await DefaultStyleRepository(session).get_preset(style_name=name)
-    return {"style_source": "default", "style_preset_name": name, "style_snapshot_id": None}
-
-
-# 아주 단순한 메모리 태스크 저장소
-class TaskStore:
-    def __init__(self) -> None:
-        self.data: Dict[str, Dict[str, Any]] = {}
-
-    def create(self, *, user_id: str, req_json: Dict[str, Any], stream_mode: bool = False) -> str:
-        tid = str(uuid.uuid4())
-        self.data[tid] = {
-            "task_id": tid,
-            "user_id": user_id,
-            "status": "queued",  # queued|waiting|generating|finished|failed
-            "created_at": time.time(),
-            "finished_at": None,
-            "error": None,
-            "saved_id": None,
-            "result": None,  # JDGenerateResponse
-            "meta": {"pre_total": None, "pre_done": 0},
-            "stream_mode": stream_mode,
-        }
-        return tid
-
-    def get(self, tid: str) -> Optional[Dict[str, Any]]:
-        return self.data.get(tid)
-
-    def update(self, tid: str, **kwargs: Any) -> None:
-        if tid in self.data:
-            self.data[tid].update(kwargs)
-
-
 class EventHub:
-    """task_id별로 SSE 구독 큐를 관리하고 이벤트를 브로드캐스트"""
+    """
+    task_id별로 SSE 구독 큐를 관리하고 이벤트를 브로드캐스트.
+    - 이벤트마다 task 단위 단조 증가 ID 부여 + 최근 replay_size개 로그 보관
+      → 재접속 시 Last-Event-ID 이후 구간만 재전송(since)
+    - 구독 큐가 가득 차 드롭된 이벤트도 로그에서 복구(구독자가 ID 공백 감지 시 since로 보충)
+    - 종료(close)된 태스크 로그는 replay_ttl_sec 후 정리
+    - 이벤트는 publish 시 SSE 프레임(bytes)으로 한 번만 인코딩해 모든 구독 큐/로그가 같은 버퍼를 공유
+      (구독자 수가 늘어도 직렬화 비용은 일정), 구독자가 없어진 태스크의 구독 집합은 즉시 회수
+    - watch(task_id, on_abandon): 구독자가 있다가 모두 끊긴 뒤 abandon_grace_sec 안에 재접속이 없으면
+      on_abandon() 1회 호출(생성 작업 취소용), 유예 중 재구독하면 취소
+    """
 
-    def __init__(self):
+    def __init__(self, *, replay_size: int = 4096, replay_ttl_sec: float = 600.0, abandon_grace_sec: float = 1.0):
         self._subs: Dict[str, Set[asyncio.Queue]] = {}
+        self._log: Dict[str, Deque[Tuple[int, bytes]]] = {}
+        self._last_id: Dict[str, int] = {}
+        self._closed: Deque[Tuple[float, str]] = deque()
+        self._replay_size = replay_size
+        self._replay_ttl = replay_ttl_sec
+        self._watch: Dict[str, Callable[[], None]] = {}
+        self._abandon_timers: Dict[str, asyncio.TimerHandle] = {}
+        self._abandon_grace = max(0.0, abandon_grace_sec)
 
     def subscribe(self, task_id: str) -> asyncio.Queue:
         q: asyncio.Queue = asyncio.Queue(maxsize=1000)
         self._subs.setdefault(task_id, set()).add(q)
+        # 유예 중 재접속 → 취소 예약 해제
+        timer = self._abandon_timers.pop(task_id, None)
+        if timer:
+            timer.cancel()
         return q
 
     def unsubscribe(self, task_id: str, q: asyncio.Queue) -> None:
-        try:
-            self._subs.get(task_id, set()).discard(q)
-        except Exception:
-            pass
-
-    async def publish(self, task_id: str, event_type: str, data: dict) -> None:
-        payload = {"type": event_type, "data": data, "ts": time.time()}
-        for q in list(self._subs.get(task_id, set())):
+        subs = self._subs.get(task_id)
+        if subs is None:
+            return
+        subs.discard(q)
+        if not subs:
+            del self._subs[task_id]
+            if task_id in self._watch and task_id not in self._abandon_timers:
+                loop = asyncio.get_running_loop()
+                self._abandon_timers[task_id] = loop.call_later(self._abandon_grace, self._abandoned, task_id)
+
+    def watch(self, task_id: str, on_abandon: Callable[[], None]) -> None:
+        self._watch[task_id] = on_abandon
+
+    def unwatch(self, task_id: str) -> None:
+        self._watch.pop(task_id, None)
+        timer = self._abandon_timers.pop(task_id, None)
+        if timer:
+            timer.cancel()
+
+    def _abandoned(self, task_id: str) -> None:
+        self._abandon_timers.pop(task_id, None)
+        if self.has_subscribers(task_id):
+            return
+        on_abandon = self._watch.pop(task_id, None)
+        if on_abandon is not None:
+            logger.info("task %s: 구독자 없음(유예 %.1fs 경과) → 작업 취소", task_id, self._abandon_grace)
+            on_abandon()
+
+    def has_subscribers(self, task_id: str) -> bool:
+        return bool(self._subs.get(task_id))
+
+    def last_id(self, task_id: str) -> int:
+        return self._last_id.get(task_id, 0)
+
+    def since(self, task_id: str, after_id: int) -> Optional[List[Tuple[int, bytes]]]:
+        """
+        after_id 이후 이벤트(오름차순). 해당 구간이 이미 로그에서 밀려났거나 로그가 없으면(gc 포함) None
+        → 호출 측은 태스크 저장소 기준 스냅샷/종료 프레임으로 대체.
+        """
+        log = self._log.get(task_id)
+        if not log:
+            return None
+        first = log[0][0]
+        if after_id < first - 1:
+            return None
+        # ID가 연속이므로 오프셋으로 바로 접근
+        return list(itertools.islice(log, max(0, after_id - first + 1), None))
+
+    async def publish(self, task_id: str, event_type: str, data: dict) -> int:
+        eid = self._last_id.get(task_id, 0) + 1
+        self._last_id[task_id] = eid
+        log = self._log.get(task_id)
+        if log is None:
+            log = self._log[task_id] = deque(maxlen=self._replay_size)
+        # 한 번만 인코딩 → 로그/모든 구독 큐가 같은 bytes 객체를 공유
+        msg = (eid, sse_bytes(event_type, data, eid))
+        log.append(msg)
+        for q in tuple(self._subs.get(task_id, ())):
             try:
-                q.put_nowait(payload)
+                q.put_nowait(msg)
             except asyncio.QueueFull:
-                # 구독자 측이 느린 경우 드롭
+                # 느린 구독자: 여기선 드롭하고, 구독자가 ID 공백을 보고 로그에서 보충
                 pass
+        self._gc()
+        return eid
+
+    def close(self, task_id: str) -> None:
+        """태스크 종료 — 재접속 유예(replay_ttl_sec) 후 로그 정리."""
+        self.unwatch(task_id)
+        self._closed.append((time.monotonic(), task_id))
+        self._gc()
+
+    def _gc(self) -> None:
+        cutoff = time.monotonic() - self._replay_ttl
+        while self._closed and self._closed[0][0] < cutoff:
+            _, tid = self._closed.popleft()
+            if self.has_subscribers(tid):
+                # 아직 구독 중 — 유예를 한 번 더 주고 다음 gc에서 재확인
+                self._closed.append((time.monotonic(), tid))
+                continue
+            self._log.pop(tid, None)
+            self._last_id.pop(tid, None)
+
 
+async def _task_result_body(rec: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    태스크 결과 반환. 종료 후 경량화(result_ref)된 경우 saved_id로 generated_jds에서 markdown을 다시 읽음.
+    """
+    result = rec.get("result")
+    if not rec.get("result_ref") or rec.get("saved_id") is None:
+        return result
+    async with SessionLocal() as session:
+        jd = await JDRepository(session).get(jd_id=int(rec["saved_id"]))
+    if jd is None:
+        return result
+    return {**(result or {}), "markdown": jd.jd_markdown}
 
-def sse_bytes(event_type: str, data: dict) -> bytes:
-    return f"event: {event_type}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
 
+def sse_bytes(event_type: str, data: dict, event_id: Optional[int] = None) -> bytes:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event_type}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
 
-TASKS = TaskStore()
-EVENT_HUB = EventHub()
+
+# 태스크 저장소: 종료 태스크 TTL/LRU 제거 + 긴 결과는 saved_id 참조만(TASK_STORE_BACKEND=postgres면 영속)
+_QCFG = load_queue_config()
+TASKS = make_task_store(_QCFG)
+EVENT_HUB = EventHub(abandon_grace_sec=_QCFG.stream_abandon_grace_sec)
+# callback_url 웹훅 전송기(공용 커넥션 풀 + 유한 큐 + 재시도)
+WEBHOOKS = WebhookDispatcher(load_webhook_config())
 
 
 # ---- 기존 시뮬 레Runtime(가짜 대기 처리) 재사용 ----
@@ -132,42 +186,125 @@ class SimQueueRuntime:
     def __init__(self, queue: LLMQueueService) -> None:
         self.queue = queue
         self._worker_task: Optional[asyncio.Task] = None
+        self._compact_task: Optional[asyncio.Task] = None
         self._running = False
+        # 감독 풀: admit된 작업 실행(jobs) / sim_then_generate 비동기 작업(bg) — 참조 유지 + 동시 상한 + 종료 시 drain
+        self.jobs, self.bg = self._make_pools()
+        # 실행 중 작업 태스크(request_id → Task) — abort() 시 취소 대상
+        self._job_tasks: Dict[str, asyncio.Task] = {}
         # ▼ 진행률/ETA 자체 계산용 컨텍스트 (user_id별)
         #   { user_id: { "started_ts": float, "baseline_total": int } }
         self.progress_ctx: Dict[str, Dict[str, float | int]] = {}
 
+    def _make_pools(self) -> Tuple[TaskSupervisor, TaskSupervisor]:
+        cfg = self.queue.engine.config
+        return (
+            TaskSupervisor("sim_queue_jobs", max_tasks=cfg.worker_max_tasks),
+            TaskSupervisor("sim_queue_bg", max_tasks=cfg.bg_max_tasks),
+        )
+
+    @property
+    def accepting(self) -> bool:
+        return self._running and not self.bg.closed
+
     async def start(self) -> None:
         if self._running:
             return
+        if self.jobs.closed or self.bg.closed:
+            self.jobs, self.bg = self._make_pools()
         self._running = True
+        await WEBHOOKS.start()
         self._worker_task = asyncio.create_task(self._worker_loop(), name="sim_queue_worker")
-
-    async def stop(self) -> None:
+        self._compact_task = asyncio.create_task(self._compact_loop(), name="sim_queue_compactor")
+
+    async def stop(self, drain_timeout: Optional[float] = None) -> None:
+        """
+        graceful drain(기한 drain_timeout, 기본 QueueConfig.drain_timeout_sec):
+        1) 신규 비동기 작업 접수 중단, 진행 중 bg 작업 완료 대기(워커는 계속 admit → 대기 중 시뮬도 진행)
+        2) 워커 루프 중단(신규 admit 없음), 실행 중 작업 완료 대기
+        3) 기한 초과분은 취소 전파(작업은 finish(failed)/태스크는 failed로 기록) 후 웹훅 전송 마무리
+        """
+        if drain_timeout is None:
+            drain_timeout = self.queue.engine.config.drain_timeout_sec
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + max(0.0, drain_timeout)
+
+        canceled_bg = await self.bg.drain(drain_timeout)
+        # 워커는 취소하지 않고 깨워서 스스로 빠져나오게 함(admit 도중 취소로 inflight 항목이 버려지지 않게)
         self._running = False
+        self.jobs.close()
+        self.queue.engine.notify()
         if self._worker_task:
-            self._worker_task.cancel()
             try:
-                await self._worker_task
+                await asyncio.wait_for(self._worker_task, max(1.0, deadline - loop.time()))
+            except asyncio.TimeoutError:
+                logger.warning("워커 루프 종료 대기 기한 초과 → 취소")
             except asyncio.CancelledError:
                 pass
+        if self._compact_task:
+            self._compact_task.cancel()
+            try:
+                await self._compact_task
+            except asyncio.CancelledError:
+                pass
+        canceled_jobs = await self.jobs.drain(max(0.0, deadline - loop.time()))
+        if canceled_bg or canceled_jobs:
+            logger.warning("종료 drain 기한 초과: bg %d건, 작업 %d건 취소", canceled_bg, canceled_jobs)
+        await WEBHOOKS.stop()
 
     async def _worker_loop(self) -> None:
         while self._running:
             try:
-                # 🔧 한 번에 여러 건 admit 가능 → 전부 실행으로 태움
-                res = await self.queue.engine.admit()
+                # 실행 풀에 빈 슬롯이 있을 때만, 빈 슬롯 수만큼만 admit
+                # (admit 후 실행 대기 중 종료되어 inflight로 남는 항목이 생기지 않게)
+                await self.jobs.wait_free()
+                if not self._running or self.jobs.closed:
+                    break
+                res = await self.queue.engine.admit(max_n=self.jobs.free)
                 if not res.admitted:
-                    await asyncio.sleep(0.2)
+                    # 작업/용량 신호가 올 때까지 대기(폴링 없이 즉시 admit)
+                    await self.queue.engine.wait_for_work(timeout=self.queue.engine.config.idle_wait_sec)
                     continue
-
-                for it in res.admitted:
-                    # it: QueueItem (request_id, user_id, payload 포함)
-                    asyncio.create_task(self._run_one(it.request_id, dict(it.payload)))
+                await self._spawn_admitted(res.admitted)
             except Exception as e:
                 logger.exception("워커 루프 오류: %s", e)
                 await asyncio.sleep(0.5)
 
+    async def _spawn_admitted(self, admitted: List[Any]) -> None:
+        # it: QueueRecord (request_id, user_id, payload 포함) — 슬롯은 admit 전에 확보했으므로 대기 없이 실행
+        pending = list(admitted)
+        try:
+            while pending:
+                it = pending[0]
+                task = self.jobs.spawn_nowait(
+                    self._run_one(it.request_id, dict(it.payload)), name=f"sim_job:{it.request_id}"
+                )
+                if task is None:
+                    # 풀이 닫힘(종료 중) → 실행하지 않은 항목은 실패로 종료(inflight 슬롯 반환)
+                    await self.queue.finish(it.request_id, duration_sec=0.0, ok=False, reason="shutdown")
+                else:
+                    self._job_tasks[it.request_id] = task
+                pending.pop(0)
+        except asyncio.CancelledError:
+            for it in pending:
+                await self.queue.finish(it.request_id, duration_sec=0.0, ok=False, reason="shutdown")
+            raise
+
+    async def _compact_loop(self) -> None:
+        # 종료 항목 보존 정책 적용(메모리/스냅샷 비용을 일정하게 유지)
+        interval = max(1.0, float(self.queue.engine.config.compact_interval_sec))
+        while self._running:
+            await asyncio.sleep(interval)
+            try:
+                moved = await self.queue.engine.compact()
+                if moved:
+                    logger.debug("큐 압축: %d건 아카이브 이동", moved)
+                purged = await TASKS.purge()
+                if purged:
+                    logger.debug("태스크 정리: %d건 제거(TTL/LRU)", purged)
+            except Exception as e:
+                logger.exception("큐 압축 오류: %s", e)
+
     async def _run_one(self, request_id: str, payload: Dict[str, Any]) -> None:
 
         t0 = time.perf_counter()
@@ -186,12 +323,36 @@ class SimQueueRuntime:
                     ma = mi
                 delay = random.uniform(mi, ma)
             await asyncio.sleep(delay)
+        except asyncio.CancelledError as e:
+            # 종료 drain 기한 초과 / abort() → 실패로 기록 후 취소 전파
+            ok = False
+            err = f"canceled: {e.args[0] if e.args else 'shutdown'}"
+            raise
         except Exception as e:
             ok = False
             err = str(e)
         finally:
+            self._job_tasks.pop(request_id, None)
             await self.queue.finish(request_id, duration_sec=(time.perf_counter() - t0), ok=ok, reason=err or "")
 
+    async def abort(self, request_ids: Iterable[str], reason: str) -> int:
+        """
+        요청 중단: 대기 중이면 큐에서 취소, 실행 중이면 작업 태스크 취소(슬롯 즉시 반환).
+        중단한 건수 반환(이미 종료된 요청은 제외).
+        """
+        n = 0
+        for rid in request_ids:
+            job = self._job_tasks.get(rid)
+            if job is not None:
+                job.cancel(reason)
+                n += 1
+                continue
+            item = await self.queue.engine.status(rid)
+            if item is not None and item.status == Status.queued:
+                await self.queue.engine.cancel(rid, reason)
+                n += 1
+        return n
+
     # ▼ 큐 길이 변화에 맞춰 baseline을 자동 관리
     def update_progress_ctx(self, *, user_id: str, queued: int, inflight: int) -> None:
         active = int(queued + inflight)
@@ -229,7 +390,7 @@ async def init_llm_queue_runtime() -> None:  # lifespan에서 호출
     await _runtime.start()
 
 
-async def shutdown_llm_queue_runtime() -> None:
+async def shutdown_llm_queue_runtime() -> None:  # lifespan 종료 시 호출(진행 중 작업 drain 후 종료)
     await _runtime.stop()
 
 
@@ -237,136 +398,80 @@ def get_runtime() -> SimQueueRuntime:
     return _runtime
 
 
+def _queue_full(e: QueueFullError) -> HTTPException:
+    # 대기열 깊이 초과 → 429, Retry-After는 현재 처리시간 추정 기반 배수 시간(초, 최소 1)
+    retry_after = max(1, math.ceil(e.retry_after_sec))
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail={"message": "queue is full", "scope": e.scope, "depth": e.depth, "limit": e.limit},
+        headers={"Retry-After": str(retry_after)},
+    )
+
+
+def _busy(rt: SimQueueRuntime) -> HTTPException:
+    # 종료 drain 중이거나 비동기 작업 풀이 가득 참 → 503
+    reason = "shutting down" if not rt.accepting else "too many background tasks"
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail={"message": reason, "limit": rt.bg.max_tasks},
+        headers={"Retry-After": "1"},
+    )
+
+
 # ---- 내부 유틸: 주어진 request_ids 모두 종료될 때까지 대기 ----
 logger = logging.getLogger("llm_queue.wait")
 
 
 async def _wait_all_finished(rt: SimQueueRuntime, ids: List[str], timeout: Optional[float]) -> None:
+    """
+    완료 future 기반 대기: 폴링 없이 마지막 요청이 종료되는 즉시 반환.
+    """
     start = time.perf_counter()
-    interval = 2.0
-    terminal = {"finished", "failed", "canceled", "expired"}
 
-    while True:
-        done = 0
+    def _on_done(rid: str, it, done: int, total: int) -> None:
+        st = getattr(it.status, "value", str(it.status)) if it else "없음"
         elapsed = time.perf_counter() - start
-        summary_parts = []
-
-        # 글로벌 평균(폴백)
-        snap = await rt.queue.engine.snapshot()
-        global_avg = float(snap.avg_finish_sec or 20.0)
-
-        for rid in ids:
-            it = await rt.queue.engine.status(rid)
-            if not it:
-                logger.info(f"[🟡 {rid}] 상태: 없음 | 경과시간: {elapsed:.2f}초")
-                done += 1
-                continue
+        logger.info(f"[🧩 {rid}] 상태: {st:<9} | 경과시간: {elapsed:.2f}초 | 완료: {done}/{total}")
 
-            st = getattr(it.status, "value", str(it.status))
-            eta = getattr(it, "eta_sec", None)
-
-            # 🔧 평균 처리시간(1건) 추정: per-user EMA > 글로벌 평균
-            try:
-                avg_per_item = float(rt.queue._ema.get(it.user_id))
-            except Exception:
-                avg_per_item = global_avg
-            if not avg_per_item or avg_per_item <= 0:
-                avg_per_item = global_avg
-
-            # 진행률 추정
-            progress = None
-            eta_remain = None
-
-            if st == "queued":
-                progress = 0
-            elif st == "inflight":
-                # admitted_at 기반 경과시간
-                if it.admitted_at:
-                    now = datetime.now(timezone.utc)
-                    elapsed_inflight = max(0.0, (now - it.admitted_at).total_seconds())
-                else:
-                    elapsed_inflight = 0.0
-
-                # 남은 시간/진행률 계산 (ETA 없을 땐 경과/평균으로)
-                if eta is not None:
-                    eta_remain = max(0.0, float(eta))
-                else:
-                    eta_remain = max(0.0, avg_per_item - elapsed_inflight)
-
-                if avg_per_item > 0:
-                    progress = int(min(95, max(1, (elapsed_inflight / avg_per_item) * 100)))
-                else:
-                    progress = 50
-            elif st == "finished":
-                progress = 100
-                eta_remain = 0.0
-            else:
-                progress = None
-
-            progress_str = f"{progress}%" if progress is not None else "N/A"
-            eta_str = f" | 예상 남은시간: {eta_remain:.1f}초" if eta_remain is not None else ""
-
-            logger.info(f"[🧩 {rid}] 상태: {st:<9} | 경과시간: {elapsed:.2f}초{eta_str} | 진행률: {progress_str}")
-
-            summary_parts.append(f"{rid[-4:]}:{st[0].upper()}")
-            if st in terminal:
-                done += 1
-
-        logger.info(f"⏳ 요약 [{elapsed:.1f}초]: " + " ".join(summary_parts))
+    try:
+        await rt.queue.engine.wait_all(ids, timeout=timeout, on_done=_on_done)
+    except asyncio.TimeoutError:
+        elapsed = time.perf_counter() - start
+        logger.warning(f"❌ {elapsed:.2f}초 동안 {len(ids)}개의 요청 완료를 기다렸으나 타임아웃 발생.")
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="simulation wait timeout")
 
-        if done == len(ids):
-            logger.info(f"✅ 총 {len(ids)}개의 요청이 {elapsed:.2f}초 만에 완료되었습니다.")
-            return
+    logger.info(f"✅ 총 {len(ids)}개의 요청이 {time.perf_counter() - start:.2f}초 만에 완료되었습니다.")
 
-        if timeout is not None and elapsed > timeout:
-            logger.warning(f"❌ {elapsed:.2f}초 동안 {len(ids)}개의 요청 완료를 기다렸으나 타임아웃 발생.")
-            raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="simulation wait timeout")
 
-        await asyncio.sleep(interval)
+async def _generate_jd(jd: JDGenerateRequest) -> dict:
+    """
+    인프로세스 비스트리밍 생성(/api/jd/generate와 동일 처리, HTTP 왕복 없음).
+    """
+    async with SessionLocal() as session:
+        resp = await generate_jd(jd, session)
+    return resp.model_dump()
 
 
-async def _proxy_jd_stream_to_eventhub(*, task_id: str, base_url: str, jd_payload: dict) -> dict:
+async def _generate_jd_to_eventhub(*, task_id: str, jd: JDGenerateRequest) -> dict:
     """
-    내부 /api/jd/generate/stream SSE를 열어 이벤트를 EVENT_HUB로 중계하고,
-    누적 텍스트/최종 메타를 반환합니다.
+    JDGenerationService.stream_and_save 이벤트를 EVENT_HUB로 바로 발행하고,
+    누적 텍스트/최종 메타를 반환합니다(SSE 인코딩/재파싱 없음).
     """
-    url = f"{base_url}/api/jd/generate/stream"
     accum: List[str] = []
-    saved_id: Optional[str] = None
+    saved_id: Optional[int] = None
     title: Optional[str] = None
 
-    def _pick_text(d: dict) -> str:
-        return d.get("text") or d.get("delta") or d.get("content") or ""
-
-    async with httpx.AsyncClient(timeout=None) as client:
-        async with client.stream("POST", url, json=jd_payload) as r:
-            cur_event = None
-            async for line in r.aiter_lines():
-                if not line:
-                    continue
-                if line.startswith("event:"):
-                    cur_event = line.split(":", 1)[1].strip()
-                    continue
-                if line.startswith("data:"):
-                    raw = line.split(":", 1)[1].strip()
-                    try:
-                        data = json.loads(raw)
-                    except Exception:
-                        data = {"text": raw}
-
-                    # EventHub 브로드캐스트
-                    await EVENT_HUB.publish(task_id, cur_event or "message", data)
-
-                    if cur_event == "delta":
-                        accum.append(_pick_text(data))
-                    elif cur_event == "end":
-                        saved_id = data.get("saved_id") or saved_id
-                        title = data.get("title") or title
-
-    markdown = "".join(accum)
-    if not title:
-        title = _title_from_markdown(markdown, fallback="제목 미정")
-
+    async with SessionLocal() as session:
+        svc = make_jd_service(jd)
+        async for event, data in svc.stream_and_save(session, **jd_request_kwargs(jd)):
+            await EVENT_HUB.publish(task_id, event, data)
+            if event == "delta":
+                accum.append(data["text"])
+            elif event == "end":
+                saved_id = data.get("saved_id")
+                title = data.get("title")
+
+    markdown = "".join(accum).strip()
     return {"saved_id": saved_id, "title": title, "markdown": markdown}
 
 
@@ -378,84 +483,80 @@ async def _proxy_jd_stream_to_eventhub(*, task_id: str, base_url: str, jd_payloa
 )
 async def sim_then_generate(
     req: SimThenGenerateRequest,
-    request: Request,
     rt: SimQueueRuntime = Depends(get_runtime),
     mode: Literal["sync", "async"] = Query("async"),
     stream: bool = Query(True),
-    callback_url: Optional[str] = Query(None),
+    callback_url: Optional[str] = Query(
+        None,
+        description=(
+            "완료 시 POST할 웹훅 URL. 본문: {task_id, status, saved_id, company_code, job_code}. "
+            "서버가 WEBHOOK_BATCH_MAX>1로 설정된 경우 같은 URL로 몰린 이벤트는 "
+            '{"events": [본문, ...], "count": n} 형식으로 묶여 전송될 수 있음'
+        ),
+    ),
 ) -> SimThenGenerateAnyResponse:
     """
     1) 동일 사용자 큐에 'simulate_only' 작업들을 prequeue_count 만큼 push
+       (sync/stream은 Priority.interactive, 나머지 async는 Priority.batch)
     2) 전부 완료될 때까지 서버에서 대기
-    3) 완료되면 내부 HTTP로 /api/jd/generate 호출 → 해당 응답을 그대로 반환
-       (JDGenerationService/라우트는 수정하지 않음)
+    3) 완료되면 JDGenerationService를 인프로세스로 호출(/api/jd/generate와 동일 응답)
     """
     user_id = req.user_id or DEFAULT_USER_ID
-
-    # 1) 가짜 대기열 push
-    ids: List[str] = []
-    for _ in range(req.prequeue_count):
-        payload = {
-            "simulate_only": True,
-            "sim_fixed_sec": req.sim.fixed_sec,
-            "sim_min_sec": req.sim.min_sec,
-            "sim_max_sec": req.sim.max_sec,
-        }
-        rid, _pos = await rt.queue.enqueue(user_id, payload)
-        ids.append(rid)
+    if mode == "async" and (not rt.accepting or rt.bg.full):
+        raise _busy(rt)
+
+    # 1) 가짜 대기열 일괄 push — 깊이 제한 초과면 한 건도 넣지 않고 429
+    payload = {
+        "kind": KIND_SIMULATED,
+        "simulate_only": True,
+        "sim_fixed_sec": req.sim.fixed_sec,
+        "sim_min_sec": req.sim.min_sec,
+        "sim_max_sec": req.sim.max_sec,
+    }
+    # 사용자가 결과를 기다리는 요청(sync 응답 대기, SSE 스트림)은 interactive, 웹훅/폴링용 async는 batch
+    priority = Priority.interactive if (mode == "sync" or stream) else Priority.batch
+    try:
+        queued = await rt.queue.enqueue_many(
+            user_id, [dict(payload) for _ in range(req.prequeue_count)], priority=priority
+        )
+    except QueueFullError as e:
+        raise _queue_full(e)
+    ids: List[str] = [rid for rid, _pos in queued]
 
     if mode == "sync":
         # 2) 다 끝날 때까지 서버에서 대기
         await _wait_all_finished(rt, ids, timeout=req.wait_timeout_sec)
-        # 3) 내부 호출로 실제 생성
-        base = str(request.base_url).rstrip("/")
-        url = f"{base}/api/jd/generate"
-        async with httpx.AsyncClient(timeout=None) as client:
-            resp = await client.post(url, json=req.jd.model_dump(exclude_none=True))
-            if resp.status_code >= 400:
-                raise HTTPException(status_code=resp.status_code, detail=resp.text)
-            return resp.json()
+        # 3) 인프로세스로 실제 생성
+        return await _generate_jd(req.jd)
 
     # === async 모드 ===
     # 즉시 task_id 반환하고, 백그라운드에서 수행
-    task_id = TASKS.create(user_id=user_id, req_json=req.jd.model_dump(exclude_none=True), stream_mode=stream)
+    task_id = await TASKS.create(user_id=user_id, req_json=req.jd.model_dump(exclude_none=True), stream_mode=stream)
 
     async def _bg_work():
         try:
-            TASKS.update(task_id, status="waiting", meta={"pre_total": len(ids), "pre_done": 0})
+            await TASKS.update(task_id, status="waiting", meta={"pre_total": len(ids), "pre_done": 0})
             await EVENT_HUB.publish(task_id, "status", {"status": "waiting"})
 
-            # 시뮬 N건 완료 대기 + 진행률 브로드캐스트
-            terminal = {"finished", "failed", "canceled", "expired"}
-            while True:
-                done = 0
-                for rid in ids:
-                    it = await rt.queue.engine.status(rid)
-                    if not it or it.status.value in terminal:
-                        done += 1
-                percent = int(done * 100 / max(1, len(ids)))
-                meta = {"phase": "prequeue", "pre_total": len(ids), "pre_done": done, "percent": percent}
-                TASKS.update(task_id, meta=meta)
+            # 시뮬 N건 완료 대기 — 1건 종료될 때마다 진행률 push
+            async def _progress(rid: str, it, done: int, total: int) -> None:
+                percent = int(done * 100 / max(1, total))
+                meta = {"phase": "prequeue", "pre_total": total, "pre_done": done, "percent": percent}
+                await TASKS.update(task_id, meta=meta)
                 await EVENT_HUB.publish(task_id, "progress", meta)
-                if done == len(ids):
-                    break
-                await asyncio.sleep(1.0)
+
+            await rt.queue.engine.wait_all(ids, on_done=_progress)
 
             # 실제 생성 단계
-            TASKS.update(task_id, status="generating")
+            await TASKS.update(task_id, status="generating")
             await EVENT_HUB.publish(task_id, "status", {"status": "generating"})
 
-            base = str(request.base_url).rstrip("/")
             jd_payload = req.jd.model_dump(exclude_none=True)
 
             if stream:
-                # ✅ 내부 스트림을 EventHub로 브릿지
-                result_meta = await _proxy_jd_stream_to_eventhub(
-                    task_id=task_id,
-                    base_url=base,
-                    jd_payload=jd_payload,
-                )
-                TASKS.update(
+                # ✅ 생성 delta를 EventHub로 직접 발행
+                result_meta = await _generate_jd_to_eventhub(task_id=task_id, jd=req.jd)
+                await TASKS.update(
                     task_id,
                     status="finished",
                     finished_at=time.time(),
@@ -463,14 +564,10 @@ async def sim_then_generate(
                     result={"title": result_meta.get("title"), "markdown": result_meta.get("markdown")},
                 )
             else:
-                # 기존 non-stream 경로
-                async with httpx.AsyncClient(timeout=None) as client:
-                    resp = await client.post(f"{base}/api/jd/generate", json=jd_payload)
-                    if resp.status_code >= 400:
-                        raise HTTPException(status_code=resp.status_code, detail=resp.text)
-                    data = resp.json()
-
-                TASKS.update(
+                # non-stream 경로
+                data = await _generate_jd(req.jd)
+
+                await TASKS.update(
                     task_id,
                     status="finished",
                     finished_at=time.time(),
@@ -478,26 +575,39 @@ async def sim_then_generate(
                     result=data,
                 )
 
-            # 웹훅 (옵션)
+            # 웹훅 (옵션) — 공용 디스패처 큐에 넣고 반환(풀링/재시도/목적지별 배치는 디스패처 담당)
             if callback_url:
-                try:
-                    payload = {
-                        "task_id": task_id,
-                        "status": "finished",
-                        "saved_id": TASKS.get(task_id).get("saved_id"),
-                        "company_code": jd_payload.get("company_code"),
-                        "job_code": jd_payload.get("job_code"),
-                    }
-                    async with httpx.AsyncClient(timeout=10.0) as client:
-                        await client.post(callback_url, json=payload)
-                except Exception:
-                    pass
-
+                payload = {
+                    "task_id": task_id,
+                    "status": "finished",
+                    "saved_id": ((await TASKS.get(task_id)) or {}).get("saved_id"),
+                    "company_code": jd_payload.get("company_code"),
+                    "job_code": jd_payload.get("job_code"),
+                }
+                WEBHOOKS.submit(callback_url, payload)
+
+        except asyncio.CancelledError as e:
+            # 종료 drain 기한 초과 / 구독자 이탈 → 남은 시뮬 중단, 실패로 기록 후 취소 전파
+            reason = f"canceled: {e.args[0] if e.args else 'shutdown'}"
+            await rt.abort(ids, reason)
+            await TASKS.update(task_id, status="failed", finished_at=time.time(), error=reason)
+            await EVENT_HUB.publish(task_id, "error", {"message": reason})
+            raise
         except Exception as e:
-            TASKS.update(task_id, status="failed", finished_at=time.time(), error=str(e))
+            await TASKS.update(task_id, status="failed", finished_at=time.time(), error=str(e))
             await EVENT_HUB.publish(task_id, "error", {"message": str(e)})
-
-    asyncio.create_task(_bg_work())
+        finally:
+            EVENT_HUB.close(task_id)
+
+    # 감독 풀에 등록(참조 유지 + 종료 시 drain) — 사전 확인 이후 가득 찼으면 실패 처리 후 503
+    bg_task = rt.bg.spawn_nowait(_bg_work(), name=f"sim_then_generate:{task_id}")
+    if bg_task is None:
+        await TASKS.update(task_id, status="failed", finished_at=time.time(), error="rejected: busy")
+        EVENT_HUB.close(task_id)
+        raise _busy(rt)
+    if stream:
+        # SSE 구독자가 모두 끊기고 유예 내 재접속이 없으면 대기/생성 취소(토큰·슬롯 회수)
+        EVENT_HUB.watch(task_id, lambda: bg_task.cancel("client disconnected"))
 
     # ✅ stream 태스크면 result 링크를 stream으로 돌려줍니다.
     result_link = f"/api/llm/queue/tasks/{task_id}/stream" if stream else f"/api/llm/queue/tasks/{task_id}/result"
@@ -514,7 +624,7 @@ async def sim_then_generate(
 # ✅ 변경된 코드 (전체)
 @router.get("/tasks/{task_id}/status", response_model=TaskStatusResponse)
 async def task_status(task_id: str, rt: SimQueueRuntime = Depends(get_runtime), user_id: str = Query(DEFAULT_USER_ID)):
-    rec = TASKS.get(task_id)
+    rec = await TASKS.get(task_id)
     if not rec:
         raise HTTPException(status_code=404, detail="unknown task_id")
 
@@ -538,26 +648,20 @@ async def task_status(task_id: str, rt: SimQueueRuntime = Depends(get_runtime),
     else:
         progress = q_progress
 
-    # === 큐 스냅샷 기반: 남은 인원/ETA/대기 퍼센트 ===
-    snap = await rt.queue.engine.snapshot()
-    user_win = next((uw for uw in snap.per_user if uw.user_id == user_id), None)
-    queued = int(user_win.queued) if user_win else 0
-    inflight = int(user_win.inflight) if user_win else 0
+    # === 큐 스냅샷 기반: 남은 인원/ETA/대기 퍼센트 (캐시 스냅샷의 사용자 인덱스 조회, 폴링당 재계산 없음) ===
+    user_win = await rt.queue.engine.user_stats(user_id)
+    queued = int(user_win.queued)
+    inflight = int(user_win.inflight)
 
     rt.update_progress_ctx(user_id=user_id, queued=queued, inflight=inflight)
     ctx = rt.progress_ctx.get(user_id, {"baseline_total": 0})
     baseline_total = int(ctx.get("baseline_total", 0))
     active_now = queued + inflight
 
-    try:
-        avg_user = float(rt.queue._ema.get(user_id))
-    except Exception:
-        avg_user = 0.0
-    avg_per_item = float(avg_user or (snap.avg_finish_sec or 20.0))
-
-    per_user_parallel = max(1, rt.queue.engine.config.max_inflight_per_user)
+    # 앞선 작업은 prequeue 시뮬레이션 → 사용자 × simulated 처리시간 분위수(P50/P90)
     remaining_ahead = queued
-    eta_seconds = round((remaining_ahead / per_user_parallel) * avg_per_item, 1)
+    eta_seconds = round(rt.queue.wait_eta(user_id, remaining_ahead, kind=KIND_SIMULATED), 1)
+    eta_p90_seconds = round(rt.queue.wait_eta(user_id, remaining_ahead, kind=KIND_SIMULATED, q=0.9), 1)
 
     if baseline_total <= 0:
         wait_percent = 0.0 if active_now > 0 else 100.0
@@ -580,6 +684,7 @@ async def task_status(task_id: str, rt: SimQueueRuntime = Depends(get_runtime),
         prequeue_total=pre_total,
         remaining_ahead=remaining_ahead,
         eta_seconds=eta_seconds,
+        eta_p90_seconds=eta_p90_seconds,
         wait_percent=wait_percent,
         saved_id=rec.get("saved_id"),
         error=rec.get("error"),
@@ -597,7 +702,7 @@ async def task_status(task_id: str, rt: SimQueueRuntime = Depends(get_runtime),
     response_model_exclude_none=True,
 )
 async def task_result(task_id: str):
-    rec = TASKS.get(task_id)
+    rec = await TASKS.get(task_id)
     if not rec:
         raise HTTPException(status_code=404, detail="unknown task_id")
 
@@ -614,17 +719,27 @@ async def task_result(task_id: str):
             )
         raise HTTPException(status_code=409, detail=f"task not finished (status={st})")
 
-    result = rec.get("result")
+    result = await _task_result_body(rec)
     if not result:
         raise HTTPException(status_code=500, detail="task finished but result missing")
 
     return result
 
 
+_DISCONNECT_POLL_SEC = 0.5
+_KEEPALIVE_SEC = 10.0
+
+
+def _is_terminal_frame(frame: bytes) -> bool:
+    # sse_bytes 헤더(id/event 줄)만 확인 — data는 JSON 한 줄
+    head = frame.split(b"\n", 2)[:2]
+    return b"event: end" in head or b"event: error" in head
+
+
 # ✅ 신규 추가
 @router.get("/tasks/{task_id}/stream")
 async def stream_task(task_id: str, request: Request):
-    rec = TASKS.get(task_id)
+    rec = await TASKS.get(task_id)
     if not rec:
         raise HTTPException(status_code=404, detail="unknown task_id")
 
@@ -632,36 +747,83 @@ async def stream_task(task_id: str, request: Request):
         # non-stream 태스크는 /result 사용
         raise HTTPException(status_code=400, detail="non-stream task. Use /tasks/{task_id}/result")
 
-    q = EVENT_HUB.subscribe(task_id)
+    # 재접속: 표준 Last-Event-ID 헤더(EventSource 자동 전송) 또는 ?last_event_id=
+    resume_raw = request.headers.get("last-event-id") or request.query_params.get("last_event_id")
+    try:
+        resume_id: Optional[int] = int(resume_raw) if resume_raw else None
+    except ValueError:
+        resume_id = None
 
     async def gen():
+        # 구독을 먼저 등록하고 같은 틱에서 기준 ID를 고정 → 이후 발행분은 모두 q로 들어옴
+        q = EVENT_HUB.subscribe(task_id)
+        backlog = EVENT_HUB.since(task_id, resume_id) if resume_id is not None else None
+        base_id = EVENT_HUB.last_id(task_id)
+        last_sent = resume_id or 0
         try:
-            # 최초 상태 스냅샷
-            yield sse_bytes("status", {"status": rec["status"], "meta": rec.get("meta")})
-
-            # 이미 종료된 경우 즉시 end/error
-            if rec["status"] in ("finished", "failed"):
-                if rec["status"] == "finished":
-                    yield sse_bytes(
-                        "end",
-                        {
-                            "saved_id": rec.get("saved_id"),
-                            "title": (rec.get("result") or {}).get("title"),
-                            "markdown": (rec.get("result") or {}).get("markdown"),
-                        },
-                    )
-                else:
-                    yield sse_bytes("error", {"message": rec.get("error")})
-                return
-
-            # 실시간 이벤트 소비
+            # 구독 이후 상태를 다시 읽음(그 사이 종료됐으면 스냅샷이 종료 상태 → 종료 프레임으로 응답)
+            cur = await TASKS.get(task_id) or rec
+            if backlog is not None:
+                # 재접속 → 놓친 구간만 재전송
+                for eid, frame in backlog:
+                    yield frame
+                    last_sent = eid
+                    if _is_terminal_frame(frame):
+                        return
+            else:
+                # 최초 접속(또는 로그가 밀려 재전송 불가) → 상태 스냅샷
+                last_sent = base_id
+                yield sse_bytes("status", {"status": cur["status"], "meta": cur.get("meta")})
+
+                # 이미 종료된 경우 즉시 end/error
+                # (재전송 경로는 종료 프레임이 로그/q에 있으므로 아래 실시간 루프에서 받음)
+                if cur["status"] in ("finished", "failed"):
+                    if cur["status"] == "finished":
+                        result = await _task_result_body(cur) or {}
+                        yield sse_bytes(
+                            "end",
+                            {
+                                "saved_id": cur.get("saved_id"),
+                                "title": result.get("title"),
+                                "markdown": result.get("markdown"),
+                            },
+                            last_sent or None,
+                        )
+                    else:
+                        yield sse_bytes("error", {"message": cur.get("error")}, last_sent or None)
+                    return
+
+            # 실시간 이벤트 소비 — 이벤트가 없어도 _DISCONNECT_POLL_SEC마다 연결 종료를 확인
+            # (구독 해제가 빨라야 EventHub 유예 후 생성 작업이 제때 취소됨), keep-alive는 _KEEPALIVE_SEC마다
+            idle = 0.0
             while True:
                 if await request.is_disconnected():
                     break
                 try:
-                    msg = await asyncio.wait_for(q.get(), timeout=10.0)
-                    yield sse_bytes(msg["type"], msg["data"])
+                    eid, frame = await asyncio.wait_for(q.get(), timeout=_DISCONNECT_POLL_SEC)
+                    idle = 0.0
                 except asyncio.TimeoutError:
+                    idle += _DISCONNECT_POLL_SEC
+                    if idle < _KEEPALIVE_SEC:
+                        continue
+                    idle = 0.0
+                    eid, frame = 0, b""
+                if eid > last_sent + 1 or (not eid and EVENT_HUB.last_id(task_id) > last_sent):
+                    # 드롭된 구간(큐 초과) 보충
+                    for geid, gframe in EVENT_HUB.since(task_id, last_sent) or []:
+                        if eid and geid >= eid:
+                            break
+                        yield gframe
+                        last_sent = geid
+                        if _is_terminal_frame(gframe):
+                            return
+                if eid > last_sent:
+                    yield frame
+                    last_sent = eid
+                    # 종료 프레임 이후엔 스트림을 닫음(구독 해제 → watch 정리)
+                    if _is_terminal_frame(frame):
+                        return
+                elif not eid:
                     # keep-alive
                     yield b": ping\n\n"
         finally:
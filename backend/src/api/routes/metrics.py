@@ -0,0 +1,24 @@
+# src/api/routes/metrics.py
+from fastapi import APIRouter, HTTPException, Response, status
+
+# prometheus_client가 없으면 503
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest  # type: ignore
+
+    _PROM = True
+except Exception:  # pragma: no cover
+    _PROM = False
+
+router = APIRouter(tags=["infra"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    """
+    Prometheus 스크레이프 엔드포인트(큐 메트릭은 QUEUE_METRICS=prom 일 때 수집).
+    """
+    if not _PROM:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="prometheus_client is not installed"
+        )
+    return Response(content=generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
@@ -82,7 +82,7 @@ class QueueStateResponse(BaseModel):
     # ▼ 단일 유저 대기 정보(요청하신 핵심 필드)
     user_id: str
     remaining_ahead: int  # 앞에 남은 인원(= 현재 queued 길이)
-    eta_seconds: float  # 예상 대기 시간(초): queued/per_user_limit * EMA
+    eta_seconds: float  # 예상 대기 시간(초): queued/per_user_limit * 처리시간 P50
     wait_percent: float  # 대기 진행률(%): since_ts 기준 경과시간/ETA
 
 
@@ -95,7 +95,8 @@ class TaskStatusResponse(BaseModel):
     prequeue_done: int
     prequeue_total: int
     remaining_ahead: int  # 지금 앞에 남은(queued) 개수
-    eta_seconds: float  # 내 차례까지 ETA(초)
+    eta_seconds: float  # 내 차례까지 ETA(초, 처리시간 P50 기준)
+    eta_p90_seconds: Optional[float] = None  # 보수적 ETA(초, P90 기준)
     wait_percent: float  # 서버 자체 계산 대기 진행률(%)
     saved_id: Optional[int] = None
     error: Optional[str] = None
@@ -1,6 +1,8 @@
 from sqlalchemy import (
     Boolean,
     Column,
+    Float,
+    Index,
     Integer,
     BigInteger,
     String,
@@ -148,3 +150,57 @@ class GeneratedJD(Base):
     style_snapshot_id = Column(BigInteger, ForeignKey("generated_styles.id", ondelete="SET NULL"))
     # ✅ 단방향 relationship (반대편 속성 필요 없음)
     job_code_ref = relationship("JobCode", lazy="joined")
+
+
+class LLMQueueItem(Base):
+    """
+    LLM 대기열 항목(내구성 큐). id(BIGSERIAL)가 FIFO 순번 역할을 합니다.
+    """
+
+    __tablename__ = "llm_queue_items"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    request_id = Column(Text, unique=True, nullable=False)
+    user_id = Column(Text, nullable=False)
+    payload = Column(JSON, nullable=False, server_default=text("'{}'::jsonb"))
+    priority = Column(Integer, nullable=False, server_default=text("0"))  # 클수록 먼저 admit
+    # queued|inflight|finished|failed|canceled|expired
+    status = Column(Text, nullable=False, server_default=text("'queued'"))
+    enqueued_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text("NOW()"))
+    admitted_at = Column(TIMESTAMP(timezone=True), nullable=True)
+    finished_at = Column(TIMESTAMP(timezone=True), nullable=True)
+    terminal_at = Column(TIMESTAMP(timezone=True), nullable=True)  # 종료(완료/실패/취소) 시각 — 보존 정책 기준
+    fail_reason = Column(Text, nullable=True)
+    eta_sec = Column(Float, nullable=True)
+    archived = Column(Boolean, nullable=False, server_default=text("FALSE"))  # 압축(payload 제거) 여부
+
+    __table_args__ = (
+        Index("ix_lqi_user_queued", "user_id", "id", postgresql_where=text("status = 'queued'")),
+        Index("ix_lqi_prio_queued", text("priority DESC"), "id", postgresql_where=text("status = 'queued'")),
+        Index("ix_lqi_status", "status", "user_id"),
+        Index("ix_lqi_inflight", "admitted_at", postgresql_where=text("status = 'inflight'")),
+        Index("ix_lqi_terminal", "terminal_at", postgresql_where=text("terminal_at IS NOT NULL")),
+    )
+
+
+class LLMTask(Base):
+    """
+    sim-then-generate 비동기 태스크 상태(PostgresTaskStore). 종료 후 긴 결과는 saved_id 참조만 보관.
+    """
+
+    __tablename__ = "llm_tasks"
+
+    task_id = Column(Text, primary_key=True)
+    user_id = Column(Text, nullable=False)
+    status = Column(Text, nullable=False, server_default=text("'queued'"))  # queued|waiting|generating|finished|failed
+    stream_mode = Column(Boolean, nullable=False, server_default=text("FALSE"))
+    meta = Column(JSON, nullable=False, server_default=text("'{}'::jsonb"))
+    saved_id = Column(Integer, nullable=True)  # generated_jds.id
+    error = Column(Text, nullable=True)
+    result = Column(JSON, nullable=True)
+    result_ref = Column(Boolean, nullable=False, server_default=text("FALSE"))  # True면 markdown 생략(saved_id 참조)
+    req_json = Column(JSON, nullable=True)  # 종료 시 제거
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text("NOW()"))
+    finished_at = Column(TIMESTAMP(timezone=True), nullable=True)
+
+    __table_args__ = (Index("ix_llm_tasks_finished", "finished_at", postgresql_where=text("finished_at IS NOT NULL")),)
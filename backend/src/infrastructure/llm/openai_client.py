@@ -212,11 +212,15 @@ class OpenAIAsyncLLM(LLMClient):
         }
         kwargs.update(_normalize_chat_params(params))
         stream = await self._cli.chat.completions.create(**kwargs)
-        async for chunk in stream:
-            try:
-                delta = chunk.choices[0].delta
-                piece = getattr(delta, "content", None)
-                if piece:
-                    yield piece
-            except Exception:
-                continue
+        try:
+            async for chunk in stream:
+                try:
+                    delta = chunk.choices[0].delta
+                    piece = getattr(delta, "content", None)
+                    if piece:
+                        yield piece
+                except Exception:
+                    continue
+        finally:
+            # 소비 측 취소/중단(aclose) 시 업스트림 HTTP 스트림을 즉시 닫아 토큰 생성 중단
+            await stream.close()
@@ -1,9 +1,10 @@
 # src/infrastructure/queue/__init__.py
 from infrastructure.queue.config import QueueConfig, load_queue_config
-from infrastructure.queue.engine import QueueEngine
+from infrastructure.queue.engine import QueueEngine, QueueFullError
 from infrastructure.queue.metrics import QueueMetrics, NoopQueueMetrics, PrometheusQueueMetrics
 from infrastructure.queue.models import (
     Status,
+    Priority,
     Limits,
     RequestInfo,
     QueueItem,
@@ -11,14 +12,23 @@ from infrastructure.queue.models import (
     FinishResult,
     QueueSnapshot,
     UserWindow,
+    QueuePosition,
+    QueueRecord,
+    QueueStats,
+    UserStats,
 )
+from .factory import make_limiter, make_queue_repo, make_scheduler, make_task_store
+from .limiter import AIMDLimiter, FixedLimiter
 from .repo import IQueueRepo, InMemoryQueueRepo
-from .scheduler import RoundRobinScheduler
+from .scheduler import DeficitRoundRobinScheduler, RoundRobinScheduler
+from .supervisor import PoolClosedError, TaskSupervisor
+from .task_store import ITaskStore, InMemoryTaskStore
 
 __all__ = [
     "QueueConfig",
     "load_queue_config",
     "Status",
+    "Priority",
     "Limits",
     "RequestInfo",
     "QueueItem",
@@ -26,10 +36,26 @@ __all__ = [
     "FinishResult",
     "QueueSnapshot",
     "UserWindow",
+    "QueuePosition",
+    "QueueRecord",
+    "QueueStats",
+    "UserStats",
     "IQueueRepo",
     "InMemoryQueueRepo",
+    "make_queue_repo",
     "RoundRobinScheduler",
+    "DeficitRoundRobinScheduler",
+    "make_scheduler",
+    "ITaskStore",
+    "InMemoryTaskStore",
+    "make_task_store",
+    "FixedLimiter",
+    "AIMDLimiter",
+    "make_limiter",
+    "TaskSupervisor",
+    "PoolClosedError",
     "QueueEngine",
+    "QueueFullError",
     "QueueMetrics",
     "NoopQueueMetrics",
     "PrometheusQueueMetrics",
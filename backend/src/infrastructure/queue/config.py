@@ -1,6 +1,7 @@
 # src/infrastructure/queue/config.py
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Dict
 
 
 @dataclass(frozen=True)
@@ -8,14 +9,63 @@ class QueueConfig:
     # 글로벌/유저 동시실행 제한
     max_inflight_global: int = 4
     max_inflight_per_user: int = 4
+    # 글로벌 한도 모드: "fixed"(max_inflight_global 고정) | "aimd"(지연/429 기반 자동 조절, 시작값 max_inflight_global)
+    limit_mode: str = "fixed"
+    limit_min: int = 1
+    limit_max: int = 32
+    # AIMD 감소 배수 / 지연 급등 판정 배수(기준 처리시간 대비)
+    limit_backoff: float = 0.5
+    limit_latency_spike: float = 3.0
+    # 대기열 깊이 제한(admission control) — 넘으면 enqueue 거절(429 + Retry-After), 0이면 제한 없음
+    max_queued_global: int = 1000
+    max_queued_per_user: int = 200
+    # 스케줄러: "drr"(우선순위+가중 공정) | "rr"(단순 라운드로빈)
+    scheduler: str = "drr"
+    # 사용자별 DRR 가중치(기본 1.0) — env 예: QUEUE_USER_WEIGHTS="alice=2,batch-bot=0.5"
+    user_weights: Dict[str, float] = field(default_factory=dict)
     # 한번에 admit 시도할 최대 개수(스케줄러 루프에서 사용)
     admit_batch_size: int = 64
+    # 워커 유휴 대기 상한(초) — 작업/용량 신호가 없어도 이 주기로 admit 재시도
+    # (TTL 만료 처리, 다른 프로세스가 넣은 작업(Redis/Postgres) 감지용)
+    idle_wait_sec: float = 5.0
+    # inflight 리스(초) — admit 후 이 시간이 지나도 종료되지 않은 항목은 failed로 회수
+    # (Redis/Postgres에서 크래시/재시작한 워커가 남긴 inflight가 한도를 영구 점유하지 않게), 0이면 끔
+    # 갱신(heartbeat)은 없으므로 최대 처리시간보다 넉넉히 크게 설정
+    inflight_lease_sec: int = 60 * 10
     # 대기열 TTL(초) — 오래된 요청 자동 취소
     queued_ttl_sec: int = 60 * 30  # 30분
     # 추정 ETA 샘플 개수(완료 시간 평균을 낼 때 사용)
     eta_window: int = 50
     # 메트릭 백엔드: "noop" | "prom"
     metrics_backend: str = "noop"
+    # 메트릭 user 라벨 해시 버킷 수(카디널리티 상한, 0이면 "all" 하나)
+    metrics_user_buckets: int = 32
+    # 저장소 백엔드: "memory" | "redis" | "postgres"
+    repo_backend: str = "memory"
+    redis_url: str = "redis://localhost:6379/0"
+    redis_prefix: str = "llmq"
+    # 종료 항목 보존 정책 — 시간 창(초)/최대 개수를 넘으면 압축 아카이브로 이동
+    retention_sec: int = 60 * 60  # 1시간
+    retention_max_items: int = 10_000
+    # 압축 아카이브(링버퍼) 크기 — 넘치면 가장 오래된 레코드부터 폐기
+    archive_size: int = 50_000
+    # 캐시 스냅샷 유효 시간(ms) — 상태 폴링은 이 주기당 스냅샷 1회만 계산
+    snapshot_ttl_ms: int = 500
+    # 백그라운드 압축 주기(초)
+    compact_interval_sec: float = 30.0
+    # 워커 감독 풀: 실행 태스크 동시 상한 / 비동기 백그라운드 작업(sim_then_generate) 동시 상한
+    worker_max_tasks: int = 64
+    bg_max_tasks: int = 256
+    # 종료 시 실행 중 작업 완료 대기 기한(초) — 넘으면 남은 태스크 취소
+    drain_timeout_sec: float = 30.0
+    # 스트림 태스크의 SSE 구독자가 모두 끊긴 뒤 재접속 유예(초) — 지나면 생성/대기 작업 취소
+    stream_abandon_grace_sec: float = 1.0
+    # 비동기 태스크 저장소: "memory" | "postgres" — 종료 태스크 TTL(마지막 접근 기준)/최대 보관 수
+    task_store_backend: str = "memory"
+    task_ttl_sec: int = 60 * 60
+    task_max_items: int = 10_000
+    # 종료 후 인라인 보관할 markdown 최대 길이(초과 시 saved_id 참조만 유지)
+    task_inline_result_max: int = 4096
 
 
 def _int_env(name: str, default: int) -> int:
@@ -25,12 +75,60 @@ def _int_env(name: str, default: int) -> int:
         return default
 
 
+def _float_env(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except Exception:
+        return default
+
+
+def _weights_env(name: str) -> Dict[str, float]:
+    out: Dict[str, float] = {}
+    for part in os.getenv(name, "").split(","):
+        uid, sep, w = part.partition("=")
+        if not sep:
+            continue
+        try:
+            out[uid.strip()] = float(w)
+        except ValueError:
+            continue
+    return out
+
+
 def load_queue_config() -> QueueConfig:
     return QueueConfig(
         max_inflight_global=_int_env("QUEUE_MAX_INFLIGHT", 4),
         max_inflight_per_user=_int_env("QUEUE_USER_MAX_INFLIGHT", 4),
+        limit_mode=os.getenv("QUEUE_LIMIT_MODE", "fixed").lower(),
+        limit_min=_int_env("QUEUE_LIMIT_MIN", 1),
+        limit_max=_int_env("QUEUE_LIMIT_MAX", 32),
+        limit_backoff=_float_env("QUEUE_LIMIT_BACKOFF", 0.5),
+        limit_latency_spike=_float_env("QUEUE_LIMIT_SPIKE", 3.0),
+        max_queued_global=_int_env("QUEUE_MAX_QUEUED", 1000),
+        max_queued_per_user=_int_env("QUEUE_USER_MAX_QUEUED", 200),
+        scheduler=os.getenv("QUEUE_SCHEDULER", "drr").lower(),
+        user_weights=_weights_env("QUEUE_USER_WEIGHTS"),
         admit_batch_size=_int_env("QUEUE_ADMIT_BATCH", 64),
+        idle_wait_sec=float(_int_env("QUEUE_IDLE_WAIT_SEC", 5)),
         queued_ttl_sec=_int_env("QUEUE_TTL_SEC", 1800),
+        inflight_lease_sec=_int_env("QUEUE_INFLIGHT_LEASE_SEC", 600),
         eta_window=_int_env("QUEUE_ETA_WINDOW", 50),
         metrics_backend=os.getenv("QUEUE_METRICS", "noop").lower(),
+        metrics_user_buckets=_int_env("QUEUE_METRICS_USER_BUCKETS", 32),
+        repo_backend=os.getenv("QUEUE_BACKEND", "memory").lower(),
+        redis_url=os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+        redis_prefix=os.getenv("QUEUE_REDIS_PREFIX", "llmq"),
+        retention_sec=_int_env("QUEUE_RETENTION_SEC", 3600),
+        retention_max_items=_int_env("QUEUE_RETENTION_MAX", 10_000),
+        archive_size=_int_env("QUEUE_ARCHIVE_SIZE", 50_000),
+        snapshot_ttl_ms=_int_env("QUEUE_SNAPSHOT_TTL_MS", 500),
+        compact_interval_sec=float(_int_env("QUEUE_COMPACT_INTERVAL_SEC", 30)),
+        worker_max_tasks=_int_env("QUEUE_WORKER_MAX_TASKS", 64),
+        bg_max_tasks=_int_env("QUEUE_BG_MAX_TASKS", 256),
+        drain_timeout_sec=_float_env("QUEUE_DRAIN_TIMEOUT_SEC", 30.0),
+        stream_abandon_grace_sec=_float_env("QUEUE_STREAM_ABANDON_GRACE_SEC", 1.0),
+        task_store_backend=os.getenv("TASK_STORE_BACKEND", "memory").lower(),
+        task_ttl_sec=_int_env("TASK_TTL_SEC", 3600),
+        task_max_items=_int_env("TASK_MAX_ITEMS", 10_000),
+        task_inline_result_max=_int_env("TASK_INLINE_RESULT_MAX", 4096),
     )
@@ -1,22 +1,44 @@
 # src/infrastructure/queue/engine.py
 import asyncio
+import inspect
+import logging
+import time
 import uuid
 from datetime import timedelta
-from typing import Optional, Dict, Any, List
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
 
 from infrastructure.queue.config import QueueConfig
+from infrastructure.queue.eta import EtaEstimator, payload_kind
+from infrastructure.queue.factory import make_limiter
+from infrastructure.queue.limiter import AIMDLimiter, FixedLimiter
 from infrastructure.queue.metrics import QueueMetrics, NoopQueueMetrics
 from infrastructure.queue.models import (
-    RequestInfo,
-    QueueItem,
+    Priority,
+    QueueRecord,
     Status,
     Limits,
     AdmitResult,
     FinishResult,
-    QueueSnapshot,
+    QueueStats,
+    UserStats,
 )
-from infrastructure.queue.repo import IQueueRepo, InMemoryQueueRepo
-from infrastructure.queue.scheduler import RoundRobinScheduler
+from infrastructure.queue.repo import _TERMINAL, IQueueRepo, InMemoryQueueRepo
+from infrastructure.queue.scheduler import DeficitRoundRobinScheduler, RoundRobinScheduler
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """
+    대기열 깊이 제한 초과로 enqueue 거절. retry_after_sec: 현재 처리시간 추정으로 계산한 배수(drain) 시간.
+    """
+
+    def __init__(self, *, scope: str, depth: int, limit: int, retry_after_sec: float) -> None:
+        super().__init__(f"queue full ({scope}): {depth}/{limit}")
+        self.scope = scope  # "global" | "user"
+        self.depth = depth
+        self.limit = limit
+        self.retry_after_sec = retry_after_sec
 
 
 class QueueEngine:
@@ -28,58 +50,145 @@ class QueueEngine:
         self,
         *,
         repo: Optional[IQueueRepo] = None,
-        scheduler: Optional[RoundRobinScheduler] = None,
+        scheduler: Optional[RoundRobinScheduler | DeficitRoundRobinScheduler] = None,
         config: Optional[QueueConfig] = None,
         metrics: Optional[QueueMetrics] = None,
+        limiter: Optional[FixedLimiter | AIMDLimiter] = None,
     ) -> None:
-        self.repo = repo or InMemoryQueueRepo()
-        self.scheduler = scheduler or RoundRobinScheduler()
         self.config = config or QueueConfig()
+        self.repo = repo or InMemoryQueueRepo(archive_size=self.config.archive_size)
+        self.scheduler = scheduler or RoundRobinScheduler()
         self.metrics = metrics or NoopQueueMetrics()
+        # 글로벌 동시실행 한도(고정 또는 AIMD) — admit 시 limiter.limit 사용
+        self.limiter = limiter or make_limiter(self.config)
+        self._saturated = False  # 마지막 admit 시점에 한도까지 차 있었는지(AIMD 증가 조건)
 
-        self._eta_samples: List[float] = []  # 최근 완료 시간 샘플(초)
-        self._lock = asyncio.Lock()
+        # 처리시간 추정기(사용자 × 작업 종류, 링버퍼 평균 + P50/P90 스트리밍 분위수)
+        self.eta = EtaEstimator(window=self.config.eta_window)
+        # "작업 또는 용량 생김" 신호 — enqueue/finish/cancel 시 set
+        self._wakeup = asyncio.Event()
+        # 완료 대기자: request_id → futures (종료 전이 시 resolve)
+        self._waiters: Dict[str, List[asyncio.Future]] = {}
+        # 스냅샷 캐시(snapshot_ttl_ms) + 사용자 인덱스, 동시 갱신 요청은 한 번으로 합침
+        self._snap: Optional[QueueStats] = None
+        self._snap_at = float("-inf")
+        self._snap_users: Dict[str, UserStats] = {}
+        self._snap_refresh: Optional[asyncio.Future] = None
+        # 마지막 리스 회수 시각(단조) — 첫 admit(기동 직후)에 바로 1회 실행
+        self._reclaimed_at = float("-inf")
 
     # -------- public API --------
 
-    async def enqueue(self, user_id: str, payload: Dict[str, Any]) -> RequestInfo:
-        req = RequestInfo(request_id=str(uuid.uuid4()), user_id=user_id, payload=payload)
-        item = QueueItem(request_id=req.request_id, user_id=req.user_id, payload=req.payload)
+    async def check_admission(self, user_id: str, n: int = 1) -> None:
+        """
+        n건을 더 받을 수 있는지 확인, 넘치면 QueueFullError.
+        확인과 적재 사이 경합이 있어 상한은 근사(동시 요청 수만큼 초과 가능)입니다.
+        """
+        cfg = self.config
+        if cfg.max_queued_per_user > 0:
+            depth = await self.repo.queued_count_user(user_id)
+            if depth + n > cfg.max_queued_per_user:
+                raise QueueFullError(
+                    scope="user",
+                    depth=depth,
+                    limit=cfg.max_queued_per_user,
+                    retry_after_sec=self._drain_sec(
+                        depth + n - cfg.max_queued_per_user,
+                        min(cfg.max_inflight_per_user, self.limiter.limit),
+                        user_id=user_id,
+                    ),
+                )
+        if cfg.max_queued_global > 0:
+            depth = await self.repo.queued_count_global()
+            if depth + n > cfg.max_queued_global:
+                raise QueueFullError(
+                    scope="global",
+                    depth=depth,
+                    limit=cfg.max_queued_global,
+                    retry_after_sec=self._drain_sec(depth + n - cfg.max_queued_global, self.limiter.limit),
+                )
+
+    async def enqueue(self, user_id: str, payload: Dict[str, Any], *, priority: int = Priority.batch) -> QueueRecord:
+        await self.check_admission(user_id)
+        item = QueueRecord(str(uuid.uuid4()), user_id, payload, priority)
         await self.repo.add(item)
         self.metrics.observe_enqueue(user_id)
-        return req
+        self._wakeup.set()
+        return item
+
+    async def enqueue_many(
+        self, user_id: str, payloads: List[Dict[str, Any]], *, priority: int = Priority.batch
+    ) -> List[Tuple[QueueRecord, int]]:
+        """
+        한 사용자의 요청 여러 건을 일괄 적재(저장소 임계구역/왕복 1회).
+        (QueueRecord, 적재 시점 사용자 내 순번 0기준) 목록 반환. 깊이 제한은 배치 전체 기준(전부 또는 거절).
+        """
+        if not payloads:
+            return []
+        await self.check_admission(user_id, len(payloads))
+        items = [QueueRecord(str(uuid.uuid4()), user_id, p, priority) for p in payloads]
+        positions = await self.repo.add_many(items)
+        for _ in items:
+            self.metrics.observe_enqueue(user_id)
+        self._wakeup.set()
+        return list(zip(items, positions))
 
-    async def admit(self) -> AdmitResult:
+    async def admit(self, max_n: Optional[int] = None) -> AdmitResult:
+        """
+        max_n: 이번에 받을 최대 건수(실행 측 여유 슬롯 수) — 기본 admit_batch_size.
+        """
+        limit = self.limiter.limit
         limits = Limits(
-            max_inflight_global=self.config.max_inflight_global,
+            max_inflight_global=limit,
             max_inflight_per_user=self.config.max_inflight_per_user,
         )
         # 만료 처리 먼저
         await self._expire_queued()
+        await self._reclaim_stale()
 
-        ids = await self.scheduler.select_admissions(
-            repo=self.repo, limits=limits, batch_max=self.config.admit_batch_size
+        # 선택 + admit 마킹을 저장소 한 번의 호출(임계구역/왕복)로 처리
+        n = self.config.admit_batch_size if max_n is None else min(max_n, self.config.admit_batch_size)
+        admitted_items: List[QueueRecord] = (
+            await self.repo.admit_batch(limits, n, policy=self.scheduler) if n > 0 else []
         )
-        admitted_items: List[QueueItem] = []
-        for rid in ids:
-            it = await self.repo.mark_admitted(rid)
-            if it and it.status == Status.inflight:
-                # 간단 ETA: 최근 평균 사용
-                it.eta_sec = self._avg_eta()
-                admitted_items.append(it)
-                self.metrics.observe_admit(it.user_id)
-        capacity_left = max(0, self.config.max_inflight_global - await self.repo.inflight_count_global())
+        for it in admitted_items:
+            # 사용자 × 작업 종류별 P50 처리시간
+            it.eta_sec = self.eta.estimate(it.user_id, payload_kind(it.payload))
+            wait = (it.admitted_at - it.enqueued_at).total_seconds() if it.admitted_at else None
+            self.metrics.observe_admit(it.user_id, wait_sec=wait, priority=it.priority)
+        # 게이지는 admit 루프(enqueue/finish/cancel 신호마다 실행)에서 갱신
+        inflight = await self.repo.inflight_count_global()
+        self.metrics.gauge_inflight_global(inflight)
+        self.metrics.gauge_queued_global(await self.repo.queued_count_global())
+        self.metrics.gauge_concurrency_limit(limit)
+        self._saturated = inflight >= limit
+        capacity_left = max(0, limit - inflight)
         return AdmitResult(admitted=admitted_items, capacity_left=capacity_left)
 
-    async def finish(self, request_id: str, ok: bool, reason: Optional[str] = None) -> FinishResult:
+    async def finish(
+        self, request_id: str, ok: bool, reason: Optional[str] = None, *, duration_sec: Optional[float] = None
+    ) -> FinishResult:
+        """
+        duration_sec: 호출자가 측정한 실제 처리시간(있으면 ETA 샘플로 우선 사용)
+        """
         it = await self.repo.mark_finished(request_id, ok=ok, reason=reason)
+        self._wakeup.set()
+        if it is not None:
+            self._resolve(it)
         if not it:
             return FinishResult(request_id=request_id, status=Status.canceled, duration_sec=None)
 
         dur = None
         if it.admitted_at and it.finished_at:
             dur = (it.finished_at - it.admitted_at).total_seconds()
-            await self._push_eta_sample(dur)
+            self.eta.observe(it.user_id, payload_kind(it.payload), duration_sec if duration_sec is not None else dur)
+        # 한도 조절(AIMD): 429/타임아웃/지연 급등 → 감소, 포화 상태의 정상 완료 → 증가
+        self.limiter.observe(
+            ok=ok,
+            duration_sec=duration_sec if duration_sec is not None else dur,
+            reason=reason,
+            saturated=self._saturated,
+        )
 
         if ok:
             self.metrics.observe_finish(it.user_id, success=True, duration_sec=dur)
@@ -90,54 +199,180 @@ class QueueEngine:
 
     async def cancel(self, request_id: str, reason: str = "client_cancel") -> Status:
         it = await self.repo.cancel(request_id, reason)
+        self._wakeup.set()
+        if it is not None:
+            self._resolve(it)
         return it.status if it else Status.canceled
 
-    async def status(self, request_id: str) -> Optional[QueueItem]:
+    def notify(self) -> None:
+        """wait_for_work() 대기자를 깨움(워커 종료 등)."""
+        self._wakeup.set()
+
+    async def wait_for_work(self, timeout: Optional[float] = None) -> bool:
+        """
+        enqueue/finish/cancel 신호가 올 때까지(최대 timeout초) 대기.
+        신호로 깨어나면 True, 타임아웃이면 False. 반환 직전에 신호를 리셋하므로
+        호출자는 곧바로 admit()을 다시 시도하면 됩니다(리셋 이후 변경은 다음 신호로 전달).
+        """
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+            woke = True
+        except asyncio.TimeoutError:
+            woke = False
+        self._wakeup.clear()
+        return woke
+
+    async def wait_for(self, request_id: str, timeout: Optional[float] = None) -> Optional[QueueRecord]:
+        """
+        요청이 종료 상태(finished/failed/canceled/expired)가 될 때까지 대기 후 항목 반환(없는 ID면 None).
+        폴링 없이 종료 전이 시점에 깨어나며, 다른 프로세스가 종료시킨 경우(Redis/Postgres)를 위해
+        idle_wait_sec마다 한 번 상태를 재확인합니다. timeout 초과 시 asyncio.TimeoutError.
+        """
+        async with asyncio.timeout(timeout):
+            while True:
+                fut: asyncio.Future = asyncio.get_running_loop().create_future()
+                self._waiters.setdefault(request_id, []).append(fut)
+                try:
+                    # 등록 후 확인 → 확인과 등록 사이 종료 누락 없음
+                    it = await self.repo.get(request_id)
+                    if it is None or it.status in _TERMINAL:
+                        return it
+                    try:
+                        return await asyncio.wait_for(asyncio.shield(fut), self.config.idle_wait_sec)
+                    except asyncio.TimeoutError:
+                        continue
+                finally:
+                    self._discard_waiter(request_id, fut)
+
+    async def wait_all(
+        self,
+        request_ids: Iterable[str],
+        *,
+        timeout: Optional[float] = None,
+        on_done: Optional[Callable[[str, Optional[QueueRecord], int, int], Optional[Awaitable[None]]]] = None,
+    ) -> Dict[str, Optional[QueueRecord]]:
+        """
+        모든 요청이 종료될 때까지 대기. 하나가 끝날 때마다 on_done(request_id, item, done, total) 호출
+        (진행률 push용, 코루틴이면 await). timeout 초과 시 asyncio.TimeoutError(남은 대기는 정리).
+        """
+        ids = list(dict.fromkeys(request_ids))
+        out: Dict[str, Optional[QueueRecord]] = {}
+
+        async def _one(rid: str) -> Tuple[str, Optional[QueueRecord]]:
+            return rid, await self.wait_for(rid)
+
+        tasks = [asyncio.ensure_future(_one(rid)) for rid in ids]
+        try:
+            async with asyncio.timeout(timeout):
+                for fut in asyncio.as_completed(tasks):
+                    rid, it = await fut
+                    out[rid] = it
+                    if on_done is not None:
+                        res = on_done(rid, it, len(out), len(ids))
+                        if inspect.isawaitable(res):
+                            await res
+        finally:
+            for t in tasks:
+                t.cancel()
+        return out
+
+    async def status(self, request_id: str) -> Optional[QueueRecord]:
         return await self.repo.get(request_id)
 
-    async def snapshot(self) -> QueueSnapshot:
-        snap = await self.repo.stats_snapshot(avg_finish_sec=self._avg_eta())
+    async def snapshot(self) -> QueueStats:
+        snap = await self.repo.stats_snapshot(avg_finish_sec=self.eta.mean())
+        snap.concurrency_limit = self.limiter.limit
         self.metrics.gauge_inflight_global(snap.inflight_global)
+        self.metrics.gauge_queued_global(snap.totals.get(Status.queued.value, 0))
+        self._snap, self._snap_at = snap, time.monotonic()
+        self._snap_users = {uw.user_id: uw for uw in snap.per_user}
         return snap
 
+    async def cached_snapshot(self) -> QueueStats:
+        """
+        snapshot_ttl_ms 이내면 캐시 재사용(고빈도 상태 폴링용). 만료 시 동시 호출자들은 한 번의 갱신을 공유.
+        반환 객체는 공유되므로 수정하지 마세요.
+        """
+        if self._snap is not None and time.monotonic() - self._snap_at < self.config.snapshot_ttl_ms / 1000.0:
+            return self._snap
+        if self._snap_refresh is None:
+            self._snap_refresh = asyncio.ensure_future(self.snapshot())
+            self._snap_refresh.add_done_callback(self._clear_snap_refresh)
+        # 한 호출자가 취소돼도 공유 갱신은 계속
+        return await asyncio.shield(self._snap_refresh)
+
+    async def user_stats(self, user_id: str) -> UserStats:
+        """
+        사용자 1명의 카운터(queued/inflight/...) — 캐시 스냅샷의 사용자 인덱스에서 O(1) 조회.
+        """
+        await self.cached_snapshot()
+        return self._snap_users.get(user_id) or UserStats(user_id)
+
+    async def compact(self) -> int:
+        """
+        보존 정책에 따라 종료 항목을 압축(백그라운드 주기 호출용).
+        """
+        return await self.repo.compact(
+            retention_sec=self.config.retention_sec,
+            max_items=self.config.retention_max_items,
+        )
+
     # -------- internal helpers --------
 
+    def _drain_sec(self, excess: int, parallel: int, *, user_id: Optional[str] = None) -> float:
+        # 초과분(excess건)이 빠질 때까지 걸리는 시간(P50 처리시간 기준)
+        return self.eta.wait_estimate(excess, parallel, user_id=user_id)
+
+    async def _reclaim_stale(self) -> None:
+        """
+        inflight 리스 만료 회수(크래시한 워커가 남긴 항목). lease/4(최대 60초) 간격으로만 저장소 조회.
+        """
+        from datetime import datetime, timezone
+
+        lease = self.config.inflight_lease_sec
+        now = time.monotonic()
+        if lease <= 0 or now - self._reclaimed_at < min(60.0, lease / 4):
+            return
+        self._reclaimed_at = now
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=lease)
+        reclaimed = await self.repo.reclaim_stale(cutoff, "lease_expired")
+        for it in reclaimed:
+            self.metrics.observe_finish(it.user_id, success=False, duration_sec=None)
+            self._resolve(it)
+        if reclaimed:
+            logger.warning("inflight 리스 만료 %d건 회수(failed)", len(reclaimed))
+
+    def _clear_snap_refresh(self, fut: asyncio.Future) -> None:
+        self._snap_refresh = None
+        if not fut.cancelled():
+            fut.exception()  # 대기자가 모두 취소된 경우의 미확인 예외 경고 방지
+
+    def _resolve(self, item: QueueRecord) -> None:
+        if item.status not in _TERMINAL:
+            return
+        for fut in self._waiters.pop(item.request_id, ()):
+            if not fut.done():
+                fut.set_result(item)
+
+    def _discard_waiter(self, request_id: str, fut: asyncio.Future) -> None:
+        futs = self._waiters.get(request_id)
+        if not futs:
+            return
+        try:
+            futs.remove(fut)
+        except ValueError:
+            pass
+        if not futs:
+            del self._waiters[request_id]
+
     async def _expire_queued(self) -> None:
         """
         대기열 TTL 만료 처리.
+        Repo의 마감 인덱스(enqueued_at 최소 힙)에서 기한이 지난 항목만 꺼내 취소합니다.
         """
         from datetime import datetime, timezone
 
-        now = datetime.now(timezone.utc)
-        ttl = timedelta(seconds=self.config.queued_ttl_sec)
-
-        # 단순히 repo 내부 아이템을 순회해야 하지만 repo는 캡슐화되어 있음.
-        # InMemory 구현에 한정해도 되지만, 범용성을 위해 공개 get()을 사용하고
-        # user 목록 + peek/dequeue로 소거는 비용이 큼.
-        # 여기서는 InMemory 전용 최적화 대신, "peek→시간 확인→취소" 접근을 반복.
-        user_ids = await self.repo.list_user_ids()
-        for uid in user_ids:
-            # 여러 개 만료 가능 — 안전하게 반복
-            while True:
-                rid = await self.repo.peek_user_queue(uid)
-                if not rid:
-                    break
-                it = await self.repo.get(rid)
-                if not it:
-                    break
-                if (now - it.enqueued_at) > ttl:
-                    await self.repo.cancel(rid, "ttl_expired")
-                    self.metrics.observe_expire(uid)
-                    continue
-                break
-
-    async def _push_eta_sample(self, dur: float) -> None:
-        async with self._lock:
-            self._eta_samples.append(dur)
-            if len(self._eta_samples) > self.config.eta_window:
-                self._eta_samples = self._eta_samples[-self.config.eta_window :]
-
-    def _avg_eta(self) -> Optional[float]:
-        if not self._eta_samples:
-            return None
-        return sum(self._eta_samples) / len(self._eta_samples)
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.config.queued_ttl_sec)
+        for it in await self.repo.expire_due(cutoff, "ttl_expired"):
+            self.metrics.observe_expire(it.user_id)
+            self._resolve(it)
@@ -0,0 +1,229 @@
+# src/infrastructure/queue/eta.py
+"""
+처리시간(ETA) 추정기 — 사용자 × 작업 종류(payload kind)별 스트리밍 통계.
+
+- _Ring: 최근 N개 링버퍼 + 누적합 → 평균 O(1) (리스트 슬라이싱/재합산 없음)
+- P2Quantile: P² 알고리즘(Jain & Chlamtac, 1985) 스트리밍 분위수 — 마커 5개, 갱신 O(1)
+- EtaEstimator: (user, kind) / (*, kind) / (user, *) / (*, *) 4개 키를 동시에 갱신하고,
+  샘플이 부족하면 좁은 키 → 넓은 키 순으로 폴백합니다.
+LLM 지연은 꼬리가 두꺼우므로 대기 ETA는 평균 대신 P50(기대)/P90(보수) 사용을 권장합니다.
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+KIND_DEFAULT = "default"
+KIND_SIMULATED = "simulated"
+KIND_JD_GENERATION = "jd.generation"
+KIND_ANALYSIS = "analysis"
+
+_ANY = "*"
+
+
+def payload_kind(payload: Optional[Mapping[str, Any]]) -> str:
+    """
+    큐 payload의 작업 종류. payload["kind"] 우선, 없으면 simulate_only → simulated.
+    """
+    if not payload:
+        return KIND_DEFAULT
+    kind = payload.get("kind")
+    if kind:
+        return str(kind)
+    return KIND_SIMULATED if payload.get("simulate_only") else KIND_DEFAULT
+
+
+class _Ring:
+    """
+    고정 크기 링버퍼(최근 window개) + 누적합.
+    """
+
+    __slots__ = ("_buf", "_i", "_n", "_sum")
+
+    def __init__(self, window: int) -> None:
+        self._buf: List[float] = [0.0] * max(1, window)
+        self._i = 0
+        self._n = 0
+        self._sum = 0.0
+
+    def __len__(self) -> int:
+        return self._n
+
+    def push(self, x: float) -> None:
+        if self._n == len(self._buf):
+            self._sum -= self._buf[self._i]
+        else:
+            self._n += 1
+        self._buf[self._i] = x
+        self._sum += x
+        self._i = (self._i + 1) % len(self._buf)
+
+    def mean(self) -> Optional[float]:
+        return self._sum / self._n if self._n else None
+
+
+class P2Quantile:
+    """
+    P² 스트리밍 분위수 추정(샘플 저장 없음). 5개 이하일 땐 정렬된 샘플에서 직접 계산.
+    """
+
+    __slots__ = ("_p", "_q", "_n", "_np", "_dn", "_count")
+
+    def __init__(self, p: float) -> None:
+        self._p = p
+        self._q: List[float] = []  # 마커 높이
+        self._n = [0, 1, 2, 3, 4]  # 마커 위치
+        self._np = [0.0, 2 * p, 4 * p, 2 + 2 * p, 4.0]  # 목표 위치
+        self._dn = [0.0, p / 2, p, (1 + p) / 2, 1.0]
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def push(self, x: float) -> None:
+        self._count += 1
+        q = self._q
+        if len(q) < 5:
+            q.append(x)
+            q.sort()
+            return
+
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = max(q[4], x)
+            k = 3
+        else:
+            k = 0
+            while k < 3 and x >= q[k + 1]:
+                k += 1
+        n = self._n
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self._np[i] += self._dn[i]
+
+        # 중간 마커 3개 보정(포물선, 실패 시 선형)
+        for i in (1, 2, 3):
+            d = self._np[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                s = 1 if d > 0 else -1
+                qp = q[i] + s / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + s) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - s) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+                )
+                if not q[i - 1] < qp < q[i + 1]:
+                    qp = q[i] + s * (q[i + s] - q[i]) / (n[i + s] - n[i])
+                q[i] = qp
+                n[i] += s
+
+    def value(self) -> Optional[float]:
+        q = self._q
+        if not q:
+            return None
+        if self._count <= 5:
+            return q[min(len(q) - 1, int(round(self._p * (len(q) - 1))))]
+        return q[2]
+
+
+class _Stats:
+    __slots__ = ("ring", "p50", "p90")
+
+    def __init__(self, window: int) -> None:
+        self.ring = _Ring(window)
+        self.p50 = P2Quantile(0.5)
+        self.p90 = P2Quantile(0.9)
+
+    def push(self, x: float) -> None:
+        self.ring.push(x)
+        self.p50.push(x)
+        self.p90.push(x)
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        return {"n": len(self.p50), "mean": self.ring.mean(), "p50": self.p50.value(), "p90": self.p90.value()}
+
+
+class EtaEstimator:
+    """
+    처리시간 추정기. observe()는 키 4개 × O(1).
+    - window: 평균용 링버퍼 크기(QueueConfig.eta_window)
+    - min_samples: 이보다 샘플이 적은 키는 건너뛰고 더 넓은 키로 폴백
+    - max_keys: 사용자×종류 키 상한(LRU 제거)
+    """
+
+    def __init__(
+        self,
+        *,
+        window: int = 50,
+        default_sec: float = 20.0,
+        min_samples: int = 3,
+        max_keys: int = 10_000,
+    ) -> None:
+        self._window = window
+        self.default_sec = default_sec
+        self._min = max(1, min_samples)
+        self._max_keys = max(4, max_keys)
+        self._stats: "OrderedDict[Tuple[str, str], _Stats]" = OrderedDict()
+
+    def observe(self, user_id: str, kind: str, sec: float) -> None:
+        if sec is None or sec < 0:
+            return
+        for key in ((user_id, kind), (_ANY, kind), (user_id, _ANY), (_ANY, _ANY)):
+            st = self._stats.get(key)
+            if st is None:
+                st = self._stats[key] = _Stats(self._window)
+            else:
+                self._stats.move_to_end(key)
+            st.push(float(sec))
+        # 글로벌 키는 매 관측마다 뒤로 이동하므로 LRU 제거 대상이 되지 않음
+        while len(self._stats) > self._max_keys:
+            self._stats.popitem(last=False)
+
+    def _lookup(self, user_id: Optional[str], kind: Optional[str]) -> Optional[_Stats]:
+        u, k = user_id or _ANY, kind or _ANY
+        for key in ((u, k), (_ANY, k), (u, _ANY), (_ANY, _ANY)):
+            st = self._stats.get(key)
+            if st is not None and len(st.p50) >= self._min:
+                return st
+        return self._stats.get((_ANY, _ANY))
+
+    def mean(self, user_id: Optional[str] = None, kind: Optional[str] = None) -> Optional[float]:
+        st = self._lookup(user_id, kind)
+        return st.ring.mean() if st else None
+
+    def quantile(self, user_id: Optional[str] = None, kind: Optional[str] = None, q: float = 0.5) -> Optional[float]:
+        """
+        q=0.5 → P50, q>=0.9 → P90 (그 사이는 선형 보간).
+        """
+        st = self._lookup(user_id, kind)
+        if st is None:
+            return None
+        p50, p90 = st.p50.value(), st.p90.value()
+        if p50 is None or p90 is None:
+            return None
+        if q <= 0.5:
+            return p50
+        if q >= 0.9:
+            return p90
+        return p50 + (p90 - p50) * (q - 0.5) / 0.4
+
+    def estimate(self, user_id: Optional[str] = None, kind: Optional[str] = None, q: float = 0.5) -> float:
+        """
+        1건 처리시간 추정(초). 관측이 없으면 default_sec.
+        """
+        v = self.quantile(user_id, kind, q)
+        return v if v is not None and v > 0 else self.default_sec
+
+    def wait_estimate(
+        self, ahead: int, parallel: int, *, user_id: Optional[str] = None, kind: Optional[str] = None, q: float = 0.5
+    ) -> float:
+        """
+        앞선 ahead건을 parallel개 슬롯으로 처리할 때 내 차례까지 대기(초).
+        """
+        if ahead <= 0:
+            return 0.0
+        return (ahead / max(1, parallel)) * self.estimate(user_id, kind, q)
+
+    def summary(self, user_id: Optional[str] = None, kind: Optional[str] = None) -> Dict[str, Optional[float]]:
+        st = self._lookup(user_id, kind)
+        return st.summary() if st else {"n": 0, "mean": None, "p50": None, "p90": None}
@@ -0,0 +1,71 @@
+# src/infrastructure/queue/factory.py
+from infrastructure.queue.config import QueueConfig
+from infrastructure.queue.limiter import AIMDLimiter, FixedLimiter
+from infrastructure.queue.repo import IQueueRepo, InMemoryQueueRepo
+from infrastructure.queue.scheduler import DeficitRoundRobinScheduler, RoundRobinScheduler
+from infrastructure.queue.task_store import InMemoryTaskStore, ITaskStore
+
+
+def make_queue_repo(cfg: QueueConfig) -> IQueueRepo:
+    """
+    설정(QUEUE_BACKEND)에 따라 큐 저장소를 생성합니다.
+    - "memory": 단일 프로세스 InMemory (기본)
+    - "redis" : 멀티워커 공유 Redis
+    - "postgres": 재시작에도 유지되는 내구성 큐(SKIP LOCKED admit)
+    """
+    backend = (cfg.repo_backend or "memory").lower()
+    if backend == "redis":
+        from infrastructure.queue.redis_repo import RedisQueueRepo
+
+        return RedisQueueRepo(url=cfg.redis_url, prefix=cfg.redis_prefix, archive_size=cfg.archive_size)
+    if backend in ("postgres", "pg"):
+        from infrastructure.queue.pg_repo import PostgresQueueRepo
+
+        return PostgresQueueRepo(archive_size=cfg.archive_size)
+    return InMemoryQueueRepo(archive_size=cfg.archive_size)
+
+
+def make_scheduler(cfg: QueueConfig) -> RoundRobinScheduler | DeficitRoundRobinScheduler:
+    """
+    설정(QUEUE_SCHEDULER)에 따라 스케줄러를 생성합니다.
+    - "drr": 우선순위 클래스 + 사용자 가중치 DRR (기본)
+    - "rr" : 단순 라운드로빈
+    """
+    if (cfg.scheduler or "drr").lower() == "rr":
+        return RoundRobinScheduler()
+    return DeficitRoundRobinScheduler(weights=cfg.user_weights)
+
+
+def make_limiter(cfg: QueueConfig) -> FixedLimiter | AIMDLimiter:
+    """
+    설정(QUEUE_LIMIT_MODE)에 따라 글로벌 동시실행 한도 제어기를 생성합니다.
+    - "fixed": max_inflight_global 고정 (기본)
+    - "aimd" : 지연/429 기반 가산 증가·배수 감소(QUEUE_LIMIT_MIN..QUEUE_LIMIT_MAX)
+    """
+    if (cfg.limit_mode or "fixed").lower() == "aimd":
+        return AIMDLimiter(
+            initial=cfg.max_inflight_global,
+            min_limit=cfg.limit_min,
+            max_limit=cfg.limit_max,
+            backoff=cfg.limit_backoff,
+            spike_factor=cfg.limit_latency_spike,
+        )
+    return FixedLimiter(cfg.max_inflight_global)
+
+
+def make_task_store(cfg: QueueConfig) -> ITaskStore:
+    """
+    설정(TASK_STORE_BACKEND)에 따라 비동기 태스크 저장소를 생성합니다.
+    - "memory": 프로세스 메모리(종료 태스크 TTL/LRU 제거, 기본)
+    - "postgres": llm_tasks 테이블(재시작/멀티워커 공유)
+    """
+    kwargs = dict(
+        ttl_sec=cfg.task_ttl_sec,
+        max_items=cfg.task_max_items,
+        inline_result_max=cfg.task_inline_result_max,
+    )
+    if (cfg.task_store_backend or "memory").lower() in ("postgres", "pg"):
+        from infrastructure.queue.pg_task_store import PostgresTaskStore
+
+        return PostgresTaskStore(**kwargs)
+    return InMemoryTaskStore(**kwargs)
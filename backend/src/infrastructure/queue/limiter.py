@@ -0,0 +1,120 @@
+# src/infrastructure/queue/limiter.py
+"""
+글로벌 동시실행 한도(max_inflight_global) 제어기.
+
+- FixedLimiter: 설정값 고정(기존 동작)
+- AIMDLimiter: TCP 혼잡제어식 AIMD
+  * 정상 완료(포화 상태에서) → 완료 1건당 +increase/limit (한도만큼 완료되면 +increase)
+  * 과부하 신호(제공자 429/타임아웃, 처리시간 급등) → limit × backoff (cooldown 동안 1회만)
+  * [min_limit, max_limit] 범위 유지
+한도는 프로세스 단위입니다(Redis/Postgres 멀티워커면 워커별 한도의 합이 실효 한도).
+"""
+
+import time
+from typing import Any, Dict, Optional
+
+_OVERLOAD_MARKERS = ("429", "rate limit", "rate_limit", "ratelimit", "too many requests", "timeout", "timed out")
+
+
+def is_overload_reason(reason: Optional[str]) -> bool:
+    """finish(reason)이 제공자 과부하(429/타임아웃)를 뜻하는지."""
+    if not reason:
+        return False
+    r = reason.lower()
+    return any(m in r for m in _OVERLOAD_MARKERS)
+
+
+class FixedLimiter:
+    def __init__(self, limit: int) -> None:
+        self._limit = max(1, limit)
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    def observe(self, *, ok: bool, duration_sec: Optional[float], reason: Optional[str], saturated: bool) -> None:
+        pass
+
+    def summary(self) -> Dict[str, Any]:
+        return {"mode": "fixed", "limit": self._limit}
+
+
+class AIMDLimiter:
+    """
+    - initial: 시작 한도(QueueConfig.max_inflight_global)
+    - spike_factor: 처리시간 > 기준 처리시간(EWMA) × spike_factor 이면 지연 급등으로 간주
+    - warmup: 기준 처리시간 샘플이 이보다 적으면 급등 판정 안 함
+    - cooldown_sec: 연속 감소 방지(같은 혼잡으로 끝난 요청들이 한도를 연쇄 삭감하지 않게)
+    """
+
+    def __init__(
+        self,
+        *,
+        initial: int,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        increase: float = 1.0,
+        backoff: float = 0.5,
+        spike_factor: float = 3.0,
+        warmup: int = 10,
+        cooldown_sec: float = 5.0,
+        alpha: float = 0.05,
+    ) -> None:
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self._limit = float(min(self.max_limit, max(self.min_limit, initial)))
+        self._increase = increase
+        self._backoff = min(max(backoff, 0.1), 0.95)
+        self._spike = spike_factor
+        self._warmup = warmup
+        self._cooldown = cooldown_sec
+        self._alpha = alpha
+        self._baseline: Optional[float] = None
+        self._samples = 0
+        self._last_cut = float("-inf")
+        self.cuts = 0
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def observe(self, *, ok: bool, duration_sec: Optional[float], reason: Optional[str], saturated: bool) -> None:
+        """
+        완료 1건 반영. saturated: admit 시점에 한도까지 차 있었는지(여유가 있을 때는 늘리지 않음).
+        """
+        if is_overload_reason(reason):
+            self._cut()
+            return
+        if duration_sec is None or duration_sec < 0:
+            return
+        if self._baseline is not None and self._samples >= self._warmup and duration_sec > self._baseline * self._spike:
+            # 급등 샘플은 기준에 섞지 않음
+            self._cut()
+            return
+        if ok:
+            self._baseline = (
+                duration_sec
+                if self._baseline is None
+                else (1 - self._alpha) * self._baseline + self._alpha * duration_sec
+            )
+            self._samples += 1
+            if saturated:
+                self._limit = min(self.max_limit, self._limit + self._increase / max(1.0, self._limit))
+
+    def _cut(self) -> None:
+        now = time.monotonic()
+        if now - self._last_cut < self._cooldown:
+            return
+        self._last_cut = now
+        self._limit = max(self.min_limit, self._limit * self._backoff)
+        self.cuts += 1
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "mode": "aimd",
+            "limit": self.limit,
+            "min": self.min_limit,
+            "max": self.max_limit,
+            "baseline_sec": self._baseline,
+            "cuts": self.cuts,
+        }
@@ -1,22 +1,48 @@
 # src/infrastructure/queue/metrics.py
+import zlib
 from abc import ABC, abstractmethod
 from typing import Optional
 
+from infrastructure.queue.models import Priority
+
 # Prometheus가 있으면 사용, 없으면 noop로 동작
 try:
-    from prometheus_client import Counter, Gauge, Histogram  # type: ignore
+    from prometheus_client import REGISTRY, Counter, Gauge, Histogram  # type: ignore
 
     _PROM = True
 except Exception:  # pragma: no cover
     _PROM = False
 
+# 대기/처리 시간 버킷(초) — LLM 지연은 꼬리가 길어 상단을 넓게
+_WAIT_BUCKETS = (0.05, 0.1, 0.3, 1, 3, 5, 10, 20, 30, 60, 120, 300, 600, 1800)
+_SERVICE_BUCKETS = (0.1, 0.3, 1, 3, 5, 10, 20, 30, 60, 120, 300)
+
+
+def user_label(user_id: str, buckets: int) -> str:
+    """
+    user 라벨 카디널리티 제한: 원본 ID 대신 해시 버킷("u00".."uNN")으로 매핑.
+    crc32는 프로세스 간 안정적이므로 멀티워커에서도 같은 사용자 → 같은 버킷.
+    buckets <= 0 이면 "all" 하나로 합산.
+    """
+    if buckets <= 0:
+        return "all"
+    return "u%02d" % (zlib.crc32(user_id.encode("utf-8")) % buckets)
+
+
+def priority_label(priority: int) -> str:
+    # 정의된 클래스명만 라벨로 사용(임의 정수 → "other")
+    try:
+        return Priority(int(priority)).name
+    except ValueError:
+        return "other"
+
 
 class QueueMetrics(ABC):
     @abstractmethod
     def observe_enqueue(self, user_id: str) -> None: ...
 
     @abstractmethod
-    def observe_admit(self, user_id: str) -> None: ...
+    def observe_admit(self, user_id: str, *, wait_sec: Optional[float] = None, priority: int = 0) -> None: ...
 
     @abstractmethod
     def observe_finish(self, user_id: str, *, success: bool, duration_sec: Optional[float]) -> None: ...
@@ -24,6 +50,12 @@ class QueueMetrics(ABC):
     @abstractmethod
     def gauge_inflight_global(self, n: int) -> None: ...
 
+    @abstractmethod
+    def gauge_queued_global(self, n: int) -> None: ...
+
+    @abstractmethod
+    def gauge_concurrency_limit(self, n: int) -> None: ...
+
     @abstractmethod
     def observe_expire(self, user_id: str) -> None: ...
 
@@ -32,7 +64,9 @@ class NoopQueueMetrics(QueueMetrics):
     def observe_enqueue(self, user_id: str) -> None:  # pragma: no cover
         pass
 
-    def observe_admit(self, user_id: str) -> None:  # pragma: no cover
+    def observe_admit(
+        self, user_id: str, *, wait_sec: Optional[float] = None, priority: int = 0
+    ) -> None:  # pragma: no cover
         pass
 
     def observe_finish(self, user_id: str, *, success: bool, duration_sec: Optional[float]) -> None:  # pragma: no cover
@@ -41,43 +75,80 @@ class NoopQueueMetrics(QueueMetrics):
     def gauge_inflight_global(self, n: int) -> None:  # pragma: no cover
         pass
 
+    def gauge_queued_global(self, n: int) -> None:  # pragma: no cover
+        pass
+
+    def gauge_concurrency_limit(self, n: int) -> None:  # pragma: no cover
+        pass
+
     def observe_expire(self, user_id: str) -> None:  # pragma: no cover
         pass
 
 
 class PrometheusQueueMetrics(QueueMetrics):
-    def __init__(self) -> None:
+    """
+    - user 라벨은 user_label()로 해시 버킷화(기본 32개) → 시계열 수 상한 고정
+    - queue_wait_seconds: enqueue→admit 대기(큐잉 지연), priority 라벨
+    - queue_duration_seconds: admit→finish 처리시간(LLM 지연)
+    - queue_inflight_global / queue_queued_global / queue_concurrency_limit 게이지
+    """
+
+    def __init__(self, *, user_buckets: int = 32, registry=None) -> None:
         if not _PROM:  # pragma: no cover
             raise RuntimeError("prometheus_client is not installed")
 
-        self.enqueued = Counter("queue_enqueued_total", "Total enqueued items", ["user"])
-        self.admitted = Counter("queue_admitted_total", "Total admitted items", ["user"])
+        self._buckets = user_buckets
+        reg = registry if registry is not None else REGISTRY
+        self.enqueued = Counter("queue_enqueued_total", "Total enqueued items", ["user"], registry=reg)
+        self.admitted = Counter("queue_admitted_total", "Total admitted items", ["user"], registry=reg)
         self.finished = Counter(
             "queue_finished_total",
             "Total finished items by status",
             ["user", "status"],  # status: success|failed
+            registry=reg,
+        )
+        self.inflight_gauge = Gauge("queue_inflight_global", "Current global inflight", registry=reg)
+        self.queued_gauge = Gauge("queue_queued_global", "Current global queued", registry=reg)
+        self.limit_gauge = Gauge("queue_concurrency_limit", "Current global concurrency limit", registry=reg)
+        self.expired = Counter("queue_expired_total", "Total expired items", ["user"], registry=reg)
+        self.wait = Histogram(
+            "queue_wait_seconds",
+            "Wait from enqueue to admit in seconds",
+            ["priority"],
+            buckets=_WAIT_BUCKETS,
+            registry=reg,
         )
-        self.inflight_gauge = Gauge("queue_inflight_global", "Current global inflight")
-        self.expired = Counter("queue_expired_total", "Total expired items", ["user"])
         self.latency = Histogram(
             "queue_duration_seconds",
             "Duration from admit to finish in seconds",
-            buckets=(0.1, 0.3, 1, 3, 5, 10, 20, 30, 60, 120, 300),
+            buckets=_SERVICE_BUCKETS,
+            registry=reg,
         )
 
+    def _user(self, user_id: str) -> str:
+        return user_label(user_id, self._buckets)
+
     def observe_enqueue(self, user_id: str) -> None:
-        self.enqueued.labels(user=user_id).inc()
+        self.enqueued.labels(user=self._user(user_id)).inc()
 
-    def observe_admit(self, user_id: str) -> None:
-        self.admitted.labels(user=user_id).inc()
+    def observe_admit(self, user_id: str, *, wait_sec: Optional[float] = None, priority: int = 0) -> None:
+        self.admitted.labels(user=self._user(user_id)).inc()
+        if wait_sec is not None:
+            self.wait.labels(priority=priority_label(priority)).observe(max(0.0, wait_sec))
 
     def observe_finish(self, user_id: str, *, success: bool, duration_sec: Optional[float]) -> None:
-        self.finished.labels(user=user_id, status="success" if success else "failed").inc()
+        self.finished.labels(user=self._user(user_id), status="success" if success else "failed").inc()
         if duration_sec is not None:
             self.latency.observe(duration_sec)
 
     def gauge_inflight_global(self, n: int) -> None:
         self.inflight_gauge.set(n)
 
+    def gauge_queued_global(self, n: int) -> None:
+        self.queued_gauge.set(n)
+
+    def gauge_concurrency_limit(self, n: int) -> None:
+        self.limit_gauge.set(n)
+
     def observe_expire(self, user_id: str) -> None:
-        self.expired.labels(user=user_id).inc()
+        self.expired.labels(user=self._user(user_id)).inc()
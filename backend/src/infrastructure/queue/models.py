@@ -1,6 +1,6 @@
 # src/infrastructure/queue/models.py
 from datetime import datetime, timezone
-from enum import Enum
+from enum import Enum, IntEnum
 from typing import Any, Dict, Optional, List
 
 # Pydantic v2 / v1 호환
@@ -29,6 +29,16 @@ class Status(str, Enum):
     expired = "expired"
 
 
+class Priority(IntEnum):
+    """
+    우선순위 클래스(값이 클수록 먼저 admit). 클래스 간에는 엄격 우선순위,
+    같은 클래스 안에서는 사용자별 가중 공정 분배(DRR)를 적용합니다.
+    """
+
+    batch = 0  # 배치 분석/시뮬레이션 등
+    interactive = 10  # 실시간 JD 스트리밍 등 사용자 대기 작업
+
+
 class Limits(BaseModel):
     if _V2:
         model_config = ConfigDict(extra="forbid")
@@ -56,13 +66,13 @@ class RequestInfo(BaseModel):
     request_id: str
     user_id: str
     payload: Dict[str, Any] = Field(default_factory=dict)
-    priority: int = 0  # 현재 라운드로빈이라 우선순위는 사용하지 않지만 확장용
+    priority: int = Priority.batch  # 클래스별 엄격 우선순위(DeficitRoundRobinScheduler)
     created_at: datetime = Field(default_factory=utcnow)
 
 
 class QueueItem(BaseModel):
     """
-    내부 저장 모델(상태머신).
+    상태 조회 응답 모델. 내부 저장은 QueueRecord(하단) → to_item()으로 변환.
     """
 
     if _V2:
@@ -75,6 +85,7 @@ class QueueItem(BaseModel):
     request_id: str
     user_id: str
     payload: Dict[str, Any] = Field(default_factory=dict)
+    priority: int = Priority.batch
     status: Status = Status.queued
     enqueued_at: datetime = Field(default_factory=utcnow)
     admitted_at: Optional[datetime] = None
@@ -104,7 +115,12 @@ class UserWindow(BaseModel):
     canceled: int = 0
 
 
-class AdmitResult(BaseModel):
+class QueuePosition(BaseModel):
+    """
+    대기 순번 조회 결과(0기준). 대기 중이 아니면 position_* 는 None.
+    position_global은 우선순위 클래스 + 라운드로빈 기준 근사치(가중치는 반영하지 않음).
+    """
+
     if _V2:
         model_config = ConfigDict(extra="forbid")
     else:
@@ -112,7 +128,24 @@ class AdmitResult(BaseModel):
         class Config:
             extra = "forbid"
 
-    admitted: List[QueueItem] = Field(default_factory=list)
+    user_id: str
+    request_id: Optional[str] = None
+    position_in_user: Optional[int] = None
+    position_global: Optional[int] = None
+    queue_len_user: int = 0
+    queue_len_global: int = 0
+
+
+class AdmitResult(BaseModel):
+    if _V2:
+        model_config = ConfigDict(extra="forbid", arbitrary_types_allowed=True)
+    else:
+
+        class Config:
+            extra = "forbid"
+            arbitrary_types_allowed = True
+
+    admitted: List["QueueRecord"] = Field(default_factory=list)
     capacity_left: int = 0
 
 
@@ -143,3 +176,121 @@ class QueueSnapshot(BaseModel):
     per_user: List[UserWindow] = Field(default_factory=list)
     # 간단 ETA(최근 완료 평균)
     avg_finish_sec: Optional[float] = None
+    # 현재 글로벌 동시실행 한도(AIMD면 조절된 값)
+    concurrency_limit: Optional[int] = None
+
+
+# --- 내부 레코드(__slots__, 검증 없음) ---------------------------------------------
+# 저장소/엔진은 아래 레코드로 상태를 유지하고, API 응답을 만들 때만 pydantic 모델로 변환합니다.
+# (항목당 메모리/할당 비용 절감 — 상태 전이마다 검증 모델을 갱신하지 않음)
+
+
+class QueueRecord:
+    """
+    대기 항목 내부 레코드. 필드는 QueueItem과 동일, to_item()으로 변환.
+    """
+
+    __slots__ = (
+        "request_id",
+        "user_id",
+        "payload",
+        "priority",
+        "status",
+        "enqueued_at",
+        "admitted_at",
+        "finished_at",
+        "fail_reason",
+        "eta_sec",
+    )
+
+    def __init__(
+        self,
+        request_id: str,
+        user_id: str,
+        payload: Optional[Dict[str, Any]] = None,
+        priority: int = Priority.batch,
+        status: Status = Status.queued,
+        enqueued_at: Optional[datetime] = None,
+        admitted_at: Optional[datetime] = None,
+        finished_at: Optional[datetime] = None,
+        fail_reason: Optional[str] = None,
+        eta_sec: Optional[float] = None,
+    ) -> None:
+        self.request_id = request_id
+        self.user_id = user_id
+        self.payload = payload if payload is not None else {}
+        self.priority = int(priority)
+        self.status = status
+        self.enqueued_at = enqueued_at or utcnow()
+        self.admitted_at = admitted_at
+        self.finished_at = finished_at
+        self.fail_reason = fail_reason
+        self.eta_sec = eta_sec
+
+    def __repr__(self) -> str:
+        return f"QueueRecord({self.request_id!r}, user={self.user_id!r}, status={self.status.value})"
+
+    def to_item(self) -> QueueItem:
+        return QueueItem(**{k: getattr(self, k) for k in self.__slots__})
+
+
+class UserStats:
+    """
+    사용자별 카운터 레코드. to_window()로 UserWindow 변환.
+    """
+
+    __slots__ = ("user_id", "queued", "inflight", "finished", "failed", "canceled")
+
+    def __init__(
+        self, user_id: str, queued: int = 0, inflight: int = 0, finished: int = 0, failed: int = 0, canceled: int = 0
+    ) -> None:
+        self.user_id = user_id
+        self.queued = queued
+        self.inflight = inflight
+        self.finished = finished
+        self.failed = failed
+        self.canceled = canceled
+
+    def to_window(self) -> UserWindow:
+        return UserWindow(**{k: getattr(self, k) for k in self.__slots__})
+
+
+class QueueStats:
+    """
+    스냅샷 내부 레코드. to_snapshot()으로 QueueSnapshot 변환.
+    """
+
+    __slots__ = ("ts", "totals", "inflight_global", "per_user", "avg_finish_sec", "concurrency_limit")
+
+    def __init__(
+        self,
+        *,
+        totals: Dict[str, int],
+        inflight_global: int,
+        per_user: List[UserStats],
+        avg_finish_sec: Optional[float] = None,
+        concurrency_limit: Optional[int] = None,
+        ts: Optional[datetime] = None,
+    ) -> None:
+        self.ts = ts or utcnow()
+        self.totals = totals
+        self.inflight_global = inflight_global
+        self.per_user = per_user
+        self.avg_finish_sec = avg_finish_sec
+        self.concurrency_limit = concurrency_limit
+
+    def to_snapshot(self) -> QueueSnapshot:
+        return QueueSnapshot(
+            ts=self.ts,
+            totals=dict(self.totals),
+            inflight_global=self.inflight_global,
+            per_user=[u.to_window() for u in self.per_user],
+            avg_finish_sec=self.avg_finish_sec,
+            concurrency_limit=self.concurrency_limit,
+        )
+
+
+if _V2:
+    AdmitResult.model_rebuild()
+else:  # pragma: no cover
+    AdmitResult.update_forward_refs(QueueRecord=QueueRecord)
@@ -0,0 +1,485 @@
+# src/infrastructure/queue/pg_repo.py
+"""
+Postgres 기반 IQueueRepo 구현 (내구성 큐, 재시작/멀티프로세스 공유).
+
+- 테이블: llm_queue_items (postgres/init/init.sql, db.models.LLMQueueItem)
+- admit: FOR UPDATE SKIP LOCKED로 후보 행을 잠그고, 우선순위 클래스 순 → 클래스 내 라운드로빈 선택 후
+  한 번의 UPDATE로 inflight 전이 → 여러 워커가 동시에 admit해도 중복 배정 없음
+- 상태 전이는 조건부 UPDATE ... RETURNING (queued→inflight 등) 으로 원자적
+주의: 글로벌/유저 동시실행 한도는 트랜잭션 시작 시점 카운트 기준이므로,
+      동시 admit 워커가 여럿이면 한 배치만큼 일시 초과할 수 있습니다.
+"""
+
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from infrastructure.db.models import LLMQueueItem
+from infrastructure.queue.models import Limits, QueuePosition, QueueRecord, QueueStats, Status, UserStats, utcnow
+from infrastructure.queue.repo import IQueueRepo
+
+
+def _to_item(row: Optional[LLMQueueItem]) -> Optional[QueueRecord]:
+    if row is None:
+        return None
+    return QueueRecord(
+        request_id=row.request_id,
+        user_id=row.user_id,
+        payload=row.payload or {},
+        priority=row.priority,
+        status=Status(row.status),
+        enqueued_at=row.enqueued_at,
+        admitted_at=row.admitted_at,
+        finished_at=row.finished_at,
+        fail_reason=row.fail_reason,
+        eta_sec=row.eta_sec,
+    )
+
+
+class PostgresQueueRepo(IQueueRepo):
+    """
+    session_factory: AsyncSession 팩토리(기본: infrastructure.db.database.SessionLocal)
+    """
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], AsyncSession]] = None,
+        *,
+        archive_size: int = 50_000,
+        scan_factor: int = 8,
+    ) -> None:
+        if session_factory is None:
+            from infrastructure.db.database import SessionLocal
+
+            session_factory = SessionLocal
+        self._sf = session_factory
+        self._archive_size = archive_size
+        # admit 시 잠글 후보 수 = batch_max * scan_factor (유저 한도로 건너뛸 여유분)
+        self._scan_factor = max(1, scan_factor)
+        self._cursor_user: Optional[str] = None
+
+    # -------- 내부 유틸 --------
+
+    async def _update_returning(self, stmt) -> List[LLMQueueItem]:
+        async with self._sf() as s:
+            rows = (await s.execute(stmt.returning(LLMQueueItem))).scalars().all()
+            await s.commit()
+            return list(rows)
+
+    async def _transition_one(self, request_id: str, stmt) -> Optional[QueueRecord]:
+        rows = await self._update_returning(stmt)
+        if rows:
+            return _to_item(rows[0])
+        return await self.get(request_id)
+
+    # -------- IQueueRepo --------
+
+    async def add(self, item: QueueRecord) -> None:
+        async with self._sf() as s:
+            s.add(
+                LLMQueueItem(
+                    request_id=item.request_id,
+                    user_id=item.user_id,
+                    payload=item.payload,
+                    priority=int(item.priority),
+                    status=item.status.value,
+                    enqueued_at=item.enqueued_at,
+                )
+            )
+            await s.commit()
+
+    async def add_many(self, items: List[QueueRecord]) -> List[int]:
+        """
+        일괄 INSERT(트랜잭션 1회). 사용자 내 순번은 첫 항목 기준 COUNT 1회 + 증분.
+        """
+        if not items:
+            return []
+        T = LLMQueueItem
+        first = items[0]
+        async with self._sf() as s:
+            s.add_all(
+                [
+                    T(
+                        request_id=it.request_id,
+                        user_id=it.user_id,
+                        payload=it.payload,
+                        priority=int(it.priority),
+                        status=it.status.value,
+                        enqueued_at=it.enqueued_at,
+                    )
+                    for it in items
+                ]
+            )
+            await s.flush()
+            # 같은 사용자·우선순위 배치 기준: 내 클래스 이상 대기 수 - 배치 크기 = 첫 항목 앞 건수
+            n_ahead = (
+                await s.execute(
+                    select(func.count()).where(
+                        T.user_id == first.user_id,
+                        T.status == Status.queued.value,
+                        T.priority >= int(first.priority),
+                    )
+                )
+            ).scalar_one()
+            await s.commit()
+        base = int(n_ahead) - len(items)
+        return [base + i for i in range(len(items))]
+
+    async def get(self, request_id: str) -> Optional[QueueRecord]:
+        async with self._sf() as s:
+            row = (
+                await s.execute(select(LLMQueueItem).where(LLMQueueItem.request_id == request_id))
+            ).scalar_one_or_none()
+            return _to_item(row)
+
+    async def mark_admitted(self, request_id: str) -> Optional[QueueRecord]:
+        stmt = (
+            update(LLMQueueItem)
+            .where(LLMQueueItem.request_id == request_id, LLMQueueItem.status == Status.queued.value)
+            .values(status=Status.inflight.value, admitted_at=func.now())
+        )
+        return await self._transition_one(request_id, stmt)
+
+    async def mark_finished(self, request_id: str, ok: bool, reason: Optional[str]) -> Optional[QueueRecord]:
+        stmt = (
+            update(LLMQueueItem)
+            .where(
+                LLMQueueItem.request_id == request_id,
+                LLMQueueItem.status.in_([Status.inflight.value, Status.queued.value]),
+            )
+            .values(
+                status=(Status.finished if ok else Status.failed).value,
+                finished_at=func.now(),
+                terminal_at=func.now(),
+                fail_reason=None if ok else (reason or "failed"),
+            )
+        )
+        return await self._transition_one(request_id, stmt)
+
+    async def cancel(self, request_id: str, reason: str) -> Optional[QueueRecord]:
+        stmt = (
+            update(LLMQueueItem)
+            .where(LLMQueueItem.request_id == request_id, LLMQueueItem.status == Status.queued.value)
+            .values(status=Status.canceled.value, fail_reason=reason, terminal_at=func.now())
+        )
+        return await self._transition_one(request_id, stmt)
+
+    async def dequeue_for_user(self, user_id: str) -> Optional[str]:
+        # 테이블 큐에서는 상태 전이(mark_admitted) 전까지 행이 대기열에 남습니다.
+        return await self.peek_user_queue(user_id)
+
+    async def peek_user_queue(self, user_id: str) -> Optional[str]:
+        async with self._sf() as s:
+            return (
+                await s.execute(
+                    select(LLMQueueItem.request_id)
+                    .where(LLMQueueItem.user_id == user_id, LLMQueueItem.status == Status.queued.value)
+                    .order_by(LLMQueueItem.priority.desc(), LLMQueueItem.id)
+                    .limit(1)
+                )
+            ).scalar_one_or_none()
+
+    async def list_user_ids(self) -> List[str]:
+        async with self._sf() as s:
+            rows = await s.execute(
+                select(LLMQueueItem.user_id)
+                .where(LLMQueueItem.status.in_([Status.queued.value, Status.inflight.value]))
+                .group_by(LLMQueueItem.user_id)
+                .order_by(func.min(LLMQueueItem.id))
+            )
+            return [r[0] for r in rows]
+
+    async def inflight_count_global(self) -> int:
+        async with self._sf() as s:
+            return int(
+                (await s.execute(select(func.count()).where(LLMQueueItem.status == Status.inflight.value))).scalar_one()
+            )
+
+    async def queued_count_global(self) -> int:
+        async with self._sf() as s:
+            return int(
+                (await s.execute(select(func.count()).where(LLMQueueItem.status == Status.queued.value))).scalar_one()
+            )
+
+    async def inflight_count_user(self, user_id: str) -> int:
+        async with self._sf() as s:
+            return int(
+                (
+                    await s.execute(
+                        select(func.count()).where(
+                            LLMQueueItem.user_id == user_id, LLMQueueItem.status == Status.inflight.value
+                        )
+                    )
+                ).scalar_one()
+            )
+
+    async def queued_count_user(self, user_id: str) -> int:
+        async with self._sf() as s:
+            return int(
+                (
+                    await s.execute(
+                        select(func.count()).where(
+                            LLMQueueItem.user_id == user_id, LLMQueueItem.status == Status.queued.value
+                        )
+                    )
+                ).scalar_one()
+            )
+
+    async def stats_snapshot(self, avg_finish_sec: Optional[float]) -> QueueStats:
+        async with self._sf() as s:
+            rows = await s.execute(
+                select(LLMQueueItem.user_id, LLMQueueItem.status, func.count())
+                .where(LLMQueueItem.archived.is_(False))
+                .group_by(LLMQueueItem.user_id, LLMQueueItem.status)
+            )
+            totals: Dict[str, int] = {}
+            per_user: Dict[str, UserStats] = {}
+            for uid, st, n in rows:
+                totals[st] = totals.get(st, 0) + n
+                uw = per_user.setdefault(uid, UserStats(uid))
+                if st == Status.queued.value:
+                    uw.queued += n
+                elif st == Status.inflight.value:
+                    uw.inflight += n
+                elif st == Status.finished.value:
+                    uw.finished += n
+                elif st in (Status.failed.value, Status.expired.value):
+                    uw.failed += n
+                elif st == Status.canceled.value:
+                    uw.canceled += n
+        return QueueStats(
+            totals=totals,
+            inflight_global=totals.get(Status.inflight.value, 0),
+            per_user=list(per_user.values()),
+            avg_finish_sec=avg_finish_sec,
+        )
+
+    async def user_queue_ids(self, user_id: str) -> List[str]:
+        async with self._sf() as s:
+            rows = await s.execute(
+                select(LLMQueueItem.request_id)
+                .where(LLMQueueItem.user_id == user_id, LLMQueueItem.status == Status.queued.value)
+                .order_by(LLMQueueItem.priority.desc(), LLMQueueItem.id)
+            )
+            return [r[0] for r in rows]
+
+    async def queue_position(self, user_id: str, request_id: Optional[str] = None) -> QueuePosition:
+        """
+        순번을 COUNT 집계로 계산(ix_lqi_user_queued / ix_lqi_prio_queued 인덱스 범위 스캔, 행 전송 없음).
+        전역 순번 = 상위 우선순위 대기 수 + 같은 클래스 Σ_v min(len_v, k)
+        """
+        T = LLMQueueItem
+        queued = T.status == Status.queued.value
+        async with self._sf() as s:
+            ulen = (await s.execute(select(func.count()).where(T.user_id == user_id, queued))).scalar_one()
+            glen = (await s.execute(select(func.count()).where(queued))).scalar_one()
+            pos = QueuePosition(
+                user_id=user_id, request_id=request_id, queue_len_user=int(ulen), queue_len_global=int(glen)
+            )
+            if not request_id:
+                return pos
+            me = (
+                await s.execute(
+                    select(T.id, T.priority).where(T.request_id == request_id, T.user_id == user_id, queued)
+                )
+            ).first()
+            if me is None:
+                return pos
+            my_id, prio = me
+            k = (
+                await s.execute(
+                    select(func.count()).where(T.user_id == user_id, queued, T.priority == prio, T.id < my_id)
+                )
+            ).scalar_one()
+            ahead_user = (
+                await s.execute(select(func.count()).where(T.user_id == user_id, queued, T.priority > prio))
+            ).scalar_one()
+            higher = (await s.execute(select(func.count()).where(queued, T.priority > prio))).scalar_one()
+            lens = select(func.count().label("n")).where(queued, T.priority == prio).group_by(T.user_id).subquery()
+            rr = (await s.execute(select(func.coalesce(func.sum(func.least(lens.c.n, k)), 0)))).scalar_one()
+        pos.position_in_user = int(ahead_user) + int(k)
+        pos.position_global = int(higher) + int(rr)
+        return pos
+
+    async def compact(self, *, retention_sec: float, max_items: int) -> int:
+        """
+        보존 창 밖 종료 항목은 payload를 비우고 archived 처리(스냅샷 제외),
+        아카이브가 archive_size를 넘으면 오래된 행부터 삭제.
+        """
+        cutoff = utcnow() - timedelta(seconds=retention_sec)
+        live_terminal = and_(LLMQueueItem.terminal_at.is_not(None), LLMQueueItem.archived.is_(False))
+        async with self._sf() as s:
+            keep = (
+                select(LLMQueueItem.id)
+                .where(live_terminal)
+                .order_by(LLMQueueItem.terminal_at.desc())
+                .limit(max_items)
+                .scalar_subquery()
+            )
+            res = await s.execute(
+                update(LLMQueueItem)
+                .where(live_terminal, or_(LLMQueueItem.terminal_at < cutoff, LLMQueueItem.id.not_in(keep)))
+                .values(archived=True, payload={}, eta_sec=None)
+                .execution_options(synchronize_session=False)
+            )
+            moved = res.rowcount or 0
+
+            keep_archived = (
+                select(LLMQueueItem.id)
+                .where(LLMQueueItem.archived.is_(True))
+                .order_by(LLMQueueItem.terminal_at.desc())
+                .limit(self._archive_size)
+                .scalar_subquery()
+            )
+            await s.execute(
+                delete(LLMQueueItem)
+                .where(LLMQueueItem.archived.is_(True), LLMQueueItem.id.not_in(keep_archived))
+                .execution_options(synchronize_session=False)
+            )
+            await s.commit()
+        return moved
+
+    async def expire_due(self, cutoff: datetime, reason: str) -> List[QueueRecord]:
+        due = (
+            select(LLMQueueItem.id)
+            .where(LLMQueueItem.status == Status.queued.value, LLMQueueItem.enqueued_at < cutoff)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        stmt = (
+            update(LLMQueueItem)
+            .where(LLMQueueItem.id.in_(due))
+            .values(status=Status.canceled.value, fail_reason=reason, terminal_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        return [it for it in map(_to_item, await self._update_returning(stmt)) if it]
+
+    async def reclaim_stale(self, cutoff: datetime, reason: str) -> List[QueueRecord]:
+        """
+        admitted_at < cutoff 인 inflight 행(리스 만료 — 프로세스 크래시/재시작으로 남은 행)을 failed로 회수.
+        """
+        stale = (
+            select(LLMQueueItem.id)
+            .where(LLMQueueItem.status == Status.inflight.value, LLMQueueItem.admitted_at < cutoff)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        stmt = (
+            update(LLMQueueItem)
+            .where(LLMQueueItem.id.in_(stale), LLMQueueItem.status == Status.inflight.value)
+            .values(status=Status.failed.value, fail_reason=reason, finished_at=func.now(), terminal_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        return [it for it in map(_to_item, await self._update_returning(stmt)) if it]
+
+    # -------- SKIP LOCKED 배치 admit --------
+
+    async def select_admissions(self, *, limits: Limits, batch_max: int) -> List[str]:
+        """
+        후보 대기 행을 SKIP LOCKED로 잠근 뒤 라운드로빈으로 고르고, 한 번의 UPDATE로 inflight 전이.
+        반환된 ID는 이미 inflight 상태입니다(이후 mark_admitted 호출은 멱등).
+        """
+        return [it.request_id for it in await self.admit_batch(limits, batch_max)]
+
+    async def admit_batch(self, limits: Limits, n: int, *, policy=None) -> List[QueueRecord]:
+        """
+        선택 + inflight 전이 + 항목 반환을 한 트랜잭션(UPDATE ... RETURNING)으로 처리.
+        policy는 무시 — SKIP LOCKED 후보를 우선순위 클래스 순(엄격 우선순위)으로,
+        클래스 안에서는 사용자 라운드로빈으로 고름. 사용자 가중치(QUEUE_USER_WEIGHTS)는 적용하지 않음.
+        """
+        batch_max = n
+        async with self._sf() as s:
+            inflight_rows = await s.execute(
+                select(LLMQueueItem.user_id, func.count())
+                .where(LLMQueueItem.status == Status.inflight.value)
+                .group_by(LLMQueueItem.user_id)
+            )
+            inflight_by_user: Dict[str, int] = {uid: n for uid, n in inflight_rows}
+            capacity = min(limits.max_inflight_global - sum(inflight_by_user.values()), batch_max)
+            if capacity <= 0:
+                return []
+
+            cand = await s.execute(
+                select(LLMQueueItem.request_id, LLMQueueItem.user_id, LLMQueueItem.priority)
+                .where(LLMQueueItem.status == Status.queued.value)
+                .order_by(LLMQueueItem.priority.desc(), LLMQueueItem.id)
+                .limit(capacity * self._scan_factor)
+                .with_for_update(skip_locked=True)
+            )
+            picked = self._pick(cand, inflight_by_user, limits.max_inflight_per_user, capacity)
+            if not picked:
+                await s.rollback()
+                return []
+
+            rows = (
+                (
+                    await s.execute(
+                        update(LLMQueueItem)
+                        .where(LLMQueueItem.request_id.in_(picked), LLMQueueItem.status == Status.queued.value)
+                        .values(status=Status.inflight.value, admitted_at=func.now())
+                        .returning(LLMQueueItem)
+                        .execution_options(synchronize_session=False)
+                    )
+                )
+                .scalars()
+                .all()
+            )
+            await s.commit()
+            # RETURNING 순서는 보장되지 않으므로 라운드로빈 선택 순서로 정렬
+            by_id = {r.request_id: r for r in rows}
+            return [it for it in (_to_item(by_id.get(rid)) for rid in picked) if it]
+
+    def _pick(
+        self,
+        cand: Iterable[Tuple[str, str, int]],
+        inflight_by_user: Dict[str, int],
+        per_user_limit: int,
+        capacity: int,
+    ) -> List[str]:
+        """
+        (request_id, user_id, priority) 후보에서 최대 capacity건 선택.
+        상위 클래스를 먼저 채우고(클래스 안은 사용자 라운드로빈), 유저 한도는 앞 클래스에서 고른 건수까지 포함.
+        """
+        classes: Dict[int, "OrderedDict[str, List[str]]"] = {}
+        for rid, uid, prio in cand:
+            classes.setdefault(prio, OrderedDict()).setdefault(uid, []).append(rid)
+        used = dict(inflight_by_user)
+        picked: List[str] = []
+        for prio in sorted(classes, reverse=True):
+            if len(picked) >= capacity:
+                break
+            per_user = classes[prio]
+            for uid, ids in per_user.items():
+                del ids[max(0, per_user_limit - used.get(uid, 0)) :]
+            owner = {rid: uid for uid, ids in per_user.items() for rid in ids}
+            for rid in self._round_robin(per_user, capacity - len(picked)):
+                picked.append(rid)
+                used[owner[rid]] = used.get(owner[rid], 0) + 1
+        return picked
+
+    def _round_robin(self, per_user: "OrderedDict[str, List[str]]", capacity: int) -> List[str]:
+        users = [u for u, ids in per_user.items() if ids]
+        if not users:
+            return []
+        if self._cursor_user in users:
+            i = (users.index(self._cursor_user) + 1) % len(users)
+            users = users[i:] + users[:i]
+        picked: List[str] = []
+        depth = 0
+        while len(picked) < capacity:
+            progressed = False
+            for u in users:
+                ids = per_user[u]
+                if depth < len(ids):
+                    picked.append(ids[depth])
+                    self._cursor_user = u
+                    progressed = True
+                    if len(picked) >= capacity:
+                        break
+            if not progressed:
+                break
+            depth += 1
+        return picked
@@ -0,0 +1,118 @@
+# src/infrastructure/queue/pg_task_store.py
+"""
+Postgres 기반 ITaskStore 구현 (llm_tasks 테이블).
+재시작 후에도 태스크 상태가 남고, 여러 워커가 같은 태스크를 조회할 수 있습니다.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import delete, select, update
+
+from infrastructure.db.models import LLMTask
+from infrastructure.queue.task_store import (
+    TERMINAL_TASK_STATUSES,
+    InMemoryTaskStore,
+    ITaskStore,
+    _slim_terminal,
+)
+
+
+class PostgresTaskStore(ITaskStore):
+    """
+    llm_tasks 테이블 write-through 저장소. 조회는 메모리 캐시 → DB 순.
+    진행 중 태스크는 다른 워커가 갱신할 수 있으므로 캐시를 신뢰하지 않고 DB에서 다시 읽습니다.
+    """
+
+    _COLUMNS = ("user_id", "status", "stream_mode", "meta", "saved_id", "error", "result", "result_ref", "req_json")
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Any]] = None,
+        *,
+        ttl_sec: float = 3600.0,
+        max_items: int = 10_000,
+        inline_result_max: int = 4096,
+    ) -> None:
+        if session_factory is None:
+            from infrastructure.db.database import SessionLocal
+
+            session_factory = SessionLocal
+        self._sf = session_factory
+        self._ttl = ttl_sec
+        self._inline_max = inline_result_max
+        self._cache = InMemoryTaskStore(ttl_sec=ttl_sec, max_items=max_items, inline_result_max=inline_result_max)
+
+    @staticmethod
+    def _to_rec(row: Any) -> Dict[str, Any]:
+        return {
+            "task_id": row.task_id,
+            "user_id": row.user_id,
+            "status": row.status,
+            "created_at": row.created_at.timestamp() if row.created_at else None,
+            "finished_at": row.finished_at.timestamp() if row.finished_at else None,
+            "error": row.error,
+            "saved_id": row.saved_id,
+            "result": row.result,
+            "result_ref": bool(row.result_ref),
+            "meta": row.meta or {},
+            "stream_mode": bool(row.stream_mode),
+            "req_json": row.req_json,
+        }
+
+    async def create(self, *, user_id: str, req_json: Dict[str, Any], stream_mode: bool = False) -> str:
+        tid = await self._cache.create(user_id=user_id, req_json=req_json, stream_mode=stream_mode)
+        rec = self._cache.data[tid]
+        async with self._sf() as s:
+            s.add(LLMTask(task_id=tid, **{c: rec[c] for c in self._COLUMNS}))
+            await s.commit()
+        return tid
+
+    async def get(self, tid: str) -> Optional[Dict[str, Any]]:
+        rec = await self._cache.get(tid)
+        if rec is not None and rec.get("status") in TERMINAL_TASK_STATUSES:
+            return rec
+        async with self._sf() as s:
+            row = (await s.execute(select(LLMTask).where(LLMTask.task_id == tid))).scalar_one_or_none()
+        if row is None:
+            return rec
+        fresh = self._to_rec(row)
+        if rec is not None:
+            rec.update(fresh)  # 진행 중 레코드는 객체를 유지한 채 갱신
+            return rec
+        self._cache.put(fresh)
+        return fresh
+
+    async def update(self, tid: str, **kwargs: Any) -> None:
+        await self._cache.update(tid, **kwargs)
+        rec = self._cache.data.get(tid)
+        values = {k: v for k, v in kwargs.items() if k in self._COLUMNS}
+        if rec is not None and rec.get("status") in TERMINAL_TASK_STATUSES:
+            # 경량화된 결과/요청 원문을 그대로 반영
+            values.update(result=rec.get("result"), result_ref=rec.get("result_ref"), req_json=None)
+        elif "result" in kwargs and kwargs.get("status") in TERMINAL_TASK_STATUSES:
+            probe = {"result": kwargs["result"], "saved_id": kwargs.get("saved_id")}
+            _slim_terminal(probe, self._inline_max)
+            values.update(result=probe["result"], result_ref=probe.get("result_ref", False), req_json=None)
+        if values.get("saved_id") is not None:
+            values["saved_id"] = int(values["saved_id"])
+        if kwargs.get("finished_at") is not None:
+            values["finished_at"] = datetime.fromtimestamp(float(kwargs["finished_at"]), tz=timezone.utc)
+        if not values:
+            return
+        async with self._sf() as s:
+            await s.execute(update(LLMTask).where(LLMTask.task_id == tid).values(**values))
+            await s.commit()
+
+    async def purge(self) -> int:
+        """
+        TTL이 지난 종료 태스크를 DB에서 삭제(주기 호출용). 캐시는 자체 TTL/LRU로 정리.
+        """
+        await self._cache.purge()
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self._ttl)
+        async with self._sf() as s:
+            res = await s.execute(
+                delete(LLMTask).where(LLMTask.status.in_(TERMINAL_TASK_STATUSES), LLMTask.finished_at < cutoff)
+            )
+            await s.commit()
+            return int(res.rowcount or 0)
@@ -0,0 +1,147 @@
+# src/infrastructure/queue/position.py
+"""
+대기열 위치(순번) 조회용 순서 통계 인덱스.
+
+- SeqIndex: 흐름(사용자×우선순위)별 펜윅 트리. 항목마다 단조 증가 seq를 부여하고
+  "내 앞의 유효 대기 항목 수"를 O(log n)에 계산합니다(리스트 복사/index() 없음).
+- LengthHistogram: 우선순위 클래스별 흐름 길이 분포(펜윅 2개).
+  라운드로빈 하에서 전역 순번 = Σ_v min(len_v, k) 를 O(log n)에 계산합니다.
+"""
+
+from typing import Dict, List
+
+
+class _Fenwick:
+    """
+    뒤로만 늘어나는 1-based 펜윅 트리(append 시 O(log n)으로 노드 보정).
+    """
+
+    __slots__ = ("_tree",)
+
+    def __init__(self) -> None:
+        self._tree: List[int] = [0]
+
+    def __len__(self) -> int:
+        return len(self._tree) - 1
+
+    def prefix(self, i: int) -> int:
+        # [1..i] 합
+        i = min(i, len(self._tree) - 1)
+        s = 0
+        while i > 0:
+            s += self._tree[i]
+            i -= i & -i
+        return s
+
+    def add(self, i: int, delta: int) -> None:
+        n = len(self._tree) - 1
+        while n < i:
+            self._grow()
+            n += 1
+        while i <= n:
+            self._tree[i] += delta
+            i += i & -i
+
+    def _grow(self) -> None:
+        # 새 인덱스 i의 노드 = (i - lowbit(i), i-1] 구간 합(값 0으로 시작)
+        i = len(self._tree)
+        self._tree.append(self.prefix(i - 1) - self.prefix(i - (i & -i)))
+
+
+class SeqIndex:
+    """
+    흐름 하나의 대기 순번 인덱스.
+    seq는 1부터 단조 증가. 앞쪽이 모두 빠지면(절반 이상) 오프셋을 옮겨 재구성 → 메모리 O(live)(분할상환).
+    """
+
+    __slots__ = ("_fw", "_alive", "_base", "_head", "_live")
+
+    def __init__(self) -> None:
+        self._fw = _Fenwick()
+        self._alive = bytearray()  # 내부 인덱스(0-based) → 유효 여부
+        self._base = 0  # seq = base + 내부 인덱스 + 1
+        self._head = 0  # 첫 유효 항목 후보(내부 인덱스)
+        self._live = 0
+
+    def __len__(self) -> int:
+        return self._live
+
+    def append(self) -> int:
+        self._alive.append(1)
+        self._fw.add(len(self._alive), 1)
+        self._live += 1
+        return self._base + len(self._alive)
+
+    def remove(self, seq: int) -> None:
+        i = seq - self._base - 1
+        if i < 0 or i >= len(self._alive) or not self._alive[i]:
+            return
+        self._alive[i] = 0
+        self._fw.add(i + 1, -1)
+        self._live -= 1
+        while self._head < len(self._alive) and not self._alive[self._head]:
+            self._head += 1
+        if self._head > 64 and self._head * 2 > len(self._alive):
+            self._rebase()
+
+    def rank(self, seq: int) -> int:
+        """seq보다 앞선 유효 항목 수(0-based 위치)."""
+        return self._fw.prefix(seq - self._base - 1)
+
+    def _rebase(self) -> None:
+        alive = self._alive[self._head :]
+        self._base += self._head
+        self._head = 0
+        self._alive = bytearray(alive)
+        fw = _Fenwick()
+        tree = [0] * (len(alive) + 1)
+        # O(n) 선형 구성
+        for i in range(1, len(alive) + 1):
+            tree[i] += alive[i - 1]
+            j = i + (i & -i)
+            if j <= len(alive):
+                tree[j] += tree[i]
+        fw._tree = tree
+        self._fw = fw
+
+
+class LengthHistogram:
+    """
+    흐름 길이 분포. cnt[L] = 길이 L인 흐름 수, mass[L] = L * cnt[L].
+    rr_rank(k) = Σ_v min(len_v, k) : 라운드로빈에서 k번째(0-based) 라운드 이전에 처리될 항목 수.
+    """
+
+    __slots__ = ("_cnt", "_mass", "_flows", "_total")
+
+    def __init__(self) -> None:
+        self._cnt = _Fenwick()
+        self._mass = _Fenwick()
+        self._flows = 0
+        self._total = 0
+
+    @property
+    def total(self) -> int:
+        return self._total
+
+    def move(self, old_len: int, new_len: int) -> None:
+        if old_len > 0:
+            self._cnt.add(old_len, -1)
+            self._mass.add(old_len, -old_len)
+            self._flows -= 1
+        if new_len > 0:
+            self._cnt.add(new_len, 1)
+            self._mass.add(new_len, new_len)
+            self._flows += 1
+        self._total += new_len - old_len
+
+    def rr_rank(self, k: int) -> int:
+        if k <= 0:
+            return 0
+        short_mass = self._mass.prefix(k - 1)  # 길이 < k 인 흐름의 항목 합
+        long_flows = self._flows - self._cnt.prefix(k - 1)  # 길이 ≥ k 인 흐름 수
+        return short_mass + k * long_flows
+
+
+def higher_total(hists: Dict[int, LengthHistogram], priority: int) -> int:
+    """priority보다 높은 클래스의 대기 항목 총합(엄격 우선순위이므로 모두 먼저 처리)."""
+    return sum(h.total for p, h in hists.items() if p > priority)
@@ -0,0 +1,675 @@
+# src/infrastructure/queue/redis_repo.py
+"""
+Redis 기반 IQueueRepo 구현 (멀티워커/멀티프로세스 공유 큐).
+
+키 구조 (prefix 기본값 "llmq"):
+- {p}:item:{rid}   HASH   항목 필드(user_id, payload(json), status, enqueued_at, ...)
+- {p}:uq:{uid}:{prio}  LIST  사용자·우선순위 클래스별 대기열(request_id, FIFO)
+- {p}:uprio:{uid}  ZSET   사용자가 대기 항목을 가진 클래스(점수=prio)
+- {p}:ready:{prio} ZSET   클래스별 대기 사용자 — 점수=활성화 순번(클래스 내 라운드로빈 순서)
+- {p}:classes      ZSET   대기 항목이 있는 클래스(점수=prio) — admit 시 높은 클래스부터 스캔
+- {p}:cnt:{uid}    HASH   사용자별 상태 카운터(queued/inflight/finished/failed/canceled)
+- {p}:totals       HASH   글로벌 상태 카운터
+- {p}:users        ZSET   활성 사용자(대기 또는 진행중) — 점수=최초 활성 순번
+- {p}:known        SET    카운터가 남아있는 사용자(스냅샷용)
+- {p}:deadlines    ZSET   TTL 마감 인덱스(점수=enqueued_at epoch)
+- {p}:leases       ZSET   inflight 리스(점수=admitted epoch) — 기한 지난 항목은 reclaim_stale()이 회수
+- {p}:terminal     ZSET   보존 중인 종료 항목(점수=종료 epoch)
+- {p}:archive      ZSET   압축된(payload 제거) 종료 항목(점수=압축 epoch)
+- {p}:rr_cursor:{prio}  STRING  클래스별 라운드로빈 커서(워커 간 공유)
+
+모든 상태 전이는 Lua 스크립트로 원자적으로 수행됩니다.
+select_admissions()는 선택 + admit 마킹을 한 번의 왕복으로 처리합니다.
+(클래스 간 엄격 우선순위 → 클래스 내 사용자 라운드로빈. DRR 사용자 가중치는 적용하지 않습니다.)
+주의: 스크립트가 prefix로 키를 조합하므로 Redis Cluster에서는 prefix에 해시태그({llmq})를 사용하세요.
+"""
+
+import json
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from infrastructure.queue.models import Limits, QueuePosition, QueueRecord, QueueStats, Status, UserStats, utcnow
+from infrastructure.queue.repo import IQueueRepo
+
+# redis-py(asyncio)가 있으면 사용, 없으면 생성 시점에 오류
+try:
+    import redis.asyncio as aioredis  # type: ignore
+
+    _REDIS = True
+except Exception:  # pragma: no cover
+    _REDIS = False
+
+
+# -------- Lua 스크립트 --------
+
+# 공통 헬퍼: 카운터 증감 / 활성 사용자 정리 / 종료 기록
+_LUA_HELPERS = """
+local P = ARGV[1]
+local function count(uid, st, d)
+  redis.call('HINCRBY', P .. ':totals', st, d)
+  local f = st
+  if st == 'expired' then f = 'failed' end
+  redis.call('HINCRBY', P .. ':cnt:' .. uid, f, d)
+end
+local function touch(uid)
+  if redis.call('ZCARD', P .. ':uprio:' .. uid) == 0
+     and tonumber(redis.call('HGET', P .. ':cnt:' .. uid, 'inflight') or '0') <= 0 then
+    redis.call('ZREM', P .. ':users', uid)
+  end
+end
+local function qkey(uid, prio)
+  return P .. ':uq:' .. uid .. ':' .. prio
+end
+-- 대기열 적재 → 사용자 내 순번(상위 클래스 대기 수 + 클래스 내 순번, 0기준)
+local function push(rid, uid, prio)
+  local n = redis.call('RPUSH', qkey(uid, prio), rid)
+  if n == 1 then
+    redis.call('ZADD', P .. ':uprio:' .. uid, prio, prio)
+    redis.call('ZADD', P .. ':ready:' .. prio, redis.call('INCR', P .. ':users_seq'), uid)
+    redis.call('ZADD', P .. ':classes', prio, prio)
+  end
+  if not redis.call('ZSCORE', P .. ':users', uid) then
+    redis.call('ZADD', P .. ':users', redis.call('INCR', P .. ':users_seq'), uid)
+  end
+  local ahead = 0
+  for _, q in ipairs(redis.call('ZRANGEBYSCORE', P .. ':uprio:' .. uid, '(' .. prio, '+inf')) do
+    ahead = ahead + redis.call('LLEN', qkey(uid, q))
+  end
+  return ahead + n - 1
+end
+-- 클래스 대기열이 비면 클래스/사용자 인덱스에서 제거
+local function settle(uid, prio)
+  if redis.call('LLEN', qkey(uid, prio)) == 0 then
+    redis.call('ZREM', P .. ':uprio:' .. uid, prio)
+    redis.call('ZREM', P .. ':ready:' .. prio, uid)
+    if redis.call('ZCARD', P .. ':ready:' .. prio) == 0 then
+      redis.call('ZREM', P .. ':classes', prio)
+    end
+  end
+end
+-- 대기 항목을 대기열에서 제거(취소/만료/대기 중 종료)
+local function unqueue(rid, uid)
+  local prio = redis.call('HGET', P .. ':item:' .. rid, 'priority') or '0'
+  redis.call('LREM', qkey(uid, prio), 1, rid)
+  settle(uid, prio)
+end
+local function transition(rid, uid, from, to)
+  redis.call('HSET', P .. ':item:' .. rid, 'status', to)
+  if from == 'inflight' then redis.call('ZREM', P .. ':leases', rid) end
+  count(uid, from, -1)
+  count(uid, to, 1)
+end
+"""
+
+# ARGV: prefix, rid, uid, payload_json, enqueued_at_iso, enqueued_ts, priority
+_LUA_ADD = (
+    _LUA_HELPERS
+    + """
+local rid, uid = ARGV[2], ARGV[3]
+redis.call('HSET', P .. ':item:' .. rid,
+  'user_id', uid, 'payload', ARGV[4], 'status', 'queued', 'enqueued_at', ARGV[5], 'priority', ARGV[7])
+local pos = push(rid, uid, ARGV[7])
+count(uid, 'queued', 1)
+redis.call('SADD', P .. ':known', uid)
+redis.call('ZADD', P .. ':deadlines', ARGV[6], rid)
+return pos
+"""
+)
+
+# ARGV: prefix, n, (rid, uid, payload_json, enqueued_iso, enqueued_ts, priority) × n → 사용자 내 순번 목록
+_LUA_ADD_MANY = (
+    _LUA_HELPERS
+    + """
+local n = tonumber(ARGV[2])
+local out = {}
+for i = 0, n - 1 do
+  local b = 3 + i * 6
+  local rid, uid = ARGV[b], ARGV[b + 1]
+  redis.call('HSET', P .. ':item:' .. rid,
+    'user_id', uid, 'payload', ARGV[b + 2], 'status', 'queued', 'enqueued_at', ARGV[b + 3], 'priority', ARGV[b + 5])
+  table.insert(out, push(rid, uid, ARGV[b + 5]))
+  count(uid, 'queued', 1)
+  redis.call('SADD', P .. ':known', uid)
+  redis.call('ZADD', P .. ':deadlines', ARGV[b + 4], rid)
+end
+return out
+"""
+)
+
+# ARGV: prefix, rid, now_iso, now_ts
+_LUA_MARK_ADMITTED = (
+    _LUA_HELPERS
+    + """
+local rid = ARGV[2]
+local key = P .. ':item:' .. rid
+local st = redis.call('HGET', key, 'status')
+if st == 'queued' then
+  local uid = redis.call('HGET', key, 'user_id')
+  unqueue(rid, uid)
+  transition(rid, uid, 'queued', 'inflight')
+  redis.call('HSET', key, 'admitted_at', ARGV[3])
+  redis.call('ZREM', P .. ':deadlines', rid)
+  redis.call('ZADD', P .. ':leases', ARGV[4], rid)
+end
+return redis.call('HGETALL', key)
+"""
+)
+
+# ARGV: prefix, rid, ok(1|0), reason, now_iso, now_ts
+_LUA_MARK_FINISHED = (
+    _LUA_HELPERS
+    + """
+local rid = ARGV[2]
+local key = P .. ':item:' .. rid
+local st = redis.call('HGET', key, 'status')
+if st == 'queued' or st == 'inflight' then
+  local uid = redis.call('HGET', key, 'user_id')
+  if st == 'queued' then
+    unqueue(rid, uid)
+    redis.call('ZREM', P .. ':deadlines', rid)
+  end
+  if ARGV[3] == '1' then
+    transition(rid, uid, st, 'finished')
+    redis.call('HDEL', key, 'fail_reason')
+  else
+    transition(rid, uid, st, 'failed')
+    redis.call('HSET', key, 'fail_reason', ARGV[4])
+  end
+  redis.call('HSET', key, 'finished_at', ARGV[5])
+  redis.call('ZADD', P .. ':terminal', ARGV[6], rid)
+  touch(uid)
+end
+return redis.call('HGETALL', key)
+"""
+)
+
+# ARGV: prefix, rid, reason, now_ts
+_LUA_CANCEL = (
+    _LUA_HELPERS
+    + """
+local rid = ARGV[2]
+local key = P .. ':item:' .. rid
+if redis.call('HGET', key, 'status') == 'queued' then
+  local uid = redis.call('HGET', key, 'user_id')
+  unqueue(rid, uid)
+  redis.call('ZREM', P .. ':deadlines', rid)
+  transition(rid, uid, 'queued', 'canceled')
+  redis.call('HSET', key, 'fail_reason', ARGV[3])
+  redis.call('ZADD', P .. ':terminal', ARGV[4], rid)
+  touch(uid)
+end
+return redis.call('HGETALL', key)
+"""
+)
+
+# ARGV: prefix, cutoff_ts, reason, now_ts  → 만료된 request_id 목록
+_LUA_EXPIRE_DUE = (
+    _LUA_HELPERS
+    + """
+local due = redis.call('ZRANGEBYSCORE', P .. ':deadlines', '-inf', '(' .. ARGV[2])
+local out = {}
+for _, rid in ipairs(due) do
+  redis.call('ZREM', P .. ':deadlines', rid)
+  local key = P .. ':item:' .. rid
+  if redis.call('HGET', key, 'status') == 'queued' then
+    local uid = redis.call('HGET', key, 'user_id')
+    unqueue(rid, uid)
+    transition(rid, uid, 'queued', 'canceled')
+    redis.call('HSET', key, 'fail_reason', ARGV[3])
+    redis.call('ZADD', P .. ':terminal', ARGV[4], rid)
+    touch(uid)
+    table.insert(out, rid)
+  end
+end
+return out
+"""
+)
+
+# ARGV: prefix, cutoff_ts, reason, now_iso, now_ts → 회수(failed 전이)된 request_id 목록
+_LUA_RECLAIM_STALE = (
+    _LUA_HELPERS
+    + """
+local stale = redis.call('ZRANGEBYSCORE', P .. ':leases', '-inf', '(' .. ARGV[2])
+local out = {}
+for _, rid in ipairs(stale) do
+  redis.call('ZREM', P .. ':leases', rid)
+  local key = P .. ':item:' .. rid
+  if redis.call('HGET', key, 'status') == 'inflight' then
+    local uid = redis.call('HGET', key, 'user_id')
+    transition(rid, uid, 'inflight', 'failed')
+    redis.call('HSET', key, 'fail_reason', ARGV[3], 'finished_at', ARGV[4])
+    redis.call('ZADD', P .. ':terminal', ARGV[5], rid)
+    touch(uid)
+    table.insert(out, rid)
+  end
+end
+return out
+"""
+)
+
+# ARGV: prefix, max_global, max_per_user, batch_max, now_iso, with_items(1|0), now_ts
+# 높은 클래스부터(엄격 우선순위) 클래스 내 사용자 라운드로빈으로 선택 + admit 마킹을 원자적으로 수행
+# → admit된 request_id 목록 (with_items=1이면 {rid, HGETALL, rid, HGETALL, ...})
+_LUA_SELECT_ADMISSIONS = (
+    _LUA_HELPERS
+    + """
+local max_global, max_user, batch_max = tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4])
+local inflight = tonumber(redis.call('HGET', P .. ':totals', 'inflight') or '0')
+local capacity = math.min(max_global - inflight, batch_max)
+if capacity <= 0 then return {} end
+
+-- 사용자별 남은 슬롯(앞 클래스에서 고른 건수 포함)
+local room = {}
+local function room_of(u)
+  if room[u] == nil then
+    room[u] = max_user - tonumber(redis.call('HGET', P .. ':cnt:' .. u, 'inflight') or '0')
+  end
+  return room[u]
+end
+
+local picked = {}
+for _, prio in ipairs(redis.call('ZREVRANGE', P .. ':classes', 0, -1)) do
+  if #picked >= capacity then break end
+  local users = redis.call('ZRANGE', P .. ':ready:' .. prio, 0, -1)
+  local n = #users
+  -- 클래스 커서 다음 사용자부터 시작
+  local ckey = P .. ':rr_cursor:' .. prio
+  local start = 1
+  local cursor = redis.call('GET', ckey)
+  if cursor then
+    for i, u in ipairs(users) do
+      if u == cursor then start = (i % n) + 1 break end
+    end
+  end
+  local order = {}
+  for i = 0, n - 1 do
+    local u = users[((start - 1 + i) % n) + 1]
+    if room_of(u) > 0 then table.insert(order, u) end
+  end
+
+  local last = nil
+  while #picked < capacity and #order > 0 do
+    local next_order = {}
+    for _, u in ipairs(order) do
+      if #picked >= capacity then break end
+      local rid = redis.call('LPOP', qkey(u, prio))
+      if rid then
+        transition(rid, u, 'queued', 'inflight')
+        redis.call('HSET', P .. ':item:' .. rid, 'admitted_at', ARGV[5])
+        redis.call('ZREM', P .. ':deadlines', rid)
+        redis.call('ZADD', P .. ':leases', ARGV[7], rid)
+        table.insert(picked, rid)
+        last = u
+        room[u] = room[u] - 1
+        if room[u] > 0 then table.insert(next_order, u) end
+      end
+      settle(u, prio)
+    end
+    order = next_order
+  end
+  if last then redis.call('SET', ckey, last) end
+end
+if ARGV[6] == '1' then
+  local out = {}
+  for _, rid in ipairs(picked) do
+    table.insert(out, rid)
+    table.insert(out, redis.call('HGETALL', P .. ':item:' .. rid))
+  end
+  return out
+end
+return picked
+"""
+)
+
+# ARGV: prefix, cutoff_ts, max_items, archive_size, now_ts → 압축 건수
+_LUA_COMPACT = (
+    _LUA_HELPERS
+    + """
+local tkey = P .. ':terminal'
+local old = redis.call('ZRANGEBYSCORE', tkey, '-inf', '(' .. ARGV[2])
+local over = redis.call('ZCARD', tkey) - #old - tonumber(ARGV[3])
+local victims = old
+if over > 0 then
+  local extra = redis.call('ZRANGE', tkey, #old, #old + over - 1)
+  for _, rid in ipairs(extra) do table.insert(victims, rid) end
+end
+for _, rid in ipairs(victims) do
+  redis.call('ZREM', tkey, rid)
+  local key = P .. ':item:' .. rid
+  local uid = redis.call('HGET', key, 'user_id')
+  local st = redis.call('HGET', key, 'status')
+  if uid and st then
+    count(uid, st, -1)
+    redis.call('HDEL', key, 'payload', 'eta_sec')
+    redis.call('ZADD', P .. ':archive', ARGV[5], rid)
+    local c = redis.call('HGETALL', P .. ':cnt:' .. uid)
+    local live = false
+    for i = 2, #c, 2 do if tonumber(c[i]) ~= 0 then live = true end end
+    if not live and redis.call('ZCARD', P .. ':uprio:' .. uid) == 0 then
+      redis.call('DEL', P .. ':cnt:' .. uid)
+      redis.call('SREM', P .. ':known', uid)
+    end
+  end
+end
+local akey = P .. ':archive'
+local excess = redis.call('ZCARD', akey) - tonumber(ARGV[4])
+if excess > 0 then
+  for _, rid in ipairs(redis.call('ZRANGE', akey, 0, excess - 1)) do
+    redis.call('DEL', P .. ':item:' .. rid)
+  end
+  redis.call('ZREMRANGEBYRANK', akey, 0, excess - 1)
+end
+return #victims
+"""
+)
+
+# ARGV: prefix, uid, rid(빈 문자열 가능) → {user_len, global_len, pos_in_user(-1=없음), pos_global}
+# 전역 순번 = 상위 클래스 대기 총합 + Σ_v min(LLEN(uq:v:prio), k) (같은 클래스 라운드로빈 기준)
+_LUA_POSITION = """
+local P, uid, rid = ARGV[1], ARGV[2], ARGV[3]
+local function qkey(u, q) return P .. ':uq:' .. u .. ':' .. q end
+local ulen = 0
+for _, q in ipairs(redis.call('ZRANGE', P .. ':uprio:' .. uid, 0, -1)) do
+  ulen = ulen + redis.call('LLEN', qkey(uid, q))
+end
+local glen = tonumber(redis.call('HGET', P .. ':totals', 'queued') or '0')
+local prio = nil
+local k = nil
+if rid ~= '' and redis.call('HGET', P .. ':item:' .. rid, 'user_id') == uid then
+  prio = redis.call('HGET', P .. ':item:' .. rid, 'priority') or '0'
+  k = redis.call('LPOS', qkey(uid, prio), rid)
+end
+if not k then return {ulen, glen, -1, -1} end
+local ahead_user, g = 0, 0
+for _, q in ipairs(redis.call('ZRANGEBYSCORE', P .. ':classes', '(' .. prio, '+inf')) do
+  for _, v in ipairs(redis.call('ZRANGE', P .. ':ready:' .. q, 0, -1)) do
+    local len = redis.call('LLEN', qkey(v, q))
+    g = g + len
+    if v == uid then ahead_user = ahead_user + len end
+  end
+end
+for _, v in ipairs(redis.call('ZRANGE', P .. ':ready:' .. prio, 0, -1)) do
+  g = g + math.min(redis.call('LLEN', qkey(v, prio)), k)
+end
+return {ulen, glen, ahead_user + k, g}
+"""
+
+# ARGV: prefix, uid → 사용자의 최상위 클래스 head를 pop(상태 전이 없음, RoundRobinScheduler 호환용)
+_LUA_DEQUEUE = (
+    _LUA_HELPERS
+    + """
+local uid = ARGV[2]
+local top = redis.call('ZREVRANGE', P .. ':uprio:' .. uid, 0, 0)[1]
+if not top then return false end
+local rid = redis.call('LPOP', qkey(uid, top))
+settle(uid, top)
+return rid
+"""
+)
+
+# ARGV: prefix → {totals_flat, {uid, cnt_flat}, ...}
+_LUA_SNAPSHOT = """
+local P = ARGV[1]
+local out = {redis.call('HGETALL', P .. ':totals')}
+for _, uid in ipairs(redis.call('SMEMBERS', P .. ':known')) do
+  table.insert(out, uid)
+  table.insert(out, redis.call('HGETALL', P .. ':cnt:' .. uid))
+end
+return out
+"""
+
+
+def _s(v: Any) -> Any:
+    return v.decode("utf-8") if isinstance(v, (bytes, bytearray)) else v
+
+
+def _pairs(flat: List[Any]) -> Dict[str, str]:
+    return {_s(flat[i]): _s(flat[i + 1]) for i in range(0, len(flat) - 1, 2)}
+
+
+def _dt(v: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(v) if v else None
+
+
+def _item_from_hash(rid: str, h: Dict[str, str]) -> Optional[QueueRecord]:
+    if not h or "user_id" not in h:
+        return None
+    return QueueRecord(
+        request_id=rid,
+        user_id=h["user_id"],
+        payload=json.loads(h["payload"]) if h.get("payload") else {},
+        priority=int(h.get("priority") or 0),
+        status=Status(h.get("status", Status.queued.value)),
+        enqueued_at=_dt(h["enqueued_at"]),
+        admitted_at=_dt(h.get("admitted_at")),
+        finished_at=_dt(h.get("finished_at")),
+        fail_reason=h.get("fail_reason") or None,
+        eta_sec=float(h["eta_sec"]) if h.get("eta_sec") else None,
+    )
+
+
+class RedisQueueRepo(IQueueRepo):
+    """
+    Redis 저장소. 여러 uvicorn 워커가 하나의 공정 큐를 공유할 수 있습니다.
+    - client: redis.asyncio.Redis 호환 객체(테스트 시 fakeredis.aioredis.FakeRedis 사용 가능)
+    - url: client 미지정 시 접속 URL (예: redis://localhost:6379/0)
+    """
+
+    def __init__(
+        self,
+        client: Any = None,
+        *,
+        url: Optional[str] = None,
+        prefix: str = "llmq",
+        archive_size: int = 50_000,
+    ) -> None:
+        if client is None:
+            if not _REDIS:  # pragma: no cover
+                raise RuntimeError("redis is not installed")
+            client = aioredis.from_url(url or "redis://localhost:6379/0", decode_responses=True)
+        self._r = client
+        self._p = prefix
+        self._archive_size = archive_size
+
+        self._add = client.register_script(_LUA_ADD)
+        self._add_many = client.register_script(_LUA_ADD_MANY)
+        self._mark_admitted = client.register_script(_LUA_MARK_ADMITTED)
+        self._mark_finished = client.register_script(_LUA_MARK_FINISHED)
+        self._cancel = client.register_script(_LUA_CANCEL)
+        self._expire_due = client.register_script(_LUA_EXPIRE_DUE)
+        self._reclaim = client.register_script(_LUA_RECLAIM_STALE)
+        self._select = client.register_script(_LUA_SELECT_ADMISSIONS)
+        self._compact = client.register_script(_LUA_COMPACT)
+        self._snapshot = client.register_script(_LUA_SNAPSHOT)
+        self._position = client.register_script(_LUA_POSITION)
+        self._dequeue = client.register_script(_LUA_DEQUEUE)
+
+    def _k(self, *parts: str) -> str:
+        return ":".join((self._p, *parts))
+
+    # -------- IQueueRepo --------
+
+    async def add(self, item: QueueRecord) -> None:
+        await self._add(
+            args=[
+                self._p,
+                item.request_id,
+                item.user_id,
+                json.dumps(item.payload, ensure_ascii=False),
+                item.enqueued_at.isoformat(),
+                item.enqueued_at.timestamp(),
+                int(item.priority),
+            ]
+        )
+
+    async def add_many(self, items: List[QueueRecord]) -> List[int]:
+        # 스크립트 1회(왕복 1번)로 일괄 적재, 사용자 내 순번(상위 클래스 포함)을 함께 반환
+        args: List[Any] = [self._p, len(items)]
+        for item in items:
+            args += [
+                item.request_id,
+                item.user_id,
+                json.dumps(item.payload, ensure_ascii=False),
+                item.enqueued_at.isoformat(),
+                item.enqueued_at.timestamp(),
+                int(item.priority),
+            ]
+        return [int(x) for x in await self._add_many(args=args)]
+
+    async def get(self, request_id: str) -> Optional[QueueRecord]:
+        h = await self._r.hgetall(self._k("item", request_id))
+        return _item_from_hash(request_id, {_s(k): _s(v) for k, v in (h or {}).items()})
+
+    async def mark_admitted(self, request_id: str) -> Optional[QueueRecord]:
+        now = utcnow()
+        flat = await self._mark_admitted(args=[self._p, request_id, now.isoformat(), now.timestamp()])
+        return _item_from_hash(request_id, _pairs(flat))
+
+    async def mark_finished(self, request_id: str, ok: bool, reason: Optional[str]) -> Optional[QueueRecord]:
+        now = utcnow()
+        flat = await self._mark_finished(
+            args=[self._p, request_id, "1" if ok else "0", reason or "failed", now.isoformat(), now.timestamp()]
+        )
+        return _item_from_hash(request_id, _pairs(flat))
+
+    async def cancel(self, request_id: str, reason: str) -> Optional[QueueRecord]:
+        flat = await self._cancel(args=[self._p, request_id, reason, time.time()])
+        return _item_from_hash(request_id, _pairs(flat))
+
+    async def dequeue_for_user(self, user_id: str) -> Optional[str]:
+        return _s(await self._dequeue(args=[self._p, user_id])) or None
+
+    async def peek_user_queue(self, user_id: str) -> Optional[str]:
+        top = await self._r.zrevrange(self._k("uprio", user_id), 0, 0)
+        if not top:
+            return None
+        return _s(await self._r.lindex(self._k("uq", user_id, _s(top[0])), 0))
+
+    async def list_user_ids(self) -> List[str]:
+        return [_s(u) for u in await self._r.zrange(self._k("users"), 0, -1)]
+
+    async def inflight_count_global(self) -> int:
+        return int(await self._r.hget(self._k("totals"), Status.inflight.value) or 0)
+
+    async def queued_count_global(self) -> int:
+        return int(await self._r.hget(self._k("totals"), Status.queued.value) or 0)
+
+    async def inflight_count_user(self, user_id: str) -> int:
+        return int(await self._r.hget(self._k("cnt", user_id), Status.inflight.value) or 0)
+
+    async def queued_count_user(self, user_id: str) -> int:
+        return int(await self._r.hget(self._k("cnt", user_id), Status.queued.value) or 0)
+
+    async def stats_snapshot(self, avg_finish_sec: Optional[float]) -> QueueStats:
+        raw = await self._snapshot(args=[self._p])
+        totals = {k: int(v) for k, v in _pairs(raw[0]).items() if int(v) > 0}
+        per_user: List[UserStats] = []
+        for i in range(1, len(raw) - 1, 2):
+            cnt = {k: int(v) for k, v in _pairs(raw[i + 1]).items()}
+            per_user.append(
+                UserStats(
+                    _s(raw[i]),
+                    queued=cnt.get("queued", 0),
+                    inflight=cnt.get("inflight", 0),
+                    finished=cnt.get("finished", 0),
+                    failed=cnt.get("failed", 0),
+                    canceled=cnt.get("canceled", 0),
+                )
+            )
+        return QueueStats(
+            totals=totals,
+            inflight_global=totals.get(Status.inflight.value, 0),
+            per_user=per_user,
+            avg_finish_sec=avg_finish_sec,
+        )
+
+    async def user_queue_ids(self, user_id: str) -> List[str]:
+        """
+        사용자 대기열을 admit 순서(우선순위 내림차순 → FIFO)로 반환.
+        """
+        prios = [_s(q) for q in await self._r.zrevrange(self._k("uprio", user_id), 0, -1)]
+        if not prios:
+            return []
+        async with self._r.pipeline(transaction=False) as pipe:
+            for q in prios:
+                pipe.lrange(self._k("uq", user_id, q), 0, -1)
+            lists = await pipe.execute()
+        return [_s(x) for ids in lists for x in ids]
+
+    async def queue_position(self, user_id: str, request_id: Optional[str] = None) -> QueuePosition:
+        """
+        순번 계산을 서버측(LPOS + 클래스·사용자별 LLEN)에서 수행 — 대기열 전체를 클라이언트로 복사하지 않음.
+        """
+        ulen, glen, k, g = (int(x) for x in await self._position(args=[self._p, user_id, request_id or ""]))
+        return QueuePosition(
+            user_id=user_id,
+            request_id=request_id,
+            position_in_user=k if k >= 0 else None,
+            position_global=g if k >= 0 else None,
+            queue_len_user=ulen,
+            queue_len_global=max(glen, 0),
+        )
+
+    async def compact(self, *, retention_sec: float, max_items: int) -> int:
+        now = time.time()
+        return int(await self._compact(args=[self._p, now - retention_sec, max_items, self._archive_size, now]))
+
+    async def expire_due(self, cutoff: datetime, reason: str) -> List[QueueRecord]:
+        rids = [_s(x) for x in await self._expire_due(args=[self._p, cutoff.timestamp(), reason, time.time()])]
+        return await self._items(rids)
+
+    async def reclaim_stale(self, cutoff: datetime, reason: str) -> List[QueueRecord]:
+        now = utcnow()
+        rids = await self._reclaim(args=[self._p, cutoff.timestamp(), reason, now.isoformat(), now.timestamp()])
+        return await self._items([_s(x) for x in rids])
+
+    async def _items(self, rids: List[str]) -> List[QueueRecord]:
+        if not rids:
+            return []
+        async with self._r.pipeline(transaction=False) as pipe:
+            for rid in rids:
+                pipe.hgetall(self._k("item", rid))
+            hashes = await pipe.execute()
+        out: List[QueueRecord] = []
+        for rid, h in zip(rids, hashes):
+            it = _item_from_hash(rid, {_s(k): _s(v) for k, v in (h or {}).items()})
+            if it:
+                out.append(it)
+        return out
+
+    # -------- 단일 왕복 admit --------
+
+    async def _run_select(self, limits: Limits, batch_max: int, with_items: bool) -> List[Any]:
+        now = utcnow()
+        return await self._select(
+            args=[
+                self._p,
+                limits.max_inflight_global,
+                limits.max_inflight_per_user,
+                batch_max,
+                now.isoformat(),
+                "1" if with_items else "0",
+                now.timestamp(),
+            ]
+        )
+
+    async def select_admissions(self, *, limits: Limits, batch_max: int) -> List[str]:
+        """
+        클래스 우선순위 + 클래스 내 라운드로빈 선택과 admit 마킹(queued→inflight)을 하나의 Lua 스크립트로 수행.
+        반환된 ID는 이미 inflight 상태입니다(이후 mark_admitted 호출은 멱등).
+        """
+        return [_s(x) for x in await self._run_select(limits, batch_max, with_items=False)]
+
+    async def admit_batch(self, limits: Limits, n: int, *, policy=None) -> List[QueueRecord]:
+        """
+        선택 + 마킹 + 항목 조회까지 한 번의 왕복. policy는 무시
+        (서버측 엄격 클래스 우선순위 + 클래스 내 라운드로빈, 사용자 가중치 미적용).
+        """
+        raw = await self._run_select(limits, n, with_items=True)
+        out: List[QueueRecord] = []
+        for i in range(0, len(raw) - 1, 2):
+            it = _item_from_hash(_s(raw[i]), _pairs(raw[i + 1]))
+            if it:
+                out.append(it)
+        return out
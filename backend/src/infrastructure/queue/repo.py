@@ -1,16 +1,42 @@
 # src/infrastructure/queue/repo.py
 import asyncio
+import heapq
+import itertools
+import time
 from collections import deque, defaultdict
-from dataclasses import dataclass
-from typing import Deque, Dict, List, Optional
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Deque, Dict, List, Optional, Tuple
 
-from infrastructure.queue.models import QueueItem, Status, UserWindow, QueueSnapshot
+from infrastructure.queue.models import (
+    Limits,
+    QueuePosition,
+    QueueRecord,
+    QueueStats,
+    Status,
+    UserStats,
+    utcnow,
+)
+from infrastructure.queue.position import LengthHistogram, SeqIndex, higher_total
+from infrastructure.queue.retention import ArchivedItem, TerminalArchive
+
+_TERMINAL = (Status.finished, Status.failed, Status.canceled, Status.expired)
 
 
 @dataclass
 class _UserQueues:
-    queued: Deque[str]
+    # 우선순위 클래스별 FIFO (빈 deque는 즉시 제거 → dict가 비면 대기 없음)
+    # 취소된 ID는 즉시 빼지 않고 묘비(tombstone)로 남겨 두되, 각 deque의 head는 항상 유효한 대기 항목
+    queued: Dict[int, Deque[str]]
     inflight: int
+    # 상태별 카운터(스냅샷용) — 상태 전이 시점에 갱신
+    # queued_count는 status==queued 개수(dequeue 후 admit 전 항목 포함)
+    queued_count: int = 0
+    finished: int = 0
+    failed: int = 0  # failed + expired
+    canceled: int = 0
+    # 우선순위 클래스별 순번 인덱스(유효 대기 항목만 카운트) — 위치 조회 O(log n)
+    index: Dict[int, SeqIndex] = field(default_factory=dict)
 
 
 class IQueueRepo:
@@ -18,70 +44,266 @@ class IQueueRepo:
     저장소 포트(인터페이스).
     """
 
-    async def add(self, item: QueueItem) -> None: ...
-    async def get(self, request_id: str) -> Optional[QueueItem]: ...
-    async def mark_admitted(self, request_id: str) -> Optional[QueueItem]: ...
-    async def mark_finished(self, request_id: str, ok: bool, reason: Optional[str]) -> Optional[QueueItem]: ...
-    async def cancel(self, request_id: str, reason: str) -> Optional[QueueItem]: ...
+    async def add(self, item: QueueRecord) -> None: ...
+    async def add_many(self, items: List[QueueRecord]) -> List[int]: ...
+    async def get(self, request_id: str) -> Optional[QueueRecord]: ...
+    async def mark_admitted(self, request_id: str) -> Optional[QueueRecord]: ...
+    async def mark_finished(self, request_id: str, ok: bool, reason: Optional[str]) -> Optional[QueueRecord]: ...
+    async def cancel(self, request_id: str, reason: str) -> Optional[QueueRecord]: ...
     async def dequeue_for_user(self, user_id: str) -> Optional[str]: ...
     async def peek_user_queue(self, user_id: str) -> Optional[str]: ...
     async def list_user_ids(self) -> List[str]: ...
     async def inflight_count_global(self) -> int: ...
     async def inflight_count_user(self, user_id: str) -> int: ...
-    async def stats_snapshot(self, avg_finish_sec: Optional[float]) -> QueueSnapshot: ...
+    async def queued_count_global(self) -> int: ...
+    async def queued_count_user(self, user_id: str) -> int: ...
+    async def stats_snapshot(self, avg_finish_sec: Optional[float]) -> QueueStats: ...
     async def user_queue_ids(self, user_id: str) -> List[str]: ...
+    async def queue_position(self, user_id: str, request_id: Optional[str] = None) -> QueuePosition: ...
+    async def compact(self, *, retention_sec: float, max_items: int) -> int: ...
+    async def expire_due(self, cutoff: datetime, reason: str) -> List[QueueRecord]: ...
+    async def reclaim_stale(self, cutoff: datetime, reason: str) -> List[QueueRecord]: ...
+    async def admit_batch(self, limits: Limits, n: int, *, policy=None) -> List[QueueRecord]: ...
+
+
+class _LockedView:
+    """
+    저장소 락을 잡은 상태에서 스케줄러 정책(pick)에 제공하는 동기 뷰.
+    await 없이 O(1) 연산만 노출합니다.
+    """
+
+    def __init__(self, repo: "InMemoryQueueRepo") -> None:
+        self._repo = repo
+
+    def inflight_global(self) -> int:
+        return self._repo._totals[Status.inflight]
+
+    def inflight(self, user_id: str) -> int:
+        uq = self._repo._by_user.get(user_id)
+        return uq.inflight if uq else 0
+
+    def has(self, user_id: str, priority: int) -> bool:
+        uq = self._repo._by_user.get(user_id)
+        return bool(uq and uq.queued.get(priority))
+
+    def pop(self, user_id: str, priority: int) -> Optional[str]:
+        return self._repo._pop_locked(user_id, priority)
+
+    def drain_activations(self) -> List[Tuple[int, str]]:
+        acts, self._repo._activations = self._repo._activations, []
+        return acts
 
 
 class InMemoryQueueRepo(IQueueRepo):
     """
     프로덕션 전, 단일 프로세스용 InMemory 저장소.
-    멀티워커/멀티프로세스 환경에선 Redis/ZooKeeper 등으로 대체 필요.
+    멀티워커/멀티프로세스 환경에선 RedisQueueRepo(QUEUE_BACKEND=redis)를 사용하세요.
+
+    상태별(글로벌) / 사용자별 카운터를 상태 전이 시점에 함께 갱신하므로
+    inflight_count_global()은 O(1), stats_snapshot()은 O(users) 비용입니다.
+
+    종료 항목은 compact() 호출 시 보존 정책(시간 창/최대 개수)에 따라
+    _items에서 빠져 압축 아카이브(링버퍼)로 이동합니다. get()은 아카이브까지 조회합니다.
     """
 
-    def __init__(self) -> None:
-        self._items: Dict[str, QueueItem] = {}
-        self._by_user: Dict[str, _UserQueues] = defaultdict(lambda: _UserQueues(deque(), 0))
+    def __init__(self, *, archive_size: int = 50_000) -> None:
+        self._items: Dict[str, QueueRecord] = {}
+        self._by_user: Dict[str, _UserQueues] = defaultdict(lambda: _UserQueues({}, 0))
+        self._totals: Dict[Status, int] = defaultdict(int)
+        # 종료 순서(단조 시각, request_id) — compact()가 앞에서부터 소거
+        self._terminal: Deque[Tuple[float, str]] = deque()
+        self._archive = TerminalArchive(archive_size)
+        # TTL 마감 인덱스: (enqueued_at ts, seq, request_id) 최소 힙
+        # 대기 상태를 벗어난 항목은 pop 시점에 지연 폐기
+        self._deadlines: List[Tuple[float, int, str]] = []
+        self._seq = itertools.count()
+        # 비어있다가 대기 항목이 생긴 (priority, user) 흐름 — 스케줄러가 drain
+        self._activations: List[Tuple[int, str]] = []
+        # 순번 인덱스: request_id → 흐름 내 seq, 우선순위 클래스별 흐름 길이 분포
+        self._pos_seq: Dict[str, int] = {}
+        self._hists: Dict[int, LengthHistogram] = defaultdict(LengthHistogram)
+        self._view = _LockedView(self)
         self._lock = asyncio.Lock()
 
-    async def add(self, item: QueueItem) -> None:
-        async with self._lock:
-            self._items[item.request_id] = item
-            self._by_user[item.user_id].queued.append(item.request_id)
+    # -------- 카운터 유지(락 보유 상태에서 호출) --------
 
-    async def get(self, request_id: str) -> Optional[QueueItem]:
-        async with self._lock:
-            return self._items.get(request_id)
+    def _count(self, uq: _UserQueues, status: Status, delta: int) -> None:
+        self._totals[status] += delta
+        if status == Status.queued:
+            uq.queued_count += delta
+        elif status == Status.inflight:
+            uq.inflight += delta
+        elif status == Status.finished:
+            uq.finished += delta
+        elif status in (Status.failed, Status.expired):
+            uq.failed += delta
+        elif status == Status.canceled:
+            uq.canceled += delta
 
-    async def _pop_from_user(self, user_id: str) -> Optional[str]:
+    def _transition(self, item: QueueRecord, new_status: Status) -> None:
+        uq = self._by_user[item.user_id]
+        self._count(uq, item.status, -1)
+        item.status = new_status
+        self._count(uq, new_status, +1)
+        if new_status in _TERMINAL:
+            self._terminal.append((time.monotonic(), item.request_id))
+
+    # -------- 우선순위별 대기열(락 보유 상태에서 호출) --------
+
+    def _push_locked(self, item: QueueRecord) -> None:
+        uq = self._by_user[item.user_id]
+        dq = uq.queued.get(item.priority)
+        if dq is None:
+            dq = uq.queued[item.priority] = deque()
+            self._activations.append((item.priority, item.user_id))
+        dq.append(item.request_id)
+        idx = uq.index.get(item.priority)
+        if idx is None:
+            idx = uq.index[item.priority] = SeqIndex()
+        n = len(idx)
+        self._pos_seq[item.request_id] = idx.append()
+        self._hists[item.priority].move(n, n + 1)
+
+    def _unindex_locked(self, item: QueueRecord) -> None:
+        # 대기열 이탈(pop/묘비) 시 순번 인덱스에서 제거 — 중복 호출은 무시
+        seq = self._pos_seq.pop(item.request_id, None)
+        uq = self._by_user.get(item.user_id)
+        if seq is None or uq is None:
+            return
+        idx = uq.index.get(item.priority)
+        if idx is None:
+            return
+        n = len(idx)
+        idx.remove(seq)
+        self._hists[item.priority].move(n, n - 1)
+        if not idx:
+            del uq.index[item.priority]
+
+    def _is_live(self, request_id: str) -> bool:
+        it = self._items.get(request_id)
+        return it is not None and it.status == Status.queued
+
+    def _purge_head(self, uq: _UserQueues, priority: int) -> None:
+        # head의 묘비를 걷어냄 — 각 ID는 한 번만 제거되므로 전체 비용은 선형(분할상환 O(1))
+        dq = uq.queued.get(priority)
+        if dq is None:
+            return
+        while dq and not self._is_live(dq[0]):
+            dq.popleft()
+        if not dq:
+            del uq.queued[priority]
+
+    def _pop_locked(self, user_id: str, priority: Optional[int] = None) -> Optional[str]:
         uq = self._by_user.get(user_id)
         if not uq or not uq.queued:
             return None
-        return uq.queued.popleft()
+        p = max(uq.queued) if priority is None else priority
+        self._purge_head(uq, p)
+        dq = uq.queued.get(p)
+        if not dq:
+            return None
+        rid = dq.popleft()
+        self._unindex_locked(self._items[rid])
+        self._purge_head(uq, p)
+        return rid
+
+    def _tombstone_locked(self, item: QueueRecord) -> None:
+        """
+        대기열에서 빠진 항목(취소/만료/대기 중 종료) 처리: deque.remove(O(n)) 대신
+        상태만 바뀐 채 묘비로 남기고, head일 때만 걷어냄. 순번 인덱스에서는 즉시 제거.
+        """
+        self._unindex_locked(item)
+        uq = self._by_user.get(item.user_id)
+        if uq is not None:
+            self._purge_head(uq, item.priority)
+
+    # -------- IQueueRepo --------
+
+    async def add(self, item: QueueRecord) -> None:
+        async with self._lock:
+            self._items[item.request_id] = item
+            self._push_locked(item)
+            self._count(self._by_user[item.user_id], item.status, +1)
+            heapq.heappush(self._deadlines, (item.enqueued_at.timestamp(), next(self._seq), item.request_id))
+            self._maybe_rebuild_deadlines()
+
+    async def add_many(self, items: List[QueueRecord]) -> List[int]:
+        """
+        일괄 적재(락 1회). 각 항목의 사용자 내 순번(0기준)을 적재 시점에 증분 계산해 반환.
+        """
+        out: List[int] = []
+        ahead: Dict[Tuple[str, int], int] = {}
+        async with self._lock:
+            for item in items:
+                self._items[item.request_id] = item
+                self._push_locked(item)
+                uq = self._by_user[item.user_id]
+                self._count(uq, item.status, +1)
+                heapq.heappush(self._deadlines, (item.enqueued_at.timestamp(), next(self._seq), item.request_id))
+                key = (item.user_id, item.priority)
+                if key not in ahead:
+                    # 상위 우선순위 흐름 길이 합은 배치 내에서 변하지 않음(같은 사용자·클래스 기준 1회)
+                    ahead[key] = sum(len(idx) for q, idx in uq.index.items() if q > item.priority)
+                out.append(ahead[key] + len(uq.index[item.priority]) - 1)
+            self._maybe_rebuild_deadlines()
+        return out
+
+    async def get(self, request_id: str) -> Optional[QueueRecord]:
+        async with self._lock:
+            item = self._items.get(request_id)
+            if item is not None:
+                return item
+            rec = self._archive.get(request_id)
+            return rec.to_record() if rec else None
 
     async def dequeue_for_user(self, user_id: str) -> Optional[str]:
         async with self._lock:
-            return await self._pop_from_user(user_id)
+            return self._pop_locked(user_id)
 
     async def peek_user_queue(self, user_id: str) -> Optional[str]:
         async with self._lock:
             uq = self._by_user.get(user_id)
             if not uq or not uq.queued:
                 return None
-            return uq.queued[0]
+            return uq.queued[max(uq.queued)][0]
 
-    async def mark_admitted(self, request_id: str) -> Optional[QueueItem]:
+    async def mark_admitted(self, request_id: str) -> Optional[QueueRecord]:
         async with self._lock:
-            item = self._items.get(request_id)
-            if not item or item.status != Status.queued:
-                return item
-            item.status = Status.inflight
-            from datetime import datetime, timezone
+            return self._admit_locked(request_id, utcnow())
 
-            item.admitted_at = datetime.now(timezone.utc)
-            self._by_user[item.user_id].inflight += 1
+    def _admit_locked(self, request_id: str, now: datetime) -> Optional[QueueRecord]:
+        item = self._items.get(request_id)
+        if not item or item.status != Status.queued:
             return item
+        self._transition(item, Status.inflight)
+        item.admitted_at = now
+        return item
+
+    async def admit_batch(self, limits: Limits, n: int, *, policy=None) -> List[QueueRecord]:
+        """
+        최대 n건을 선택하고 admit 마킹(queued→inflight)까지 한 번의 임계구역에서 처리.
+        policy가 동기 pick()을 제공하지 않으면(RoundRobinScheduler) 선택은 기존 경로, 마킹만 일괄 처리.
+        이때 활성화 목록은 소비하는 정책이 없으므로 비움(무한 증가 방지).
+        """
+        pick = getattr(policy, "pick", None)
+        if pick is None:
+            ids = await policy.select_admissions(repo=self, limits=limits, batch_max=n) if policy else []
+            async with self._lock:
+                self._activations.clear()
+                return self._admit_many_locked(ids)
+        async with self._lock:
+            return self._admit_many_locked(pick(self._view, limits=limits, batch_max=n))
 
-    async def mark_finished(self, request_id: str, ok: bool, reason: Optional[str]) -> Optional[QueueItem]:
+    def _admit_many_locked(self, ids: List[str]) -> List[QueueRecord]:
+        now = utcnow()
+        out: List[QueueRecord] = []
+        for rid in ids:
+            it = self._admit_locked(rid, now)
+            if it is not None and it.status == Status.inflight:
+                out.append(it)
+        return out
+
+    async def mark_finished(self, request_id: str, ok: bool, reason: Optional[str]) -> Optional[QueueRecord]:
         async with self._lock:
             item = self._items.get(request_id)
             if not item or item.status not in (Status.inflight, Status.queued):
@@ -89,78 +311,164 @@ class InMemoryQueueRepo(IQueueRepo):
 
             from datetime import datetime, timezone
 
-            item.status = Status.finished if ok else Status.failed
+            was_queued = item.status == Status.queued
+            # inflight 감소 / 종료 카운터 증가는 _transition에서 처리
+            self._transition(item, Status.finished if ok else Status.failed)
             item.finished_at = datetime.now(timezone.utc)
             item.fail_reason = None if ok else (reason or "failed")
-
-            # inflight 감소
-            uq = self._by_user.get(item.user_id)
-            if uq and uq.inflight > 0:
-                uq.inflight -= 1
+            if was_queued:
+                self._tombstone_locked(item)
             return item
 
-    async def cancel(self, request_id: str, reason: str) -> Optional[QueueItem]:
+    async def cancel(self, request_id: str, reason: str) -> Optional[QueueRecord]:
         async with self._lock:
-            item = self._items.get(request_id)
-            if not item or item.status != Status.queued:
-                return item
-            item.status = Status.canceled
-            item.fail_reason = reason
-            # 대기열에서 제거 필요: deque에서 해당 ID 제거
-            uq = self._by_user.get(item.user_id)
-            if uq:
-                try:
-                    uq.queued.remove(request_id)
-                except ValueError:
-                    pass
+            return self._cancel_locked(request_id, reason)
+
+    def _cancel_locked(self, request_id: str, reason: str) -> Optional[QueueRecord]:
+        item = self._items.get(request_id)
+        if not item or item.status != Status.queued:
             return item
+        self._transition(item, Status.canceled)
+        item.fail_reason = reason
+        # 대기열에서는 묘비로 남김(dequeue/peek 시 건너뜀)
+        self._tombstone_locked(item)
+        return item
+
+    async def reclaim_stale(self, cutoff: datetime, reason: str) -> List[QueueRecord]:
+        """
+        inflight 리스 만료 회수 — 인메모리 상태는 프로세스와 함께 사라지므로 크래시 잔여 행이 없음(no-op).
+        """
+        return []
+
+    async def expire_due(self, cutoff: datetime, reason: str) -> List[QueueRecord]:
+        """
+        enqueued_at < cutoff 인 대기 항목을 취소하고 반환.
+        마감이 지난 항목만 힙에서 꺼내므로 만료 1건당 O(log n), 만료 대상이 없으면 O(1).
+        """
+        limit = cutoff.timestamp()
+        expired: List[QueueRecord] = []
+        async with self._lock:
+            while self._deadlines and self._deadlines[0][0] < limit:
+                _, _, rid = heapq.heappop(self._deadlines)
+                item = self._items.get(rid)
+                if not item or item.status != Status.queued:
+                    continue  # 이미 admit/취소된 항목
+                self._cancel_locked(rid, reason)
+                expired.append(item)
+        return expired
+
+    def _maybe_rebuild_deadlines(self) -> None:
+        # admit된 항목이 힙에 오래 남아 메모리가 불어나지 않도록, 대기 수 대비 과도하면 재구성
+        n_queued = self._totals[Status.queued]
+        if len(self._deadlines) <= 2 * n_queued + 1024:
+            return
+        self._deadlines = [
+            (ts, seq, rid)
+            for ts, seq, rid in self._deadlines
+            if (it := self._items.get(rid)) is not None and it.status == Status.queued
+        ]
+        heapq.heapify(self._deadlines)
 
     async def inflight_count_global(self) -> int:
         async with self._lock:
-            return sum(1 for it in self._items.values() if it.status == Status.inflight)
+            return self._totals[Status.inflight]
 
     async def inflight_count_user(self, user_id: str) -> int:
         async with self._lock:
             uq = self._by_user.get(user_id)
             return uq.inflight if uq else 0
 
+    async def queued_count_global(self) -> int:
+        async with self._lock:
+            return self._totals[Status.queued]
+
+    async def queued_count_user(self, user_id: str) -> int:
+        async with self._lock:
+            uq = self._by_user.get(user_id)
+            return uq.queued_count if uq else 0
+
     async def list_user_ids(self) -> List[str]:
         async with self._lock:
             return [u for u, uq in self._by_user.items() if uq.queued or uq.inflight]
 
-    async def stats_snapshot(self, avg_finish_sec: Optional[float]) -> QueueSnapshot:
-        from datetime import datetime, timezone
-
-        async with self._lock:
-            totals: Dict[str, int] = defaultdict(int)
-            per_user_map: Dict[str, UserWindow] = {}
-
-            for it in self._items.values():
-                totals[it.status.value] += 1
-                uw = per_user_map.setdefault(
-                    it.user_id, UserWindow(user_id=it.user_id, queued=0, inflight=0, finished=0, failed=0, canceled=0)
-                )
-                if it.status == Status.queued:
-                    uw.queued += 1
-                elif it.status == Status.inflight:
-                    uw.inflight += 1
-                elif it.status == Status.finished:
-                    uw.finished += 1
-                elif it.status in (Status.failed, Status.expired):
-                    uw.failed += 1
-                elif it.status == Status.canceled:
-                    uw.canceled += 1
-
-            inflight_global = totals.get(Status.inflight.value, 0)
-            return QueueSnapshot(
-                ts=datetime.now(timezone.utc),
-                totals=dict(totals),
-                inflight_global=inflight_global,
-                per_user=list(per_user_map.values()),
+    async def stats_snapshot(self, avg_finish_sec: Optional[float]) -> QueueStats:
+        async with self._lock:
+            totals = {st.value: n for st, n in self._totals.items() if n > 0}
+            per_user = [
+                UserStats(uid, uq.queued_count, uq.inflight, uq.finished, uq.failed, uq.canceled)
+                for uid, uq in self._by_user.items()
+            ]
+            return QueueStats(
+                totals=totals,
+                inflight_global=self._totals[Status.inflight],
+                per_user=per_user,
                 avg_finish_sec=avg_finish_sec,
             )
 
     async def user_queue_ids(self, user_id: str) -> List[str]:
+        """
+        사용자 대기열을 admit 순서(우선순위 내림차순 → FIFO)로 반환.
+        """
         async with self._lock:
             uq = self._by_user.get(user_id)
-            return list(uq.queued) if uq else []
+            if not uq:
+                return []
+            return [rid for p in sorted(uq.queued, reverse=True) for rid in uq.queued[p] if self._is_live(rid)]
+
+    async def queue_position(self, user_id: str, request_id: Optional[str] = None) -> QueuePosition:
+        """
+        사용자 내 순번/전역 순번을 순번 인덱스로 O(log n) 계산(대기열 복사 없음).
+        전역 순번 = 상위 우선순위 대기 총합 + Σ_v min(len_v, k) (같은 클래스 라운드로빈 기준)
+        """
+        async with self._lock:
+            uq = self._by_user.get(user_id)
+            pos = QueuePosition(
+                user_id=user_id,
+                request_id=request_id,
+                queue_len_user=sum(len(idx) for idx in uq.index.values()) if uq else 0,
+                queue_len_global=sum(h.total for h in self._hists.values()),
+            )
+            seq = self._pos_seq.get(request_id) if request_id else None
+            item = self._items.get(request_id) if request_id else None
+            if uq is None or seq is None or item is None or item.user_id != user_id:
+                return pos
+            p = item.priority
+            k = uq.index[p].rank(seq)
+            ahead_user = sum(len(idx) for q, idx in uq.index.items() if q > p)
+            pos.position_in_user = ahead_user + k
+            pos.position_global = higher_total(self._hists, p) + self._hists[p].rr_rank(k)
+            return pos
+
+    async def select_with(self, policy, *, limits: Limits, batch_max: int) -> List[str]:
+        """
+        락 한 번으로 스케줄러 정책(policy.pick)을 실행해 admit 후보를 dequeue.
+        """
+        async with self._lock:
+            return policy.pick(self._view, limits=limits, batch_max=batch_max)
+
+    async def compact(self, *, retention_sec: float, max_items: int) -> int:
+        """
+        보존 창을 벗어난(오래됐거나 max_items 초과) 종료 항목을 아카이브로 이동.
+        이동 건수 반환. 스냅샷 카운터에서도 함께 차감됩니다.
+        """
+        cutoff = time.monotonic() - retention_sec
+        moved = 0
+        async with self._lock:
+            while self._terminal:
+                ts, rid = self._terminal[0]
+                if ts >= cutoff and len(self._terminal) <= max_items:
+                    break
+                self._terminal.popleft()
+                item = self._items.pop(rid, None)
+                if item is None:
+                    continue
+                self._archive.put(ArchivedItem.from_record(item))
+                uq = self._by_user.get(item.user_id)
+                if uq is not None:
+                    self._count(uq, item.status, -1)
+                    if not uq.queued and not (
+                        uq.queued_count or uq.inflight or uq.finished or uq.failed or uq.canceled
+                    ):
+                        del self._by_user[item.user_id]
+                moved += 1
+        return moved
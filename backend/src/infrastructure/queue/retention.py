@@ -0,0 +1,73 @@
+# src/infrastructure/queue/retention.py
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, NamedTuple, Optional
+
+from infrastructure.queue.models import QueueRecord, Status
+
+
+class ArchivedItem(NamedTuple):
+    """
+    종료된 항목의 압축 레코드(상태 조회에 필요한 필드만 유지, payload 제외).
+    """
+
+    request_id: str
+    user_id: str
+    status: Status
+    enqueued_at: datetime
+    admitted_at: Optional[datetime]
+    finished_at: Optional[datetime]
+    fail_reason: Optional[str]
+
+    @classmethod
+    def from_record(cls, it: QueueRecord) -> "ArchivedItem":
+        return cls(
+            request_id=it.request_id,
+            user_id=it.user_id,
+            status=it.status,
+            enqueued_at=it.enqueued_at,
+            admitted_at=it.admitted_at,
+            finished_at=it.finished_at,
+            fail_reason=it.fail_reason,
+        )
+
+    def to_record(self) -> QueueRecord:
+        return QueueRecord(
+            request_id=self.request_id,
+            user_id=self.user_id,
+            status=self.status,
+            enqueued_at=self.enqueued_at,
+            admitted_at=self.admitted_at,
+            finished_at=self.finished_at,
+            fail_reason=self.fail_reason,
+        )
+
+
+class TerminalArchive:
+    """
+    고정 크기 링버퍼 아카이브.
+    - 가득 차면 가장 오래된 레코드부터 버림(메모리 상한 = capacity)
+    - request_id 인덱스로 O(1) 조회
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self._capacity = max(0, capacity)
+        self._order: Deque[str] = deque()
+        self._index: Dict[str, ArchivedItem] = {}
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def put(self, rec: ArchivedItem) -> None:
+        if self._capacity == 0:
+            return
+        if rec.request_id in self._index:
+            self._index[rec.request_id] = rec
+            return
+        while len(self._order) >= self._capacity:
+            self._index.pop(self._order.popleft(), None)
+        self._order.append(rec.request_id)
+        self._index[rec.request_id] = rec
+
+    def get(self, request_id: str) -> Optional[ArchivedItem]:
+        return self._index.get(request_id)
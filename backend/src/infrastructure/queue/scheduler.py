@@ -1,6 +1,7 @@
 # src/infrastructure/queue/scheduler.py
 import itertools
-from typing import List, Optional
+from collections import deque
+from typing import Deque, Dict, List, Optional, Protocol, Set, Tuple
 
 from infrastructure.queue.models import Limits
 from infrastructure.queue.repo import IQueueRepo
@@ -23,6 +24,11 @@ class RoundRobinScheduler:
         limits: Limits,
         batch_max: int,
     ) -> List[str]:
+        # 원격 저장소가 원자적 선택(단일 왕복)을 제공하면 위임
+        remote_select = getattr(repo, "select_admissions", None)
+        if remote_select is not None:
+            return await remote_select(limits=limits, batch_max=batch_max)
+
         capacity = limits.max_inflight_global - await repo.inflight_count_global()
         capacity = max(0, min(capacity, batch_max))
         if capacity == 0:
@@ -69,3 +75,115 @@ class RoundRobinScheduler:
             self._cursor_user = user_id
 
         return admitted_ids
+
+
+class AdmissionView(Protocol):
+    """
+    저장소가 락을 잡은 상태에서 제공하는 동기 뷰(InMemoryQueueRepo.select_with 참고).
+    """
+
+    def inflight_global(self) -> int: ...
+    def inflight(self, user_id: str) -> int: ...
+    def has(self, user_id: str, priority: int) -> bool: ...
+    def pop(self, user_id: str, priority: int) -> Optional[str]: ...
+    def drain_activations(self) -> List[Tuple[int, str]]: ...
+
+
+class DeficitRoundRobinScheduler:
+    """
+    우선순위 클래스 + 사용자 가중치 기반 DRR(Deficit Round Robin) 스케줄러.
+    - 클래스 간: 엄격 우선순위(값이 큰 클래스를 먼저 채움, 예: interactive > batch)
+    - 클래스 내: 사용자별 링을 돌며 가중치(quantum)만큼 적립된 deficit으로 1건씩 admit
+    - 링/적자는 호출 간 유지되고 신규 흐름만 drain하므로 admit 결정당 O(1)(분할상환)
+    - 유저별 동시실행 한도는 이번 패스에서 선택한 건수까지 포함해 검사
+
+    저장소가 select_with(락 안에서 pick 실행)를 제공하지 않으면
+    원격 저장소(Redis/Postgres)의 select_admissions(클래스 우선순위만 적용, 가중치 미적용)
+    또는 RoundRobinScheduler(우선순위 미적용)로 폴백합니다.
+    """
+
+    _MIN_WEIGHT = 0.05
+
+    def __init__(self, *, weights: Optional[Dict[str, float]] = None, default_weight: float = 1.0) -> None:
+        self._default_weight = max(self._MIN_WEIGHT, float(default_weight))
+        self._weights: Dict[str, float] = {}
+        for uid, w in (weights or {}).items():
+            self.set_weight(uid, w)
+        # 우선순위 클래스별 활성 사용자 링 / 링 멤버십 / deficit
+        self._rings: Dict[int, Deque[str]] = {}
+        self._members: Set[Tuple[int, str]] = set()
+        self._deficit: Dict[Tuple[int, str], float] = {}
+        self._fallback = RoundRobinScheduler()
+
+    def set_weight(self, user_id: str, weight: float) -> None:
+        self._weights[user_id] = max(self._MIN_WEIGHT, float(weight))
+
+    def weight(self, user_id: str) -> float:
+        return self._weights.get(user_id, self._default_weight)
+
+    async def select_admissions(
+        self,
+        *,
+        repo: IQueueRepo,
+        limits: Limits,
+        batch_max: int,
+    ) -> List[str]:
+        select_with = getattr(repo, "select_with", None)
+        if select_with is not None:
+            return await select_with(self, limits=limits, batch_max=batch_max)
+        return await self._fallback.select_admissions(repo=repo, limits=limits, batch_max=batch_max)
+
+    # -------- 동기 정책(저장소 락 안에서 실행) --------
+
+    def pick(self, view: AdmissionView, *, limits: Limits, batch_max: int) -> List[str]:
+        for prio, uid in view.drain_activations():
+            if (prio, uid) not in self._members:
+                self._members.add((prio, uid))
+                self._rings.setdefault(prio, deque()).append(uid)
+
+        capacity = max(0, min(limits.max_inflight_global - view.inflight_global(), batch_max))
+        picked: List[str] = []
+        picked_by_user: Dict[str, int] = {}
+
+        for prio in sorted(self._rings, reverse=True):
+            if len(picked) >= capacity:
+                break
+            ring = self._rings[prio]
+            # 연속으로 아무것도 못 뽑은 방문 수 — 모두 한도에 막히면 다음 클래스로
+            idle_visits = 0
+            idle_limit = len(ring) * (int(1 / self._MIN_WEIGHT) + 1)
+            while ring and len(picked) < capacity and idle_visits <= idle_limit:
+                uid = ring[0]
+                key = (prio, uid)
+                if not view.has(uid, prio):
+                    ring.popleft()
+                    self._members.discard(key)
+                    self._deficit.pop(key, None)
+                    continue
+                used = view.inflight(uid) + picked_by_user.get(uid, 0)
+                if used >= limits.max_inflight_per_user:
+                    ring.rotate(-1)
+                    idle_visits += 1
+                    continue
+                deficit = self._deficit.get(key, 0.0)
+                if deficit < 1.0:
+                    deficit += self.weight(uid)
+                    if deficit < 1.0:
+                        self._deficit[key] = deficit
+                        ring.rotate(-1)
+                        idle_visits += 1
+                        continue
+                rid = view.pop(uid, prio)
+                if rid is None:
+                    continue
+                picked.append(rid)
+                picked_by_user[uid] = picked_by_user.get(uid, 0) + 1
+                idle_visits = 0
+                deficit -= 1.0
+                self._deficit[key] = deficit
+                if deficit < 1.0:
+                    ring.rotate(-1)
+            if not ring:
+                del self._rings[prio]
+
+        return picked
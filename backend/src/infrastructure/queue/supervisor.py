@@ -0,0 +1,112 @@
+# src/infrastructure/queue/supervisor.py
+"""
+백그라운드 태스크 감독 풀.
+
+- 생성한 태스크를 집합으로 보관(참조 유지 → GC로 사라지거나 종료 시 고아가 되지 않음)
+- 동시 실행 상한(max_tasks): spawn()은 빈 슬롯까지 대기, spawn_nowait()은 가득 차면 None
+- 태스크 예외는 로그로 남기고 풀은 계속 동작
+- drain(timeout): 신규 접수 중단 → 실행 중 태스크 완료 대기 → 기한 초과분은 취소 전파 후 정리
+"""
+
+import asyncio
+import logging
+from typing import Any, Coroutine, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class PoolClosedError(RuntimeError):
+    """drain/close 이후 spawn 시도."""
+
+
+class TaskSupervisor:
+    def __init__(self, name: str, *, max_tasks: int = 64) -> None:
+        self.name = name
+        self.max_tasks = max(1, max_tasks)
+        self._tasks: Set[asyncio.Task] = set()
+        self._closed = False
+        self._freed = asyncio.Event()
+        self.stats = {"spawned": 0, "failed": 0, "canceled": 0, "rejected": 0}
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @property
+    def full(self) -> bool:
+        return len(self._tasks) >= self.max_tasks
+
+    @property
+    def free(self) -> int:
+        return max(0, self.max_tasks - len(self._tasks))
+
+    async def wait_free(self) -> None:
+        """빈 슬롯이 생기거나 풀이 닫힐 때까지 대기."""
+        while not self._closed and self.full:
+            self._freed.clear()
+            await self._freed.wait()
+
+    async def spawn(self, coro: Coroutine[Any, Any, Any], *, name: Optional[str] = None) -> asyncio.Task:
+        """
+        빈 슬롯이 생길 때까지 기다린 뒤 실행(호출 측 backpressure). 닫힌 풀이면 PoolClosedError.
+        """
+        await self.wait_free()
+        if self._closed:
+            coro.close()
+            raise PoolClosedError(self.name)
+        return self._start(coro, name)
+
+    def spawn_nowait(self, coro: Coroutine[Any, Any, Any], *, name: Optional[str] = None) -> Optional[asyncio.Task]:
+        """
+        슬롯이 없거나 닫힌 풀이면 실행하지 않고 None(coro는 닫음).
+        """
+        if self._closed or self.full:
+            self.stats["rejected"] += 1
+            coro.close()
+            return None
+        return self._start(coro, name)
+
+    def close(self) -> None:
+        """신규 spawn 중단(실행 중 태스크는 유지). 슬롯 대기 중인 spawn()은 PoolClosedError."""
+        self._closed = True
+        self._freed.set()
+
+    async def drain(self, timeout: Optional[float]) -> int:
+        """
+        close() 후 실행 중 태스크가 끝나길 timeout초까지 기다리고, 남은 태스크는 취소.
+        취소한 태스크 수 반환.
+        """
+        self.close()
+        if not self._tasks:
+            return 0
+        _, pending = await asyncio.wait(set(self._tasks), timeout=timeout)
+        if pending:
+            logger.warning("%s: drain deadline, canceling %d task(s)", self.name, len(pending))
+        for t in pending:
+            t.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        return len(pending)
+
+    # -------- internal --------
+
+    def _start(self, coro: Coroutine[Any, Any, Any], name: Optional[str]) -> asyncio.Task:
+        task = asyncio.create_task(coro, name=name)
+        self._tasks.add(task)
+        self.stats["spawned"] += 1
+        task.add_done_callback(self._on_done)
+        return task
+
+    def _on_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        self._freed.set()
+        if task.cancelled():
+            self.stats["canceled"] += 1
+            return
+        exc = task.exception()
+        if exc is not None:
+            self.stats["failed"] += 1
+            logger.error("%s: task %s failed", self.name, task.get_name(), exc_info=exc)
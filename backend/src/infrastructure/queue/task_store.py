@@ -0,0 +1,123 @@
+# src/infrastructure/queue/task_store.py
+"""
+비동기 태스크(sim-then-generate) 상태 저장소.
+
+- InMemoryTaskStore: 종료 태스크를 TTL(마지막 접근 기준) + LRU 상한으로 제거.
+  진행 중 태스크는 제거하지 않습니다.
+- 종료 시 큰 결과(markdown)는 saved_id 참조만 남기고 본문을 버립니다(result_ref=True).
+  본문이 필요하면 generated_jds에서 saved_id로 다시 읽습니다.
+- PostgresTaskStore(pg_task_store.py): llm_tasks 테이블 write-through + 메모리 캐시.
+"""
+
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+TERMINAL_TASK_STATUSES = ("finished", "failed")
+
+
+def _new_record(tid: str, *, user_id: str, req_json: Dict[str, Any], stream_mode: bool) -> Dict[str, Any]:
+    return {
+        "task_id": tid,
+        "user_id": user_id,
+        "status": "queued",  # queued|waiting|generating|finished|failed
+        "created_at": time.time(),
+        "finished_at": None,
+        "error": None,
+        "saved_id": None,
+        "result": None,  # JDGenerateResponse 또는 {title, markdown}
+        "result_ref": False,  # True면 result에서 markdown을 버리고 saved_id만 참조
+        "meta": {"pre_total": None, "pre_done": 0},
+        "stream_mode": stream_mode,
+        "req_json": req_json,
+    }
+
+
+def _slim_terminal(rec: Dict[str, Any], inline_max: int) -> None:
+    """
+    종료 태스크 경량화: 요청 원문 제거, saved_id가 있으면 긴 markdown은 참조로 대체.
+    """
+    rec["req_json"] = None
+    result = rec.get("result")
+    if not isinstance(result, dict) or rec.get("saved_id") is None:
+        return
+    md = result.get("markdown")
+    if isinstance(md, str) and len(md) > inline_max:
+        rec["result"] = {k: v for k, v in result.items() if k != "markdown"}
+        rec["result_ref"] = True
+
+
+class ITaskStore:
+    """
+    태스크 저장소 포트(인터페이스).
+    """
+
+    async def create(self, *, user_id: str, req_json: Dict[str, Any], stream_mode: bool = False) -> str: ...
+    async def get(self, tid: str) -> Optional[Dict[str, Any]]: ...
+    async def update(self, tid: str, **kwargs: Any) -> None: ...
+    async def purge(self) -> int: ...
+
+
+class InMemoryTaskStore(ITaskStore):
+    """
+    - ttl_sec: 종료 태스크를 마지막 접근 후 이 시간이 지나면 제거
+    - max_items: 보관 종료 태스크 수 상한(넘으면 가장 오래 접근 안 된 것부터 제거)
+    - inline_result_max: 종료 후 메모리에 남길 markdown 최대 길이(초과 시 saved_id 참조만)
+    """
+
+    def __init__(self, *, ttl_sec: float = 3600.0, max_items: int = 10_000, inline_result_max: int = 4096) -> None:
+        self.data: Dict[str, Dict[str, Any]] = {}
+        # 종료 태스크의 LRU 순서(마지막 접근 시각) — 앞쪽이 가장 오래됨
+        self._terminal: "OrderedDict[str, float]" = OrderedDict()
+        self._ttl = ttl_sec
+        self._max = max(0, max_items)
+        self._inline_max = inline_result_max
+
+    def put(self, rec: Dict[str, Any]) -> None:
+        # 외부(영속 저장소)에서 읽은 레코드를 캐시에 적재
+        tid = rec["task_id"]
+        self.data[tid] = rec
+        if rec.get("status") in TERMINAL_TASK_STATUSES:
+            self._terminal[tid] = time.monotonic()
+            self._terminal.move_to_end(tid)
+        self._evict()
+
+    async def create(self, *, user_id: str, req_json: Dict[str, Any], stream_mode: bool = False) -> str:
+        tid = str(uuid.uuid4())
+        self.data[tid] = _new_record(tid, user_id=user_id, req_json=req_json, stream_mode=stream_mode)
+        self._evict()
+        return tid
+
+    async def get(self, tid: str) -> Optional[Dict[str, Any]]:
+        rec = self.data.get(tid)
+        if rec is not None and tid in self._terminal:
+            self._terminal[tid] = time.monotonic()
+            self._terminal.move_to_end(tid)
+        return rec
+
+    async def update(self, tid: str, **kwargs: Any) -> None:
+        rec = self.data.get(tid)
+        if rec is None:
+            return
+        rec.update(kwargs)
+        if rec.get("status") in TERMINAL_TASK_STATUSES:
+            _slim_terminal(rec, self._inline_max)
+            self._terminal[tid] = time.monotonic()
+            self._terminal.move_to_end(tid)
+            self._evict()
+
+    async def purge(self) -> int:
+        return self._evict()
+
+    def _evict(self) -> int:
+        cutoff = time.monotonic() - self._ttl
+        n = 0
+        while self._terminal:
+            tid, ts = next(iter(self._terminal.items()))
+            if ts >= cutoff and len(self._terminal) <= self._max:
+                break
+            self._terminal.popitem(last=False)
+            self.data.pop(tid, None)
+            n += 1
+        return n
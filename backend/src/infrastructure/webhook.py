@@ -0,0 +1,245 @@
+# src/infrastructure/webhook.py
+"""
+웹훅(callback_url) 비동기 전송기.
+
+- 프로세스 공용 httpx.AsyncClient 1개(커넥션 풀 상한) → 배치 종료 시 웹훅 폭주에도 소켓 수 고정
+- 유한 수신 큐(queue_size): 가득 차면 submit()이 False(드롭 카운트) — 호출 측을 막지 않음
+- 목적지(URL)별 배치(opt-in, WEBHOOK_BATCH_MAX>1): linger 동안 모인 이벤트를 한 번에 POST(batch_max개 상한)
+  1건이면 payload 그대로, 2건 이상이면 {"events": [...], "count": n}
+  기본값 1 → 항상 이벤트 1건 = payload 그대로(기존 callback_url 수신 측 형식 유지)
+- 실패(네트워크/408/429/5xx)는 지수 백오프 + 지터로 재시도(max_attempts), 그 외 4xx는 즉시 포기
+"""
+
+import asyncio
+import logging
+import os
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+_RETRY_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+
+@dataclass(frozen=True)
+class WebhookConfig:
+    # 커넥션 풀 상한(전체) / keep-alive 유지 수
+    max_connections: int = 20
+    max_keepalive: int = 10
+    timeout_sec: float = 10.0
+    # 수신 큐 상한(전송 대기 이벤트 수)
+    queue_size: int = 10_000
+    # 동시 전송 워커 수
+    workers: int = 4
+    # 재시도: 총 시도 횟수, 백오프 base * 2^(n-1) (상한 backoff_max_sec) × 지터
+    max_attempts: int = 5
+    backoff_base_sec: float = 0.5
+    backoff_max_sec: float = 30.0
+    # 목적지별 배치: 최대 건수 / 첫 이벤트 후 대기(초) — batch_max=1(기본)이면 배치 없음
+    # 2 이상이면 수신 측이 {"events": [...], "count": n} 묶음 형식을 처리할 수 있어야 함
+    batch_max: int = 1
+    batch_linger_sec: float = 0.2
+
+
+def _float_env(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except Exception:
+        return default
+
+
+def load_webhook_config() -> WebhookConfig:
+    return WebhookConfig(
+        max_connections=int(_float_env("WEBHOOK_MAX_CONNECTIONS", 20)),
+        max_keepalive=int(_float_env("WEBHOOK_MAX_KEEPALIVE", 10)),
+        timeout_sec=_float_env("WEBHOOK_TIMEOUT_SEC", 10.0),
+        queue_size=int(_float_env("WEBHOOK_QUEUE_SIZE", 10_000)),
+        workers=int(_float_env("WEBHOOK_WORKERS", 4)),
+        max_attempts=int(_float_env("WEBHOOK_MAX_ATTEMPTS", 5)),
+        backoff_base_sec=_float_env("WEBHOOK_BACKOFF_BASE_SEC", 0.5),
+        backoff_max_sec=_float_env("WEBHOOK_BACKOFF_MAX_SEC", 30.0),
+        batch_max=int(_float_env("WEBHOOK_BATCH_MAX", 1)),
+        batch_linger_sec=_float_env("WEBHOOK_BATCH_LINGER_SEC", 0.2),
+    )
+
+
+class _Batch:
+    __slots__ = ("url", "payloads", "attempt", "deadline")
+
+    def __init__(self, url: str, deadline: float) -> None:
+        self.url = url
+        self.payloads: List[Dict[str, Any]] = []
+        self.attempt = 0
+        self.deadline = deadline
+
+    def body(self) -> Dict[str, Any]:
+        if len(self.payloads) == 1:
+            return self.payloads[0]
+        return {"events": self.payloads, "count": len(self.payloads)}
+
+
+class WebhookDispatcher:
+    """
+    start()/stop()은 앱 수명주기(lifespan)에서 호출. submit()은 동기·논블로킹.
+    """
+
+    def __init__(self, config: Optional[WebhookConfig] = None, *, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.config = config or WebhookConfig()
+        self._transport = transport  # 테스트/프록시용 주입
+        self._client: Optional[httpx.AsyncClient] = None
+        self._inbox: "asyncio.Queue[tuple[str, Dict[str, Any]]]" = asyncio.Queue(maxsize=max(1, self.config.queue_size))
+        self._outbox: "asyncio.Queue[_Batch]" = asyncio.Queue()
+        self._pending: Dict[str, _Batch] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._retry_timers: Set[asyncio.TimerHandle] = set()
+        self._unsettled = 0  # 수락했지만 전송/포기가 확정되지 않은 이벤트 수
+        self._settled = asyncio.Event()
+        self._settled.set()
+        self.stats: Dict[str, int] = {"submitted": 0, "delivered": 0, "retried": 0, "failed": 0, "dropped": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._client is not None
+
+    def submit(self, url: str, payload: Dict[str, Any]) -> bool:
+        """
+        전송 예약. 큐가 가득 찼거나 미시작 상태면 False(드롭).
+        """
+        if not self.running:
+            self.stats["dropped"] += 1
+            logger.warning("webhook dispatcher not running, dropped: %s", url)
+            return False
+        try:
+            self._inbox.put_nowait((url, payload))
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+            logger.warning("webhook queue full, dropped: %s", url)
+            return False
+        self.stats["submitted"] += 1
+        self._settle(+1)
+        return True
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        cfg = self.config
+        self._client = httpx.AsyncClient(
+            timeout=cfg.timeout_sec,
+            limits=httpx.Limits(max_connections=cfg.max_connections, max_keepalive_connections=cfg.max_keepalive),
+            transport=self._transport,
+        )
+        self._tasks = [asyncio.create_task(self._collect_loop(), name="webhook_collector")]
+        for i in range(max(1, cfg.workers)):
+            self._tasks.append(asyncio.create_task(self._send_loop(), name=f"webhook_sender_{i}"))
+
+    async def stop(self, drain_timeout: float = 5.0) -> None:
+        """
+        drain_timeout 동안 남은 이벤트 전송을 기다린 뒤 종료(재시도 대기 중인 것은 포기).
+        """
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self._settled.wait(), drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning("webhook drain timeout: %d undelivered", self._unsettled)
+        for h in self._retry_timers:
+            h.cancel()
+        self._retry_timers.clear()
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self._client.aclose()
+        self._client = None
+
+    # -------- internal --------
+
+    def _settle(self, delta: int) -> None:
+        self._unsettled += delta
+        if self._unsettled > 0:
+            self._settled.clear()
+        else:
+            self._settled.set()
+
+    async def _collect_loop(self) -> None:
+        # 수신 큐 → 목적지별 배치(건수 또는 linger 도달 시 전송 큐로)
+        cfg = self.config
+        while True:
+            timeout = None
+            if self._pending:
+                timeout = max(0.0, min(b.deadline for b in self._pending.values()) - time.monotonic())
+            try:
+                url, payload = await asyncio.wait_for(self._inbox.get(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            else:
+                batch = self._pending.get(url)
+                if batch is None:
+                    batch = self._pending[url] = _Batch(url, time.monotonic() + cfg.batch_linger_sec)
+                batch.payloads.append(payload)
+                if len(batch.payloads) >= max(1, cfg.batch_max):
+                    self._outbox.put_nowait(self._pending.pop(url))
+            now = time.monotonic()
+            for url in [u for u, b in self._pending.items() if b.deadline <= now]:
+                self._outbox.put_nowait(self._pending.pop(url))
+
+    async def _send_loop(self) -> None:
+        while True:
+            batch = await self._outbox.get()
+            try:
+                await self._deliver(batch)
+            except Exception:
+                # 전송 워커는 어떤 오류로도 종료되지 않음(배치는 실패 처리)
+                logger.exception("webhook sender error: %s", batch.url)
+                self._give_up(batch, "internal error")
+
+    async def _deliver(self, batch: _Batch) -> None:
+        batch.attempt += 1
+        retry = False
+        try:
+            resp = await self._client.post(batch.url, json=batch.body())
+            if resp.status_code < 400:
+                self.stats["delivered"] += len(batch.payloads)
+                self._settle(-len(batch.payloads))
+                return
+            retry = resp.status_code in _RETRY_STATUS
+            reason = f"HTTP {resp.status_code}"
+        except httpx.HTTPError as e:
+            retry = True
+            reason = repr(e)
+        except Exception as e:
+            # 잘못된 URL(httpx.InvalidURL 등) — 재시도해도 같으므로 즉시 포기
+            retry = False
+            reason = repr(e)
+
+        if retry and batch.attempt < self.config.max_attempts:
+            self.stats["retried"] += 1
+            delay = self._backoff(batch.attempt)
+            logger.info("webhook retry %d in %.2fs (%s): %s", batch.attempt, delay, reason, batch.url)
+            loop = asyncio.get_running_loop()
+            handle: asyncio.TimerHandle
+
+            def _requeue() -> None:
+                self._retry_timers.discard(handle)
+                self._outbox.put_nowait(batch)
+
+            handle = loop.call_later(delay, _requeue)
+            self._retry_timers.add(handle)
+            return
+
+        self._give_up(batch, reason)
+
+    def _give_up(self, batch: _Batch, reason: str) -> None:
+        self.stats["failed"] += len(batch.payloads)
+        self._settle(-len(batch.payloads))
+        logger.warning("webhook give up after %d attempts (%s): %s", batch.attempt, reason, batch.url)
+
+    def _backoff(self, attempt: int) -> float:
+        # 지수 백오프 상한 × 지터[0.5, 1.0] — 동시 실패한 목적지들의 재시도가 몰리지 않게
+        cfg = self.config
+        cap = min(cfg.backoff_max_sec, cfg.backoff_base_sec * (2 ** (attempt - 1)))
+        return cap * random.uniform(0.5, 1.0)
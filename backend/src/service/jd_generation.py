@@ -1,16 +1,37 @@
 # src/service/jd_generation.py
 import json
+import logging
 import re
-from typing import Literal, AsyncIterator
+from contextlib import aclosing
+from typing import Any, Dict, Literal, AsyncIterator, Tuple
 from typing import Optional
 
+from sqlalchemy.ext.asyncio import AsyncSession
+
 from domain.company_analysis.models import CompanyKnowledge, CompanyJDStyle
 from infrastructure.db.database import get_session
-from infrastructure.db.repository import DefaultStyleRepository, StyleSnapshotRepository
+from infrastructure.db.repository import (
+    DefaultStyleRepository,
+    GeneratedInsightRepository,
+    JDRepository,
+    StyleSnapshotRepository,
+    load_job_name,
+)
 from infrastructure.llm.interface import LLMClient
 from infrastructure.prompt.manager import PromptManager
 from infrastructure.prompt.schema import PromptTemplateInput
 
+# 스트리밍 생성 이벤트: (event, data) — "start" → "delta"* → "end"
+JDStreamEvent = Tuple[str, Dict[str, Any]]
+
+
+def title_from_markdown(md: str, fallback: str) -> str:
+    first = ((md or "").splitlines() or [""])[0].strip()
+    if first.startswith("#"):
+        t = first.lstrip("#").strip()
+        return t or fallback
+    return fallback
+
 
 class JDGenerationService:
     def __init__(self, llm: LLMClient, prompt_manager: PromptManager):
@@ -131,10 +152,274 @@ class JDGenerationService:
         rendered = await self._prepare_generation_inputs(
             company, default_style_name, jd_style, job, job_code, knowledge, language, style_source
         )
-        # LLMClient.stream 은 텍스트 델타를 yield
-        async for chunk in self.llm.stream(
-            prompt=rendered["user_text"],
-            system=rendered.get("system"),
+        # LLMClient.stream 은 텍스트 델타를 yield — 소비 측이 중단하면 aclosing으로 업스트림까지 닫음
+        async with aclosing(
+            self.llm.stream(prompt=rendered["user_text"], system=rendered.get("system"), model=model)
+        ) as chunks:
+            async for chunk in chunks:
+                yield chunk
+
+    # ---- 요청 단위(조회 → 생성 → 저장) API: 라우트/큐 런타임 공용 ----
+
+    async def load_knowledge(
+        self,
+        session: AsyncSession,
+        *,
+        company_code: str,
+        job_code: str,
+        override: Optional[Dict[str, Any]] = None,
+    ) -> CompanyKnowledge:
+        """
+        override 우선, 없으면 DB 최신 지식.
+        - LookupError: 저장된 지식 없음 / ValueError: override 검증 실패 / RuntimeError: 저장 payload 손상
+        """
+        if override is not None:
+            try:
+                return CompanyKnowledge.model_validate(override)
+            except Exception as e:
+                raise ValueError(f"Invalid knowledge_override: {e}") from e
+        payload = await GeneratedInsightRepository(session).latest_payload(company_code=company_code, job_code=job_code)
+        if not payload:
+            raise LookupError("No saved knowledge for given company_code/job_code")
+        try:
+            return CompanyKnowledge.model_validate(payload)
+        except Exception as e:
+            raise RuntimeError(f"Saved knowledge payload invalid: {e}") from e
+
+    async def resolve_style_meta(
+        self,
+        session: AsyncSession,
+        *,
+        style_override: Optional[Any],
+        style_source: str,
+        default_style_name: Optional[str],
+        company_code: str,
+        job_code: str,
+    ) -> Dict[str, Any]:
+        """
+        저장 시 기록할 스타일 메타(style_source / style_preset_name / style_snapshot_id).
+        """
+        # 1) 명시 오버라이드(직접 전달) 우선
+        if style_override is not None:
+            return {"style_source": "override", "style_preset_name": None, "style_snapshot_id": None}
+
+        # 2) 생성 스냅샷 선택
+        if style_source == "generated":
+            snap = await StyleSnapshotRepository(session).latest_for(company_code=company_code, job_code=job_code)
+            return {
+                "style_source": "generated",
+                "style_preset_name": None,
+                "style_snapshot_id": (snap.id if snap else None),
+            }
+
+        # 3) 기본 프리셋
+        name = default_style_name or "일반적"
+        # 존재 확인은 선택적(저장 필드용으로 이름만 기록해도 됨)
+        _ = await DefaultStyleRepository(session).get_preset(style_name=name)
+        return {"style_source": "default", "style_preset_name": name, "style_snapshot_id": None}
+
+    async def prepare_request(
+        self,
+        session: AsyncSession,
+        *,
+        company_code: str,
+        job_code: str,
+        knowledge_override: Optional[Dict[str, Any]],
+        style_override: Optional[Dict[str, Any]],
+        style_source: Literal["generated", "default"],
+        default_style_name: Optional[str],
+    ) -> Dict[str, Any]:
+        """
+        준비 단계(지식/스타일 조회·검증). 오류는 load_knowledge와 동일(LookupError/ValueError/RuntimeError).
+        반환값은 generate_and_save(prepared=...)에 그대로 넘길 수 있습니다.
+        """
+        knowledge = await self.load_knowledge(
+            session, company_code=company_code, job_code=job_code, override=knowledge_override
+        )
+        # Style: override 있으면 사용, 없으면 생성 시 policy대로 해결
+        style: Optional[CompanyJDStyle] = None
+        if style_override is not None:
+            try:
+                style = CompanyJDStyle.model_validate(style_override)
+            except Exception as e:
+                raise ValueError(f"Invalid style_override: {e}") from e
+
+        job_label = (await load_job_name(session, job_code)) or job_code
+        # 저장용 스타일 메타(오류가 나도 생성은 계속)
+        try:
+            style_meta = await self.resolve_style_meta(
+                session,
+                style_override=style_override,
+                style_source=style_source,
+                default_style_name=default_style_name,
+                company_code=company_code,
+                job_code=job_code,
+            )
+        except Exception:
+            style_meta = {"style_source": None, "style_preset_name": None, "style_snapshot_id": None}
+        return {"knowledge": knowledge, "style": style, "job_label": job_label, "style_meta": style_meta}
+
+    async def _save(
+        self,
+        session: AsyncSession,
+        *,
+        company_code: str,
+        job_code: str,
+        title: str,
+        markdown: str,
+        style_meta: Dict[str, Any],
+        provider: Optional[str],
+        model: Optional[str],
+        language: Optional[str],
+    ) -> int:
+        saved_id = await JDRepository(session).save_generated(
+            company_code=company_code,
+            job_code=job_code,
+            title=title,
+            markdown=markdown,
+            sections=None,
+            meta={},  # 필요 시 확장
+            provider=(provider or None),
+            model_name=(model or None),
+            prompt_meta={"key": "jd.generation", "version": "v1", "language": language},
+            style_source=style_meta.get("style_source", None),
+            style_preset_name=style_meta.get("style_preset_name", None),
+            style_snapshot_id=style_meta.get("style_snapshot_id", None),
+        )
+        logging.info(f"Save Complete: company_code={company_code}, job_code={job_code}, saved_id={saved_id}")
+        return saved_id
+
+    async def generate_and_save(
+        self,
+        session: AsyncSession,
+        *,
+        company_code: str,
+        job_code: str,
+        knowledge_override: Optional[Dict[str, Any]] = None,
+        style_override: Optional[Dict[str, Any]] = None,
+        style_source: Literal["generated", "default"] = "default",
+        default_style_name: Optional[str] = None,
+        provider: Optional[str] = None,
+        model: Optional[str] = None,
+        language: Optional[str] = "ko",
+        prepared: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        비스트리밍 생성 + 저장. {company_code, job_code(라벨), title, markdown, saved_id} 반환.
+        준비 단계 오류는 load_knowledge와 동일(LookupError/ValueError/RuntimeError).
+        prepared: prepare_request() 결과(호출 측이 준비 단계 오류를 따로 처리할 때) — 있으면 준비 단계 생략.
+        """
+        prep = prepared or await self.prepare_request(
+            session,
+            company_code=company_code,
+            job_code=job_code,
+            knowledge_override=knowledge_override,
+            style_override=style_override,
+            style_source=style_source,
+            default_style_name=default_style_name,
+        )
+        job_label = prep["job_label"]
+        markdown = await self.generate_jd_markdown(
+            company=company_code,
+            job=job_label,
+            job_code=job_code,
+            knowledge=prep["knowledge"],
+            jd_style=prep["style"],
+            style_source=style_source,
+            default_style_name=default_style_name,
+            model=model,
+            language=language,
+        )
+        title = title_from_markdown(markdown, fallback=f"{company_code} {job_label}")
+        saved_id = await self._save(
+            session,
+            company_code=company_code,
+            job_code=job_code,
+            title=title,
+            markdown=markdown,
+            style_meta=prep["style_meta"],
+            provider=provider,
+            model=model,
+            language=language,
+        )
+        return {
+            "company_code": company_code,
+            "job_code": job_label,
+            "title": title,
+            "markdown": markdown,
+            "saved_id": saved_id,
+        }
+
+    async def stream_and_save(
+        self,
+        session: AsyncSession,
+        *,
+        company_code: str,
+        job_code: str,
+        knowledge_override: Optional[Dict[str, Any]] = None,
+        style_override: Optional[Dict[str, Any]] = None,
+        style_source: Literal["generated", "default"] = "default",
+        default_style_name: Optional[str] = None,
+        provider: Optional[str] = None,
+        model: Optional[str] = None,
+        language: Optional[str] = "ko",
+    ) -> AsyncIterator[JDStreamEvent]:
+        """
+        인프로세스 스트리밍 생성 + 저장. (event, data)를 yield:
+        - "start": 요청 메타 / "delta": {"text"} / "end": {"saved_id", "title"}
+        준비 단계 오류는 첫 이벤트 전에 발생하므로, 첫 이벤트를 먼저 받아 HTTP 오류로 변환할 수 있습니다.
+        SSE 인코딩/HTTP 왕복 없이 큐 런타임이 delta를 EventHub로 바로 넘길 때 사용합니다.
+        """
+        prep = await self.prepare_request(
+            session,
+            company_code=company_code,
+            job_code=job_code,
+            knowledge_override=knowledge_override,
+            style_override=style_override,
+            style_source=style_source,
+            default_style_name=default_style_name,
+        )
+        job_label, style_meta = prep["job_label"], prep["style_meta"]
+        yield "start", {
+            "event": "start",
+            "company_code": company_code,
+            "job_code": job_label,
+            "provider": provider,
+            "model": model,
+            "style_source": style_meta.get("style_source"),
+            "style_preset_name": style_meta.get("style_preset_name"),
+            "style_snapshot_id": style_meta.get("style_snapshot_id"),
+        }
+
+        buffer = []
+        pieces = self.generate_jd_markdown_stream(
+            company=company_code,
+            job=job_label,
+            job_code=job_code,
+            knowledge=prep["knowledge"],
+            jd_style=prep["style"],
+            style_source=style_source,
+            default_style_name=default_style_name,
+            model=model,
+            language=language,
+        )
+        async with aclosing(pieces):
+            async for piece in pieces:
+                buffer.append(piece)
+                yield "delta", {"text": piece}
+
+        # 전송 완료 → 저장
+        markdown = "".join(buffer).strip()
+        title = title_from_markdown(markdown, fallback=f"{company_code} {job_label}")
+        saved_id = await self._save(
+            session,
+            company_code=company_code,
+            job_code=job_code,
+            title=title,
+            markdown=markdown,
+            style_meta=style_meta,
+            provider=provider,
             model=model,
-        ):
-            yield chunk
+            language=language,
+        )
+        yield "end", {"event": "end", "saved_id": saved_id, "title": title}
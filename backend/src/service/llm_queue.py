@@ -3,65 +3,33 @@
 단순 LLM 대기열/상태 서비스 (프로세스 메모리 기반)
 - 사용자별 동시 처리 수(in-progress)
 - 내 앞에 몇 명(옵션: request_id 제공 시)
-- 평균 대기시간 ETA (사용자/글로벌 최근 처리시간 EMA 기반)
-주의: 단일 프로세스에서만 일관. 배포 확장 시 Redis 등으로 교체 필요.
+- 대기시간 ETA (사용자 × 작업 종류별 처리시간 P50/P90, 글로벌 폴백)
+주의: 기본(InMemory) 저장소는 단일 프로세스에서만 일관. 멀티워커는 QUEUE_BACKEND=redis|postgres 사용.
 
 구현 메모:
 - 내부 큐/스케줄/상태머신은 infrastructure.queue.* 모듈(Engine/Repo/Scheduler)을 사용합니다.
-- per-user EMA(지수이동평균)는 이 퍼사드에서 관리합니다(Engine은 글로벌 평균만 집계).
-- position_in_user 계산을 위해 Repo에 user_queue_ids(user_id) 메서드가 있으면 사용합니다.
-  (없으면 0으로 폴백; InMemoryQueueRepo에는 구현 권장)
+- 처리시간 통계는 Engine.eta(EtaEstimator)가 사용자/종류별로 집계합니다(이 퍼사드는 조회만).
+- 순번(position_in_user / position_global)은 Repo.queue_position()의 순번 인덱스로 O(log n) 조회합니다.
+  (대기열 ID 목록을 복사해 index()로 찾지 않음)
+- enqueue/enqueue_many는 퍼사드 락 없이 Repo.add_many() 1회(임계구역 1번)로 적재하고,
+  반환 순번은 적재 시점에 증분 계산합니다.
 """
 
-import asyncio
-from dataclasses import dataclass
-from typing import Any, Dict, Optional, Tuple, List
+from dataclasses import replace
+from typing import Any, Dict, List, Optional, Tuple
 
 from infrastructure.queue.config import load_queue_config
 from infrastructure.queue.engine import QueueEngine
+from infrastructure.queue.eta import KIND_DEFAULT, payload_kind
+from infrastructure.queue.factory import make_queue_repo, make_scheduler
 from infrastructure.queue.metrics import NoopQueueMetrics, PrometheusQueueMetrics
-from infrastructure.queue.models import QueueItem
-from infrastructure.queue.repo import InMemoryQueueRepo
-from infrastructure.queue.scheduler import RoundRobinScheduler
-
-
-# --- 간단 EMA 도우미 -----------------------------------------------------------
-
-
-@dataclass
-class _EMAEntry:
-    value: float
-    alpha: float
-
-
-class _EMAStore:
-    def __init__(self, *, default: float = 20.0, alpha: float = 0.2):
-        self._default = default
-        self._alpha = alpha
-        self._by_user: Dict[str, _EMAEntry] = {}
-
-    def update(self, user_id: str, sample: float) -> float:
-        cur = self._by_user.get(user_id)
-        if cur is None:
-            cur = _EMAEntry(value=self._default, alpha=self._alpha)
-        cur.value = cur.alpha * sample + (1.0 - cur.alpha) * cur.value
-        self._by_user[user_id] = cur
-        return cur.value
-
-    def get(self, user_id: str) -> float:
-        cur = self._by_user.get(user_id)
-        return cur.value if cur else self._default
-
-    def set_alpha(self, alpha: float) -> None:
-        self._alpha = alpha
-        for e in self._by_user.values():
-            e.alpha = alpha
+from infrastructure.queue.models import Priority, QueuePosition, QueueRecord
 
 
 # --- LLMQueueService 퍼사드 ----------------------------------------------------
 class LLMQueueService:
     """
-    간단 라운드로빈 스케줄 + per-user/글로벌 동시성 제한.
+    우선순위/가중 공정(DRR) 스케줄 + per-user/글로벌 동시성 제한.
     Engine(admit/finish/snapshot) 위에 얇은 편의 API를 제공합니다.
     """
 
@@ -70,57 +38,57 @@ class LLMQueueService:
         *,
         per_user_limit: Optional[int] = None,
         global_limit: Optional[int] = None,
-        ema_alpha: float = 0.2,
         use_prom_metrics: bool = False,
         engine: Optional[QueueEngine] = None,
     ):
         cfg = load_queue_config()
+        # 생성자 인자 우선, 나머지 필드는 env 기반 설정 유지
+        if global_limit is not None:
+            cfg = replace(cfg, max_inflight_global=global_limit)
         if per_user_limit is not None:
-            cfg = type(cfg)(
-                max_inflight_global=global_limit if global_limit is not None else cfg.max_inflight_global,
-                max_inflight_per_user=per_user_limit,
-                admit_batch_size=cfg.admit_batch_size,
-                queued_ttl_sec=cfg.queued_ttl_sec,
-                eta_window=cfg.eta_window,
-                metrics_backend=cfg.metrics_backend,
-            )
-        if global_limit is not None and per_user_limit is None:
-            cfg = type(cfg)(
-                max_inflight_global=global_limit,
-                max_inflight_per_user=cfg.max_inflight_per_user,
-                admit_batch_size=cfg.admit_batch_size,
-                queued_ttl_sec=cfg.queued_ttl_sec,
-                eta_window=cfg.eta_window,
-                metrics_backend=cfg.metrics_backend,
-            )
-
-        metrics = PrometheusQueueMetrics() if use_prom_metrics or cfg.metrics_backend == "prom" else NoopQueueMetrics()
+            cfg = replace(cfg, max_inflight_per_user=per_user_limit)
+
+        metrics = (
+            PrometheusQueueMetrics(user_buckets=cfg.metrics_user_buckets)
+            if use_prom_metrics or cfg.metrics_backend == "prom"
+            else NoopQueueMetrics()
+        )
 
         self.engine: QueueEngine = engine or QueueEngine(
-            repo=InMemoryQueueRepo(),
-            scheduler=RoundRobinScheduler(),
+            repo=make_queue_repo(cfg),
+            scheduler=make_scheduler(cfg),
             config=cfg,
             metrics=metrics,
         )
 
-        # per-user EMA 저장 (Engine은 글로벌 평균만 집계)
-        self._ema = _EMAStore(default=20.0, alpha=ema_alpha)
-
-        # 내부 락: 퍼사드 수준 동시 호출 제어(옵션)
-        self._lock = asyncio.Lock()
-
     # ---------- Enqueue / Admit / Finish ----------
 
-    async def enqueue(self, user_key: str, payload: Optional[Dict[str, Any]] = None) -> Tuple[str, int]:
+    async def enqueue(
+        self, user_key: str, payload: Optional[Dict[str, Any]] = None, *, priority: int = Priority.batch
+    ) -> Tuple[str, int]:
         """
         요청을 사용자 큐에 넣고 (request_id, 큐 내 내 위치 0기준)을 반환.
+        대기열 깊이 제한 초과 시 QueueFullError.
+        priority: Priority.interactive(실시간 스트리밍) > Priority.batch(배치/시뮬레이션)
+        """
+        return (await self.enqueue_many(user_key, [payload or {}], priority=priority))[0]
+
+    async def enqueue_many(
+        self, user_key: str, payloads: List[Dict[str, Any]], *, priority: int = Priority.batch
+    ) -> List[Tuple[str, int]]:
+        """
+        여러 건을 한 번에 적재하고 [(request_id, 큐 내 위치 0기준)]을 반환.
+        저장소 임계구역 1회 + 위치는 적재 시점에 증분 계산(별도 위치 조회 없음).
+        깊이 제한은 배치 전체 기준 — 초과 시 한 건도 넣지 않고 QueueFullError.
         """
-        payload = payload or {}
-        async with self._lock:
-            req = await self.engine.enqueue(user_key, payload)
-            # 위치 계산
-            pos = await self._position_in_user(user_key, req.request_id)
-            return req.request_id, pos
+        res = await self.engine.enqueue_many(user_key, payloads, priority=priority)
+        return [(rec.request_id, pos) for rec, pos in res]
+
+    async def check_admission(self, user_key: str, n: int = 1) -> None:
+        """
+        n건 enqueue 가능 여부(대기열 깊이 제한). 초과 시 QueueFullError(retry_after_sec 포함).
+        """
+        await self.engine.check_admission(user_key, n)
 
     async def try_admit_next(self) -> Optional[Tuple[str, str]]:
         """
@@ -143,19 +111,10 @@ class LLMQueueService:
     ) -> None:
         """
         처리 완료 보고.
-        - Engine.finish()를 호출하여 상태/지표 갱신
-        - per-user EMA를 업데이트 (duration_sec 인자가 있으면 우선 사용, 없으면 Engine 측 계산값 사용)
+        - Engine.finish()를 호출하여 상태/지표/처리시간 통계 갱신
+          (duration_sec 인자가 있으면 우선 사용, 없으면 Engine 측 계산값 사용)
         """
-        # 완료 전 user_id를 조회(파이프라인 호환)
-        item: Optional[QueueItem] = await self.engine.status(request_id)
-        user_id = item.user_id if item else None
-
-        result = await self.engine.finish(request_id, ok=ok, reason=reason)
-        # EMA 업데이트
-        if user_id:
-            sample = duration_sec if duration_sec is not None else result.duration_sec
-            if sample is not None:
-                self._ema.update(user_id, sample)
+        await self.engine.finish(request_id, ok=ok, reason=reason, duration_sec=duration_sec)
 
     # ---------- Status / ETA ----------
 
@@ -163,9 +122,9 @@ class LLMQueueService:
         """
         사용자/요청 기준 상태 스냅샷 제공.
         - in_progress_user / in_progress_global
-        - position_in_user (request_id 없으면 0)
-        - queue_len_user
-        - eta_seconds (대략값: position / per_user_limit * ema_latency_user, 없으면 글로벌 평균 폴백)
+        - position_in_user / position_global (request_id 없으면 0)
+        - queue_len_user / queue_len_global
+        - eta_seconds / eta_p90_seconds (position / per_user_limit * 처리시간 P50/P90)
         """
         cfg = self.engine.config
 
@@ -173,40 +132,35 @@ class LLMQueueService:
         in_prog_user = await self.engine.repo.inflight_count_user(user_key)
         in_prog_global = await self.engine.repo.inflight_count_global()
 
-        # 큐 정보
-        queue_ids = await self._user_queue_ids(user_key)
-        queue_len = len(queue_ids)
+        # 큐 정보 + 내 위치 (큐에 없으면 진행중/완료로 간주해 0)
+        qp = await self._queue_position(user_key, request_id)
+        pos = qp.position_in_user or 0
 
-        # 내 위치
-        pos = 0
+        # ETA: 내 요청의 작업 종류 기준(사용자×종류 → 종류 → 사용자 → 글로벌 폴백)
+        kind = KIND_DEFAULT
         if request_id:
-            try:
-                pos = queue_ids.index(request_id)
-            except ValueError:
-                pos = 0  # 큐에 없으면 진행중/완료로 간주
-
-        # ETA: per-user EMA 우선, 없으면 글로벌 평균
-        ema_user = self._ema.get(user_key)
-        global_eta = (await self.engine.snapshot()).avg_finish_sec
-        avg = ema_user if ema_user else (global_eta or 20.0)
-
-        per_user_parallel = max(cfg.max_inflight_per_user, 1)
-        eta = (pos / per_user_parallel) * avg
+            item: Optional[QueueRecord] = await self.engine.status(request_id)
+            kind = payload_kind(item.payload) if item else KIND_DEFAULT
+        eta = self.wait_eta(user_key, pos, kind=kind)
+        eta_p90 = self.wait_eta(user_key, pos, kind=kind, q=0.9)
 
         return {
             "per_user_limit": cfg.max_inflight_per_user,
-            "global_limit": cfg.max_inflight_global,
+            "global_limit": self.engine.limiter.limit,
             "in_progress_user": in_prog_user,
             "in_progress_global": in_prog_global,
-            "queue_len_user": queue_len,
+            "queue_len_user": qp.queue_len_user,
+            "queue_len_global": qp.queue_len_global,
             "position_in_user": pos,
+            "position_global": qp.position_global or 0,
             "eta_seconds": round(float(eta), 1),
+            "eta_p90_seconds": round(float(eta_p90), 1),
         }
 
     async def snapshot(self) -> Dict[str, Dict[str, float | int]]:
         """
         전체 사용자 상태 요약(간단 통계용).
-        { user_key: { in_progress, queue_len, ema_latency }, "_global": { in_progress, users } }
+        { user_key: { in_progress, queue_len, latency_p50, latency_p90 }, "_global": { in_progress, users, concurrency_limit } }
         """
         # 사용자 목록을 Repo에서 직접 가져올 수 없으므로, snapshot(per_user 윈도우)이 제공되면 활용
         snap = await self.engine.snapshot()
@@ -216,31 +170,32 @@ class LLMQueueService:
             summary[uw.user_id] = {
                 "in_progress": uw.inflight,
                 "queue_len": uw.queued,
-                "ema_latency": round(float(self._ema.get(uw.user_id)), 2),
+                "latency_p50": round(self.latency(uw.user_id), 2),
+                "latency_p90": round(self.latency(uw.user_id, q=0.9), 2),
             }
 
         summary["_global"] = {
             "in_progress": snap.inflight_global,
             "users": len(snap.per_user),
+            "concurrency_limit": snap.concurrency_limit,
         }
         return summary
 
-    # ---------- 내부 유틸 ----------
+    def latency(self, user_key: Optional[str] = None, *, kind: Optional[str] = None, q: float = 0.5) -> float:
+        """
+        1건 처리시간 추정(초): 사용자 × 작업 종류 분위수(q=0.5 → P50, 0.9 → P90).
+        """
+        return self.engine.eta.estimate(user_key, kind, q)
 
-    async def _user_queue_ids(self, user_id: str) -> List[str]:
+    def wait_eta(self, user_key: str, ahead: int, *, kind: Optional[str] = None, q: float = 0.5) -> float:
         """
-        Repo가 user_queue_ids(user_id) API를 제공하면 사용하고, 없으면 빈 리스트 반환.
-        (정확한 position 계산을 위해 InMemoryQueueRepo에 본 메서드 구현을 권장)
+        앞선 ahead건이 per-user 동시 한도로 처리될 때 내 차례까지 대기(초).
         """
-        repo = self.engine.repo
-        if hasattr(repo, "user_queue_ids"):
-            return list(await repo.user_queue_ids(user_id))  # type: ignore[attr-defined]
-        return []
+        return self.engine.eta.wait_estimate(
+            ahead, self.engine.config.max_inflight_per_user, user_id=user_key, kind=kind, q=q
+        )
+
+    # ---------- 내부 유틸 ----------
 
-    async def _position_in_user(self, user_id: str, request_id: str) -> int:
-        ids = await self._user_queue_ids(user_id)
-        try:
-            return ids.index(request_id)
-        except ValueError:
-            # 이미 dequeue/진행중이면 0
-            return 0
+    async def _queue_position(self, user_id: str, request_id: Optional[str] = None) -> QueuePosition:
+        return await self.engine.repo.queue_position(user_id, request_id)
@@ -0,0 +1,43 @@
+# tests/test_admission.py
+"""
+대기열 깊이 제한: Retry-After가 현재 처리시간 추정(ETA)에서 계산되는지, 라우트는 429로 매핑하는지.
+"""
+
+import asyncio
+
+import pytest
+
+from infrastructure.queue import QueueConfig, QueueEngine, QueueFullError
+
+
+def _rejection(eng: QueueEngine, user_id: str, n: int) -> QueueFullError:
+    with pytest.raises(QueueFullError) as e:
+        asyncio.run(eng.check_admission(user_id, n))
+    return e.value
+
+
+def test_retry_after_follows_live_eta():
+    cfg = QueueConfig(max_inflight_global=4, max_inflight_per_user=1, max_queued_per_user=2, max_queued_global=3)
+    eng = QueueEngine(config=cfg)
+    asyncio.run(eng.enqueue_many("a", [{}, {}]))
+    # 관측 없음 → 기본 처리시간(20초) × 초과 1건 / 사용자 슬롯 1
+    assert _rejection(eng, "a", 1).retry_after_sec == pytest.approx(20.0)
+    for _ in range(3):
+        eng.eta.observe("a", "default", 4.0)
+    e = _rejection(eng, "a", 2)
+    assert (e.scope, e.depth, e.limit) == ("user", 2, 2)
+    assert e.retry_after_sec == pytest.approx(8.0)
+    # 글로벌: 초과 2건 / 글로벌 슬롯 4 × 4초
+    asyncio.run(eng.enqueue("b", {}))
+    e = _rejection(eng, "c", 2)
+    assert e.scope == "global" and e.retry_after_sec == pytest.approx(2.0)
+
+
+def test_queue_full_maps_to_429_with_retry_after():
+    pytest.importorskip("fastapi")
+    from api.routes.llm_queue import _queue_full
+
+    exc = _queue_full(QueueFullError(scope="user", depth=5, limit=5, retry_after_sec=2.2))
+    assert exc.status_code == 429 and exc.headers == {"Retry-After": "3"}
+    exc = _queue_full(QueueFullError(scope="global", depth=5, limit=5, retry_after_sec=0))
+    assert exc.headers == {"Retry-After": "1"}
@@ -0,0 +1,51 @@
+# tests/test_completion.py
+"""
+QueueEngine 완료 대기(wait_for / wait_all): 폴링 없이 종료 전이 시점에 깨어나는지.
+"""
+
+import asyncio
+
+import pytest
+
+from infrastructure.queue import QueueConfig, QueueEngine, Status
+
+
+def test_wait_all_resolves_on_transition_and_reports_progress():
+    async def run():
+        # idle_wait_sec를 길게 → 재확인 폴링이 아니라 종료 신호로 깨어나야 통과
+        eng = QueueEngine(config=QueueConfig(idle_wait_sec=60, max_inflight_per_user=5))
+        items = await eng.enqueue_many("a", [{}, {}, {}])
+        ids = [it.request_id for it, _ in items]
+        await eng.admit()
+        progress = []
+
+        async def on_done(rid, it, done, total):
+            progress.append((rid, done, total))
+
+        waiter = asyncio.create_task(eng.wait_all(ids, timeout=1, on_done=on_done))
+        await asyncio.sleep(0.01)
+        await eng.finish(ids[1], ok=True)
+        await asyncio.sleep(0.01)
+        await eng.finish(ids[0], ok=False, reason="boom")
+        await asyncio.sleep(0.01)
+        await eng.cancel(ids[2])  # inflight 항목은 취소되지 않음
+        await eng.finish(ids[2], ok=True)
+        out = await waiter
+        assert [p[0] for p in progress] == [ids[1], ids[0], ids[2]]
+        assert [p[1:] for p in progress] == [(1, 3), (2, 3), (3, 3)]
+        assert out[ids[0]].status == Status.failed
+        assert eng._waiters == {}
+
+    asyncio.run(run())
+
+
+def test_wait_for_timeout_cleans_up_waiter():
+    async def run():
+        eng = QueueEngine(config=QueueConfig(idle_wait_sec=60))
+        it = await eng.enqueue("a", {})
+        with pytest.raises(asyncio.TimeoutError):
+            await eng.wait_for(it.request_id, timeout=0.02)
+        assert eng._waiters == {}
+        assert await eng.wait_for("missing") is None
+
+    asyncio.run(run())
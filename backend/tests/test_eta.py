@@ -0,0 +1,46 @@
+# tests/test_eta.py
+"""
+P2Quantile을 statistics.quantiles와 비교 + EtaEstimator 키 폴백 테스트.
+"""
+
+import random
+import statistics
+
+from infrastructure.queue.eta import EtaEstimator, P2Quantile
+
+
+def test_p2_quantile_tracks_statistics_quantiles():
+    rnd = random.Random(42)
+    xs = [rnd.lognormvariate(1.0, 0.6) for _ in range(2000)]
+    cuts = statistics.quantiles(xs, n=100, method="inclusive")
+    for p, idx in ((0.5, 49), (0.9, 89)):
+        est = P2Quantile(p)
+        for x in xs:
+            est.push(x)
+        assert len(est) == len(xs)
+        assert abs(est.value() - cuts[idx]) / cuts[idx] < 0.02
+
+
+def test_p2_quantile_exact_while_few_samples():
+    est = P2Quantile(0.5)
+    assert est.value() is None
+    for x in (3.0, 1.0, 2.0):
+        est.push(x)
+    assert est.value() == 2.0
+
+
+def test_estimator_falls_back_to_wider_keys():
+    eta = EtaEstimator(default_sec=20.0, min_samples=3)
+    assert eta.estimate("u", "jd") == 20.0
+    for _ in range(3):
+        eta.observe("u", "jd", 10.0)
+    # 다른 사용자의 jd → (*, jd)
+    assert eta.estimate("v", "jd") == 10.0
+    for _ in range(2):
+        eta.observe("v", "jd", 40.0)
+    # v의 샘플(2) < min_samples → 여전히 (*, jd) 값 사용, 자기 키로 넘어가지 않음
+    assert eta.quantile("v", "jd") != 40.0
+    eta.observe("v", "jd", 40.0)
+    assert eta.estimate("v", "jd") == 40.0
+    assert eta.wait_estimate(4, 2, user_id="v", kind="jd") == 80.0
+    assert eta.wait_estimate(0, 2, user_id="v", kind="jd") == 0.0
@@ -0,0 +1,97 @@
+# tests/test_event_hub.py
+"""
+EventHub 재전송 로그(since) / SSE 스트림 종료 프레임 테스트.
+"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+import api.routes.llm_queue as lq  # noqa: E402
+from api.routes.llm_queue import EventHub  # noqa: E402
+
+
+def test_since_returns_tail_and_none_after_eviction():
+    async def run():
+        hub = EventHub(replay_size=3)
+        assert hub.since("t", 0) is None  # 로그 없음
+        for i in range(5):
+            await hub.publish("t", "d", {"i": i})
+        # 로그에는 3..5만 남음
+        assert [eid for eid, _ in hub.since("t", 2)] == [3, 4, 5]
+        assert [eid for eid, _ in hub.since("t", 4)] == [5]
+        assert hub.since("t", 5) == []
+        assert hub.since("t", 1) is None  # 2번이 밀려남 → 재전송 불가
+        assert hub.last_id("t") == 5
+
+    asyncio.run(run())
+
+
+def test_stream_delivers_end_published_while_reading_task(monkeypatch):
+    app = FastAPI()
+    app.include_router(lq.router)
+    client = TestClient(app)
+    tid = asyncio.run(lq.TASKS.create(user_id="u", req_json={}, stream_mode=True))
+    real_get = lq.TASKS.get
+    calls = {"n": 0}
+
+    async def racy_get(task_id):
+        # 두 번째 조회(구독 이후) 도중 태스크가 끝나 end가 발행되지만, 읽힌 레코드는 아직 running
+        calls["n"] += 1
+        rec = dict(await real_get(task_id))
+        if calls["n"] == 2:
+            await lq.EVENT_HUB.publish(task_id, "end", {"saved_id": 1})
+            await lq.TASKS.update(task_id, status="finished")
+        return rec
+
+    monkeypatch.setattr(lq.TASKS, "get", racy_get)
+    r = client.get(f"/llm/queue/tasks/{tid}/stream")
+    assert r.status_code == 200
+    assert r.text.startswith("event: status")
+    assert r.text.rstrip().endswith('event: end\ndata: {"saved_id": 1}')
+
+
+def test_publish_encodes_once_for_all_subscribers():
+    async def run():
+        hub = EventHub()
+        q1, q2 = hub.subscribe("t"), hub.subscribe("t")
+        await hub.publish("t", "delta", {"text": "안녕"})
+        (id1, b1), (id2, b2) = q1.get_nowait(), q2.get_nowait()
+        assert id1 == id2 == 1
+        assert b1 is b2 and b1 is hub.since("t", 0)[0][1]
+        assert b1 == 'id: 1\nevent: delta\ndata: {"text": "안녕"}\n\n'.encode("utf-8")
+        hub.unsubscribe("t", q1)
+        hub.unsubscribe("t", q2)
+        assert "t" not in hub._subs
+
+    asyncio.run(run())
+
+
+def test_abandon_fires_after_grace_unless_client_returns():
+    async def run():
+        hub = EventHub(abandon_grace_sec=0.02)
+        fired = []
+        hub.watch("t", lambda: fired.append("t"))
+        q = hub.subscribe("t")
+        hub.unsubscribe("t", q)
+        await asyncio.sleep(0.005)
+        q = hub.subscribe("t")  # 유예 중 재접속 → 취소 예약 해제
+        await asyncio.sleep(0.05)
+        assert fired == []
+        hub.unsubscribe("t", q)
+        await asyncio.sleep(0.05)
+        assert fired == ["t"]
+        # 종료(close)된 태스크는 감시 해제 → 이후 끊겨도 호출 없음
+        hub.watch("u", lambda: fired.append("u"))
+        q = hub.subscribe("u")
+        hub.close("u")
+        hub.unsubscribe("u", q)
+        await asyncio.sleep(0.05)
+        assert fired == ["t"]
+
+    asyncio.run(run())
@@ -0,0 +1,55 @@
+# tests/test_jd_generation_route.py
+"""
+/jd/generate 오류 매핑: 준비 단계(LookupError/ValueError)만 404/422, 생성 단계 오류는 500.
+"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from fastapi import HTTPException  # noqa: E402
+
+import api.routes.jd_generation as route  # noqa: E402
+from api.schemas.jd_generation import JDGenerateRequest  # noqa: E402
+
+
+class _Svc:
+    def __init__(self, *, prepare_exc=None, generate_exc=None):
+        self.prepare_exc = prepare_exc
+        self.generate_exc = generate_exc
+
+    async def prepare_request(self, session, **kwargs):
+        if self.prepare_exc:
+            raise self.prepare_exc
+        return {"prepared": True}
+
+    async def generate_and_save(self, session, *, prepared, **kwargs):
+        assert prepared == {"prepared": True}
+        if self.generate_exc:
+            raise self.generate_exc
+        return {"company_code": "c", "job_code": "j", "markdown": "# t", "saved_id": 1}
+
+
+def _status(monkeypatch, svc: _Svc) -> int:
+    monkeypatch.setattr(route, "make_jd_service", lambda body: svc)
+    body = JDGenerateRequest(company_code="c", job_code="j")
+    try:
+        asyncio.run(route.generate_jd(body, session=None))
+    except HTTPException as e:
+        return e.status_code
+    return 200
+
+
+def test_prepare_errors_map_to_client_status(monkeypatch):
+    assert _status(monkeypatch, _Svc(prepare_exc=LookupError("no knowledge"))) == 404
+    assert _status(monkeypatch, _Svc(prepare_exc=ValueError("bad override"))) == 422
+    assert _status(monkeypatch, _Svc(prepare_exc=RuntimeError("corrupt"))) == 500
+
+
+def test_generation_errors_stay_server_side(monkeypatch):
+    assert _status(monkeypatch, _Svc()) == 200
+    assert _status(monkeypatch, _Svc(generate_exc=ValueError("bad llm output"))) == 500
+    assert _status(monkeypatch, _Svc(generate_exc=LookupError("missing key"))) == 500
+    assert _status(monkeypatch, _Svc(generate_exc=AssertionError("llm"))) == 502
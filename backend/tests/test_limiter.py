@@ -0,0 +1,66 @@
+# tests/test_limiter.py
+"""
+AIMDLimiter 감소(429/타임아웃, 처리시간 급등, cooldown) / 증가(포화 시에만) 테스트.
+"""
+
+from infrastructure.queue.limiter import AIMDLimiter, FixedLimiter, is_overload_reason
+
+
+def _ok(lim: AIMDLimiter, n: int, sec: float = 1.0, saturated: bool = True) -> None:
+    for _ in range(n):
+        lim.observe(ok=True, duration_sec=sec, reason=None, saturated=saturated)
+
+
+def test_overload_reasons():
+    assert is_overload_reason("HTTP 429 Too Many Requests")
+    assert is_overload_reason("ReadTimeout: timed out")
+    assert not is_overload_reason("ValueError: bad payload")
+    assert not is_overload_reason(None)
+
+
+def test_multiplicative_decrease_respects_cooldown_and_floor():
+    lim = AIMDLimiter(initial=16, min_limit=3, max_limit=32, cooldown_sec=3600)
+    lim.observe(ok=False, duration_sec=None, reason="HTTP 429", saturated=True)
+    assert lim.limit == 8
+    # 같은 혼잡으로 끝난 후속 실패는 cooldown 동안 무시
+    lim.observe(ok=False, duration_sec=None, reason="timeout", saturated=True)
+    assert lim.limit == 8 and lim.cuts == 1
+
+    lim = AIMDLimiter(initial=16, min_limit=3, max_limit=32, cooldown_sec=0)
+    for _ in range(5):
+        lim.observe(ok=False, duration_sec=None, reason="rate limit", saturated=True)
+    assert lim.limit == 3 and lim.cuts == 5
+
+
+def test_latency_spike_cuts_only_after_warmup():
+    lim = AIMDLimiter(initial=8, max_limit=8, warmup=5, spike_factor=3.0, cooldown_sec=0)
+    _ok(lim, 4)
+    lim.observe(ok=True, duration_sec=10.0, reason=None, saturated=True)
+    assert lim.limit == 8  # 워밍업 전에는 급등 판정 안 함
+    lim = AIMDLimiter(initial=8, max_limit=8, warmup=5, spike_factor=3.0, cooldown_sec=0)
+    _ok(lim, 5)
+    lim.observe(ok=True, duration_sec=10.0, reason=None, saturated=True)
+    assert lim.limit == 4
+    # 급등 샘플은 기준 처리시간에 섞이지 않음
+    assert lim.summary()["baseline_sec"] == 1.0
+
+
+def test_additive_increase_only_when_saturated():
+    lim = AIMDLimiter(initial=4, max_limit=6, cooldown_sec=0)
+    _ok(lim, 50, saturated=False)
+    assert lim.limit == 4
+    # 완료 1건당 +1/limit → 대략 한도만큼 완료되면 +1
+    _ok(lim, 4)
+    assert lim.limit == 4
+    _ok(lim, 1)
+    assert lim.limit == 5
+    _ok(lim, 5)
+    assert lim.limit == 6
+    _ok(lim, 100)
+    assert lim.limit == 6  # max_limit 상한
+
+
+def test_fixed_limiter_ignores_signals():
+    lim = FixedLimiter(5)
+    lim.observe(ok=False, duration_sec=None, reason="HTTP 429", saturated=True)
+    assert lim.limit == 5
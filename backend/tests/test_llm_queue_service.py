@@ -0,0 +1,44 @@
+# tests/test_llm_queue_service.py
+"""
+LLMQueueService.enqueue_many: 적재 시점 순번이 순번 인덱스와 일치하는지, 깊이 제한은 전부/전무인지.
+"""
+
+import asyncio
+
+import pytest
+
+from infrastructure.queue import QueueConfig, QueueEngine, QueueFullError
+from infrastructure.queue.models import Priority
+from service.llm_queue import LLMQueueService
+
+
+def _svc(**cfg) -> LLMQueueService:
+    return LLMQueueService(engine=QueueEngine(config=QueueConfig(**cfg)))
+
+
+def test_enqueue_many_positions_match_queue_position():
+    async def run():
+        svc = _svc()
+        _, pos = await svc.enqueue("a", {}, priority=Priority.interactive)
+        assert pos == 0
+        first = await svc.enqueue_many("a", [{}, {}, {}])
+        # 상위 클래스 1건이 앞에 있으므로 1부터
+        assert [pos for _, pos in first] == [1, 2, 3]
+        more = await svc.enqueue_many("a", [{}, {}])
+        assert [pos for _, pos in more] == [4, 5]
+        for rid, pos in first + more:
+            assert (await svc.engine.repo.queue_position("a", rid)).position_in_user == pos
+
+    asyncio.run(run())
+
+
+def test_enqueue_many_is_all_or_nothing_on_depth_limit():
+    async def run():
+        svc = _svc(max_queued_per_user=3, max_queued_global=100)
+        await svc.enqueue_many("a", [{}, {}])
+        with pytest.raises(QueueFullError):
+            await svc.enqueue_many("a", [{}, {}])
+        assert await svc.engine.repo.queued_count_user("a") == 2
+        assert await svc.enqueue_many("a", []) == []
+
+    asyncio.run(run())
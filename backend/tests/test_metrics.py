@@ -0,0 +1,36 @@
+# tests/test_metrics.py
+"""
+큐 메트릭 라벨 카디널리티 상한 / 대기시간 히스토그램 테스트.
+"""
+
+import pytest
+
+from infrastructure.queue.metrics import priority_label, user_label
+
+
+def test_user_label_is_stable_and_bounded():
+    labels = {user_label(f"user-{i}", 8) for i in range(1000)}
+    assert len(labels) <= 8 and labels <= {"u%02d" % i for i in range(8)}
+    assert user_label("alice", 8) == user_label("alice", 8)
+    assert user_label("alice", 0) == "all"
+
+
+def test_priority_label_maps_unknown_to_other():
+    assert priority_label(10) == "interactive"
+    assert priority_label(0) == "batch"
+    assert priority_label(7) == "other"
+
+
+def test_prometheus_series_stay_within_buckets():
+    prom = pytest.importorskip("prometheus_client")
+    from infrastructure.queue.metrics import PrometheusQueueMetrics
+
+    reg = prom.CollectorRegistry()
+    m = PrometheusQueueMetrics(user_buckets=4, registry=reg)
+    for i in range(200):
+        m.observe_enqueue(f"user-{i}")
+        m.observe_admit(f"user-{i}", wait_sec=0.2, priority=10 if i % 2 else 0)
+    series = {s.labels["user"] for fam in reg.collect() if fam.name == "queue_enqueued" for s in fam.samples}
+    assert 1 <= len(series) <= 4
+    assert reg.get_sample_value("queue_wait_seconds_count", {"priority": "interactive"}) == 100
+    assert reg.get_sample_value("queue_wait_seconds_bucket", {"priority": "batch", "le": "0.3"}) == 100
@@ -0,0 +1,30 @@
+# tests/test_models.py
+"""
+내부 __slots__ 레코드 ↔ API 경계 pydantic 모델 변환.
+"""
+
+from infrastructure.queue.models import QueueItem, QueueRecord, QueueStats, Status, UserStats
+
+
+def test_queue_record_has_no_dict_and_converts_to_item():
+    rec = QueueRecord("r1", "a", {"k": 1}, priority=10, eta_sec=3.5)
+    assert not hasattr(rec, "__dict__")
+    item = rec.to_item()
+    assert isinstance(item, QueueItem)
+    assert (item.request_id, item.user_id, item.priority, item.status) == ("r1", "a", 10, Status.queued)
+    assert item.payload == {"k": 1} and item.eta_sec == 3.5 and item.enqueued_at == rec.enqueued_at
+
+
+def test_queue_stats_converts_to_snapshot():
+    stats = QueueStats(
+        totals={"queued": 2, "inflight": 1},
+        inflight_global=1,
+        per_user=[UserStats("a", queued=2, inflight=1)],
+        avg_finish_sec=1.5,
+    )
+    snap = stats.to_snapshot()
+    assert snap.totals == {"queued": 2, "inflight": 1} and snap.avg_finish_sec == 1.5
+    assert [(w.user_id, w.queued, w.inflight, w.finished) for w in snap.per_user] == [("a", 2, 1, 0)]
+    # 스냅샷 dict는 내부 레코드와 분리
+    snap.totals["queued"] = 99
+    assert stats.totals["queued"] == 2
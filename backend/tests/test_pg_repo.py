@@ -0,0 +1,35 @@
+# tests/test_pg_repo.py
+"""
+PostgresQueueRepo admit 선택 로직(_pick) 테스트 — DB 없이 후보 행만으로 검증.
+"""
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from infrastructure.queue.models import Priority  # noqa: E402
+from infrastructure.queue.pg_repo import PostgresQueueRepo  # noqa: E402
+
+INTERACTIVE, BATCH = int(Priority.interactive), int(Priority.batch)
+
+
+def _repo() -> PostgresQueueRepo:
+    return PostgresQueueRepo(session_factory=lambda: None)
+
+
+def test_pick_fills_higher_class_before_lower():
+    # 후보는 SQL과 같이 (priority desc, id) 순
+    cand = [("a1", "a", INTERACTIVE), ("a2", "a", INTERACTIVE), ("b1", "b", BATCH), ("b2", "b", BATCH)]
+    assert _repo()._pick(cand, {}, per_user_limit=4, capacity=2) == ["a1", "a2"]
+    assert _repo()._pick(cand, {}, per_user_limit=4, capacity=3) == ["a1", "a2", "b1"]
+
+
+def test_pick_round_robins_users_within_class():
+    cand = [("a1", "a", INTERACTIVE), ("a2", "a", INTERACTIVE), ("b1", "b", INTERACTIVE), ("c1", "c", BATCH)]
+    assert _repo()._pick(cand, {}, per_user_limit=4, capacity=3) == ["a1", "b1", "a2"]
+
+
+def test_pick_counts_per_user_limit_across_classes():
+    cand = [("a1", "a", INTERACTIVE), ("a2", "a", BATCH), ("b1", "b", BATCH)]
+    # a는 이미 1건 inflight + interactive 1건 선택 → 한도 2로 batch 건너뜀
+    assert _repo()._pick(cand, {"a": 1}, per_user_limit=2, capacity=4) == ["a1", "b1"]
@@ -0,0 +1,96 @@
+# tests/test_position.py
+"""
+순번 인덱스(SeqIndex / LengthHistogram)와 InMemoryQueueRepo.queue_position을 단순 리스트 계산과 비교.
+"""
+
+import asyncio
+import random
+from typing import Dict, List, Tuple
+
+from infrastructure.queue.models import Limits, Priority, QueueRecord
+from infrastructure.queue.position import LengthHistogram, SeqIndex
+from infrastructure.queue.repo import InMemoryQueueRepo
+from infrastructure.queue.scheduler import DeficitRoundRobinScheduler
+
+
+def test_seq_index_rank_matches_list_across_rebase():
+    rnd = random.Random(7)
+    idx, live = SeqIndex(), []
+    for _ in range(3000):
+        if live and rnd.random() < 0.45:
+            # 앞쪽을 주로 빼서 재구성(_rebase)까지 거치게 함
+            seq = live.pop(0 if rnd.random() < 0.7 else rnd.randrange(len(live)))
+            idx.remove(seq)
+        else:
+            live.append(idx.append())
+        assert len(idx) == len(live)
+        for k in (0, len(live) // 2, len(live) - 1):
+            if 0 <= k < len(live):
+                assert idx.rank(live[k]) == k
+
+
+def test_length_histogram_rr_rank_matches_brute_force():
+    rnd = random.Random(11)
+    lens = [0] * 20
+    hist = LengthHistogram()
+    for _ in range(500):
+        v = rnd.randrange(len(lens))
+        new = max(0, lens[v] + rnd.choice((-1, 1, 2)))
+        hist.move(lens[v], new)
+        lens[v] = new
+        assert hist.total == sum(lens)
+        for k in range(0, 8):
+            assert hist.rr_rank(k) == sum(min(n, k) for n in lens)
+
+
+def test_queue_position_matches_brute_force():
+    rnd = random.Random(3)
+    users = ["a", "b", "c", "d"]
+    prios = [int(Priority.batch), int(Priority.interactive)]
+    # 기대 모델: (user, priority) → FIFO request_id 목록
+    flows: Dict[Tuple[str, int], List[str]] = {(u, p): [] for u in users for p in prios}
+
+    def expected(uid: str, rid: str) -> Tuple[int, int]:
+        p = next(q for (u, q), ids in flows.items() if u == uid and rid in ids)
+        k = flows[(uid, p)].index(rid)
+        in_user = sum(len(flows[(uid, q)]) for q in prios if q > p) + k
+        higher = sum(len(ids) for (_, q), ids in flows.items() if q > p)
+        same = sum(min(len(ids), k) for (_, q), ids in flows.items() if q == p)
+        return in_user, higher + same
+
+    async def run():
+        repo = InMemoryQueueRepo()
+        drr = DeficitRoundRobinScheduler()
+        seq = checked = 0
+        for step in range(400):
+            r = rnd.random()
+            live = [rid for ids in flows.values() for rid in ids]
+            if r < 0.55 or not live:
+                uid, p = rnd.choice(users), rnd.choice(prios)
+                rid = f"r{seq}"
+                seq += 1
+                await repo.add(QueueRecord(rid, uid, {}, priority=p))
+                flows[(uid, p)].append(rid)
+            elif r < 0.8:
+                rid = rnd.choice(live)
+                await repo.cancel(rid, "client_cancel")
+                for ids in flows.values():
+                    if rid in ids:
+                        ids.remove(rid)
+            else:
+                got = await repo.admit_batch(
+                    Limits(max_inflight_global=10**6, max_inflight_per_user=10**6), 3, policy=drr
+                )
+                for it in got:
+                    flows[(it.user_id, it.priority)].remove(it.request_id)
+            if step % 10:
+                continue
+            for (uid, _), ids in flows.items():
+                for rid in ids:
+                    pos = await repo.queue_position(uid, rid)
+                    assert (pos.position_in_user, pos.position_global) == expected(uid, rid)
+                    assert pos.queue_len_global == sum(len(x) for x in flows.values())
+                    checked += 1
+        assert checked > 100
+
+    asyncio.run(run())
@@ -0,0 +1,76 @@
+# tests/test_queue_engine.py
+"""
+QueueEngine(인메모리) / TaskSupervisor / AIMDLimiter 스모크 테스트.
+"""
+
+import asyncio
+
+import pytest
+
+from infrastructure.queue import AIMDLimiter, QueueConfig, QueueEngine, QueueFullError, Status, TaskSupervisor
+
+
+def test_enqueue_admit_finish_and_wait():
+    async def run():
+        eng = QueueEngine(config=QueueConfig(max_inflight_global=2, max_inflight_per_user=1))
+        a = await eng.enqueue("a", {})
+        b = await eng.enqueue("b", {})
+        c = await eng.enqueue("a", {})
+        res = await eng.admit()
+        assert sorted(it.request_id for it in res.admitted) == sorted([a.request_id, b.request_id])
+        waiter = asyncio.create_task(eng.wait_for(a.request_id, timeout=1))
+        await eng.finish(a.request_id, ok=True)
+        assert (await waiter).status == Status.finished
+        # 사용자 a 슬롯이 비었으므로 c admit
+        assert [it.request_id for it in (await eng.admit()).admitted] == [c.request_id]
+        snap = (await eng.snapshot()).to_snapshot()
+        assert snap.inflight_global == 2 and snap.totals["finished"] == 1
+
+    asyncio.run(run())
+
+
+def test_admission_control_rejects_over_depth():
+    async def run():
+        eng = QueueEngine(config=QueueConfig(max_queued_per_user=2, max_queued_global=10))
+        await eng.enqueue_many("a", [{}, {}])
+        with pytest.raises(QueueFullError) as e:
+            await eng.enqueue("a", {})
+        assert e.value.scope == "user" and e.value.retry_after_sec >= 0
+
+    asyncio.run(run())
+
+
+def test_supervisor_caps_and_drains():
+    async def run():
+        pool = TaskSupervisor("t", max_tasks=1)
+        await pool.spawn(asyncio.sleep(5))
+        assert pool.full and pool.spawn_nowait(asyncio.sleep(0)) is None
+        assert await pool.drain(0.05) == 1
+        assert len(pool) == 0 and pool.closed
+
+    asyncio.run(run())
+
+
+def test_aimd_limiter_cuts_on_overload_and_grows_when_saturated():
+    lim = AIMDLimiter(initial=8, min_limit=1, max_limit=16, cooldown_sec=0)
+    lim.observe(ok=False, duration_sec=1.0, reason="HTTP 429", saturated=True)
+    assert lim.limit == 4
+    for _ in range(20):
+        lim.observe(ok=True, duration_sec=1.0, reason=None, saturated=True)
+    assert lim.limit > 4
+
+
+def test_wait_for_work_wakes_on_enqueue_instead_of_polling():
+    async def run():
+        eng = QueueEngine(config=QueueConfig())
+        assert await eng.wait_for_work(timeout=0.01) is False
+        waiter = asyncio.create_task(eng.wait_for_work(timeout=60))
+        await asyncio.sleep(0)
+        loop = asyncio.get_running_loop()
+        t0 = loop.time()
+        await eng.enqueue("a", {})
+        assert await waiter is True and loop.time() - t0 < 1
+        # 반환 시 신호가 리셋되므로 다음 대기는 새 신호를 기다림
+        assert await eng.wait_for_work(timeout=0.01) is False
+
+    asyncio.run(run())
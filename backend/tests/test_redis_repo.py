@@ -0,0 +1,117 @@
+# tests/test_redis_repo.py
+"""
+RedisQueueRepo Lua 스크립트 스모크 테스트(fakeredis).
+"""
+
+import asyncio
+from datetime import timedelta
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis.aioredis")
+
+from infrastructure.queue.models import Limits, Priority, QueueRecord, Status, utcnow  # noqa: E402
+from infrastructure.queue.redis_repo import RedisQueueRepo  # noqa: E402
+
+
+def _repo() -> RedisQueueRepo:
+    return RedisQueueRepo(fakeredis.FakeRedis(decode_responses=True), prefix="t")
+
+
+def _rec(rid: str, user: str) -> QueueRecord:
+    return QueueRecord(rid, user, {"n": rid})
+
+
+def test_add_many_positions_and_get():
+    async def run():
+        repo = _repo()
+        assert await repo.add_many([_rec("a1", "a"), _rec("a2", "a"), _rec("b1", "b")]) == [0, 1, 0]
+        it = await repo.get("a2")
+        assert it.user_id == "a" and it.status == Status.queued and it.payload == {"n": "a2"}
+        assert await repo.queued_count_global() == 3
+        assert await repo.queued_count_user("a") == 2
+
+    asyncio.run(run())
+
+
+def test_admit_respects_limits_and_round_robin():
+    async def run():
+        repo = _repo()
+        await repo.add_many([_rec(f"a{i}", "a") for i in range(3)])
+        await repo.add_many([_rec(f"b{i}", "b") for i in range(3)])
+        got = await repo.admit_batch(Limits(max_inflight_global=3, max_inflight_per_user=2), 10)
+        users = [it.user_id for it in got]
+        assert len(got) == 3 and users.count("a") <= 2 and users.count("b") <= 2
+        assert all(it.status == Status.inflight and it.admitted_at for it in got)
+        assert await repo.inflight_count_global() == 3
+        # 글로벌 한도 도달 → 추가 admit 없음
+        assert await repo.admit_batch(Limits(max_inflight_global=3, max_inflight_per_user=2), 10) == []
+
+    asyncio.run(run())
+
+
+def test_finish_cancel_expire_update_counters():
+    async def run():
+        repo = _repo()
+        await repo.add_many([_rec("a1", "a"), _rec("a2", "a"), _rec("a3", "a")])
+        (it,) = await repo.admit_batch(Limits(max_inflight_global=1, max_inflight_per_user=1), 1)
+        done = await repo.mark_finished(it.request_id, False, "boom")
+        assert done.status == Status.failed and done.fail_reason == "boom"
+        assert (await repo.cancel("a2", "client_cancel")).status == Status.canceled
+        expired = await repo.expire_due(utcnow() + timedelta(seconds=1), "ttl_expired")
+        assert [x.request_id for x in expired] == ["a3"]
+        snap = await repo.stats_snapshot(avg_finish_sec=None)
+        assert snap.inflight_global == 0
+        assert snap.totals == {"failed": 1, "canceled": 2}
+
+    asyncio.run(run())
+
+
+def test_reclaim_stale_releases_inflight():
+    async def run():
+        repo = _repo()
+        await repo.add_many([_rec("a1", "a"), _rec("a2", "a")])
+        await repo.admit_batch(Limits(max_inflight_global=2, max_inflight_per_user=2), 2)
+        await repo.mark_finished("a1", True, None)
+        # 리스 기한 이전이면 회수 없음
+        assert await repo.reclaim_stale(utcnow() - timedelta(seconds=60), "lease_expired") == []
+        (it,) = await repo.reclaim_stale(utcnow() + timedelta(seconds=1), "lease_expired")
+        assert it.request_id == "a2" and it.status == Status.failed and it.fail_reason == "lease_expired"
+        assert await repo.inflight_count_global() == 0
+        assert await repo.inflight_count_user("a") == 0
+
+    asyncio.run(run())
+
+
+def test_admit_fills_interactive_class_before_batch():
+    async def run():
+        repo = _repo()
+        batch = [_rec("a1", "a"), _rec("a2", "a")]
+        inter = [_rec("b1", "b"), _rec("c1", "c"), _rec("b2", "b")]
+        for it in inter:
+            it.priority = int(Priority.interactive)
+        assert await repo.add_many(batch + inter) == [0, 1, 0, 0, 1]
+        got = await repo.admit_batch(Limits(max_inflight_global=3, max_inflight_per_user=4), 10)
+        assert [it.request_id for it in got] == ["b1", "c1", "b2"]
+        # 상위 클래스가 비면 batch 클래스
+        got = await repo.admit_batch(Limits(max_inflight_global=4, max_inflight_per_user=4), 10)
+        assert [it.request_id for it in got] == ["a1"]
+
+    asyncio.run(run())
+
+
+def test_position_counts_higher_classes_first():
+    async def run():
+        repo = _repo()
+        hi = _rec("b1", "b")
+        hi.priority = int(Priority.interactive)
+        await repo.add_many([_rec("a1", "a"), _rec("a2", "a"), _rec("c1", "c"), hi])
+        pos = await repo.queue_position("a", "a2")
+        # 상위 클래스 1건 + 같은 클래스 라운드로빈(a1, c1)
+        assert (pos.position_in_user, pos.position_global, pos.queue_len_user) == (1, 3, 2)
+        assert await repo.user_queue_ids("a") == ["a1", "a2"]
+        await repo.cancel("a1", "client_cancel")
+        pos = await repo.queue_position("a", "a2")
+        assert (pos.position_in_user, pos.position_global) == (0, 1)
+
+    asyncio.run(run())
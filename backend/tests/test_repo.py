@@ -0,0 +1,132 @@
+# tests/test_repo.py
+"""
+InMemoryQueueRepo 카운터/보존(compact)/TTL 만료/묘비 취소 테스트.
+"""
+
+import asyncio
+import random
+from collections import Counter
+from datetime import timedelta
+
+from infrastructure.queue.models import Limits, QueueRecord, Status, utcnow
+from infrastructure.queue.repo import InMemoryQueueRepo
+from infrastructure.queue.scheduler import DeficitRoundRobinScheduler, RoundRobinScheduler
+
+
+def test_counters_match_item_statuses():
+    rnd = random.Random(5)
+
+    async def run():
+        seen = set()
+        repo, drr = InMemoryQueueRepo(), DeficitRoundRobinScheduler()
+        limits = Limits(max_inflight_global=4, max_inflight_per_user=2)
+        for i in range(600):
+            r = rnd.random()
+            if r < 0.45:
+                await repo.add(QueueRecord(f"r{i}", rnd.choice("abc"), {}))
+            elif r < 0.6:
+                await repo.admit_batch(limits, 2, policy=drr)
+            elif r < 0.85:
+                inflight = [it for it in repo._items.values() if it.status == Status.inflight]
+                if inflight:
+                    await repo.mark_finished(rnd.choice(inflight).request_id, rnd.random() < 0.7, "x")
+            else:
+                queued = [it for it in repo._items.values() if it.status == Status.queued]
+                if queued:
+                    await repo.cancel(rnd.choice(queued).request_id, "client_cancel")
+            want = Counter(it.status.value for it in repo._items.values())
+            snap = await repo.stats_snapshot(None)
+            assert snap.totals == dict(want)
+            assert snap.inflight_global == await repo.inflight_count_global() == want["inflight"]
+            for us in snap.per_user:
+                mine = Counter(it.status for it in repo._items.values() if it.user_id == us.user_id)
+                assert (us.queued, us.inflight) == (mine[Status.queued], mine[Status.inflight])
+                assert (us.finished, us.failed, us.canceled) == (
+                    mine[Status.finished],
+                    mine[Status.failed],
+                    mine[Status.canceled],
+                )
+            seen |= want.keys()
+        assert seen == {"queued", "inflight", "finished", "failed", "canceled"}
+
+    asyncio.run(run())
+
+
+def test_compact_moves_oldest_terminal_items_to_archive():
+    async def run():
+        repo = InMemoryQueueRepo()
+        for i in range(5):
+            await repo.add(QueueRecord(f"r{i}", "a", {}))
+            await repo.mark_admitted(f"r{i}")
+            await repo.mark_finished(f"r{i}", i != 4, "boom")
+        await repo.add(QueueRecord("live", "a", {}))
+        assert await repo.compact(retention_sec=3600, max_items=2) == 3
+        assert set(repo._items) == {"r3", "r4", "live"}
+        snap = await repo.stats_snapshot(None)
+        assert snap.totals == {"finished": 1, "failed": 1, "queued": 1}
+        # 아카이브로 옮겨진 항목도 get()으로 조회
+        old = await repo.get("r0")
+        assert old is not None and old.status == Status.finished
+        # 보존 창 0 → 종료 항목 전부 이동, 대기 항목은 유지
+        assert await repo.compact(retention_sec=0, max_items=100) == 2
+        assert set(repo._items) == {"live"}
+
+    asyncio.run(run())
+
+
+def test_expire_due_cancels_only_overdue_queued_items():
+    async def run():
+        repo = InMemoryQueueRepo()
+        now = utcnow()
+        for i, age in enumerate((300, 200, 100, 10)):
+            await repo.add(QueueRecord(f"r{i}", "a", {}, enqueued_at=now - timedelta(seconds=age)))
+        # 오래된 항목이라도 이미 admit됐으면 만료 대상 아님
+        await repo.mark_admitted("r0")
+        got = await repo.expire_due(now - timedelta(seconds=150), "ttl")
+        assert [it.request_id for it in got] == ["r1"]
+        assert (await repo.get("r1")).fail_reason == "ttl"
+        assert await repo.user_queue_ids("a") == ["r2", "r3"]
+        assert await repo.expire_due(now - timedelta(seconds=150), "ttl") == []
+        assert [it.request_id for it in await repo.expire_due(now, "ttl")] == ["r2", "r3"]
+        assert await repo.queued_count_global() == 0
+
+    asyncio.run(run())
+
+
+def test_cancel_leaves_tombstones_that_dequeue_skips():
+    async def run():
+        repo = InMemoryQueueRepo()
+        for i in range(5):
+            await repo.add(QueueRecord(f"r{i}", "a", {}))
+        await repo.cancel("r2", "client_cancel")
+        await repo.cancel("r0", "client_cancel")
+        # head 묘비(r0)만 즉시 걷히고 중간 묘비(r2)는 deque에 남음
+        assert list(repo._by_user["a"].queued[0]) == ["r1", "r2", "r3", "r4"]
+        assert await repo.user_queue_ids("a") == ["r1", "r3", "r4"]
+        assert await repo.queued_count_user("a") == 3
+        assert (await repo.queue_position("a", "r3")).position_in_user == 1
+        assert await repo.peek_user_queue("a") == "r1"
+        assert [await repo.dequeue_for_user("a") for _ in range(4)] == ["r1", "r3", "r4", None]
+        assert "a" not in await repo.list_user_ids()
+
+    asyncio.run(run())
+
+
+def test_admit_batch_respects_batch_size_and_limits():
+    async def run():
+        repo, rr = InMemoryQueueRepo(), RoundRobinScheduler()
+        for u in "abc":
+            await repo.add_many([QueueRecord(f"{u}{i}", u, {}) for i in range(4)])
+        limits = Limits(max_inflight_global=5, max_inflight_per_user=2)
+        got = await repo.admit_batch(limits, 3, policy=rr)
+        assert len(got) == 3 and all(it.status == Status.inflight for it in got)
+        got += await repo.admit_batch(limits, 10, policy=rr)
+        # 글로벌 5 상한, 사용자당 2 상한
+        assert len(got) == 5 and max(Counter(it.user_id for it in got).values()) == 2
+        assert await repo.admit_batch(limits, 10, policy=rr) == []
+        assert await repo.inflight_count_global() == 5
+        await repo.mark_finished(got[0].request_id, True, None)
+        (nxt,) = await repo.admit_batch(limits, 10, policy=rr)
+        assert nxt.user_id in {u for u, n in Counter(it.user_id for it in got[1:]).items() if n < 2}
+
+    asyncio.run(run())
@@ -0,0 +1,65 @@
+# tests/test_scheduler.py
+"""
+스케줄러(RoundRobinScheduler / DeficitRoundRobinScheduler) + InMemoryQueueRepo.admit_batch 테스트.
+"""
+
+import asyncio
+from collections import Counter
+from typing import List
+
+from infrastructure.queue.models import Limits, Priority, QueueRecord
+from infrastructure.queue.repo import InMemoryQueueRepo
+from infrastructure.queue.scheduler import DeficitRoundRobinScheduler, RoundRobinScheduler
+
+
+def test_rr_admit_does_not_accumulate_activations():
+    async def run():
+        repo = InMemoryQueueRepo()
+        rr = RoundRobinScheduler()
+        limits = Limits(max_inflight_global=1, max_inflight_per_user=1)
+        for i in range(2000):
+            await repo.add(QueueRecord(f"r{i}", "a", {}))
+            (it,) = await repo.admit_batch(limits, 1, policy=rr)
+            await repo.mark_finished(it.request_id, True, None)
+        assert len(repo._activations) == 0
+
+    asyncio.run(run())
+
+
+def _drr_admit(repo: InMemoryQueueRepo, drr: DeficitRoundRobinScheduler, n: int, per_user: int = 100) -> List[str]:
+    limits = Limits(max_inflight_global=1000, max_inflight_per_user=per_user)
+    return [it.user_id for it in asyncio.run(repo.admit_batch(limits, n, policy=drr))]
+
+
+def _fill(repo: InMemoryQueueRepo, user: str, n: int, priority: int = Priority.batch) -> None:
+    async def run():
+        await repo.add_many([QueueRecord(f"{user}{i}", user, {}, priority=int(priority)) for i in range(n)])
+
+    asyncio.run(run())
+
+
+def test_drr_strict_class_priority():
+    repo, drr = InMemoryQueueRepo(), DeficitRoundRobinScheduler()
+    _fill(repo, "a", 3)
+    _fill(repo, "b", 2, Priority.interactive)
+    _fill(repo, "c", 1, Priority.interactive)
+    # 상위 클래스(b, c) 3건이 먼저, 그 다음에야 batch 클래스(a)
+    assert _drr_admit(repo, drr, 3) == ["b", "c", "b"]
+    assert _drr_admit(repo, drr, 3) == ["a", "a", "a"]
+
+
+def test_drr_shares_follow_weights():
+    repo, drr = InMemoryQueueRepo(), DeficitRoundRobinScheduler(weights={"a": 2.0, "c": 0.5})
+    for u in ("a", "b", "c"):
+        _fill(repo, u, 30)
+    got = Counter(_drr_admit(repo, drr, 14))
+    # 라운드당 a:2, b:1, c:0.5 → 4라운드(14건) 동안 a 8, b 4, c 2
+    assert got == {"a": 8, "b": 4, "c": 2}
+
+
+def test_drr_respects_per_user_limit_and_skips_to_next_user():
+    repo, drr = InMemoryQueueRepo(), DeficitRoundRobinScheduler(weights={"a": 4.0})
+    _fill(repo, "a", 10)
+    _fill(repo, "b", 10)
+    got = Counter(_drr_admit(repo, drr, 6, per_user=2))
+    assert got == {"a": 2, "b": 2}
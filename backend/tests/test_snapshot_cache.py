@@ -0,0 +1,46 @@
+# tests/test_snapshot_cache.py
+"""
+QueueEngine.cached_snapshot: TTL 내 재사용, 만료 시 동시 호출자 단일 갱신.
+"""
+
+import asyncio
+
+from infrastructure.queue import QueueConfig, QueueEngine
+
+
+def _counting_engine(ttl_ms: int):
+    eng = QueueEngine(config=QueueConfig(snapshot_ttl_ms=ttl_ms))
+    calls = {"n": 0}
+    real = eng.repo.stats_snapshot
+
+    async def slow_snapshot(avg_finish_sec):
+        calls["n"] += 1
+        await asyncio.sleep(0.01)
+        return await real(avg_finish_sec)
+
+    eng.repo.stats_snapshot = slow_snapshot
+    return eng, calls
+
+
+def test_concurrent_pollers_share_one_refresh():
+    async def run():
+        eng, calls = _counting_engine(60_000)
+        snaps = await asyncio.gather(*(eng.cached_snapshot() for _ in range(20)))
+        assert calls["n"] == 1 and all(s is snaps[0] for s in snaps)
+        assert await eng.cached_snapshot() is snaps[0]
+        await eng.enqueue("a", {})
+        assert (await eng.user_stats("a")).queued == 0  # TTL 내에는 캐시 값
+        assert calls["n"] == 1
+
+    asyncio.run(run())
+
+
+def test_expired_cache_is_refreshed():
+    async def run():
+        eng, calls = _counting_engine(0)
+        await eng.cached_snapshot()
+        await eng.enqueue("a", {})
+        assert (await eng.user_stats("a")).queued == 1
+        assert calls["n"] == 2
+
+    asyncio.run(run())
@@ -0,0 +1,57 @@
+# tests/test_supervisor.py
+"""
+TaskSupervisor: 슬롯 대기(backpressure), 예외 격리, close/drain 동작.
+"""
+
+import asyncio
+
+import pytest
+
+from infrastructure.queue.supervisor import PoolClosedError, TaskSupervisor
+
+
+def test_spawn_waits_for_free_slot_and_isolates_failures():
+    async def run():
+        pool = TaskSupervisor("t", max_tasks=1)
+        gate = asyncio.Event()
+        order = []
+
+        async def first():
+            await gate.wait()
+            order.append("first")
+            raise RuntimeError("boom")
+
+        async def second():
+            order.append("second")
+
+        await pool.spawn(first())
+        pending = asyncio.create_task(pool.spawn(second()))
+        await asyncio.sleep(0.01)
+        assert not pending.done() and pool.free == 0
+        gate.set()
+        await (await pending)
+        assert order == ["first", "second"]
+        assert pool.stats["failed"] == 1 and pool.stats["spawned"] == 2
+
+    asyncio.run(run())
+
+
+def test_close_rejects_waiting_spawn_and_drain_waits_for_running():
+    async def run():
+        pool = TaskSupervisor("t", max_tasks=1)
+        done = []
+
+        async def quick():
+            await asyncio.sleep(0.02)
+            done.append(1)
+
+        await pool.spawn(quick())
+        waiting = asyncio.create_task(pool.spawn(quick()))
+        await asyncio.sleep(0)
+        assert await pool.drain(1.0) == 0
+        with pytest.raises(PoolClosedError):
+            await waiting
+        assert done == [1] and len(pool) == 0
+        assert pool.spawn_nowait(quick()) is None and pool.stats["rejected"] == 1
+
+    asyncio.run(run())
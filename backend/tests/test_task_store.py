@@ -0,0 +1,55 @@
+# tests/test_task_store.py
+"""
+InMemoryTaskStore: 종료 태스크 LRU 상한 / TTL 제거, 진행 중 태스크 보존, 종료 결과 경량화.
+"""
+
+import asyncio
+
+from infrastructure.queue.task_store import InMemoryTaskStore
+
+
+def test_lru_cap_evicts_least_recently_read_terminal_task():
+    async def run():
+        store = InMemoryTaskStore(max_items=2)
+        running = await store.create(user_id="u", req_json={})
+        done = []
+        for _ in range(3):
+            tid = await store.create(user_id="u", req_json={})
+            await store.update(tid, status="finished")
+            done.append(tid)
+            if len(done) == 2:
+                await store.get(done[0])  # 첫 태스크를 최근 접근으로
+        assert await store.get(done[0]) is not None
+        assert await store.get(done[1]) is None
+        assert await store.get(done[2]) is not None
+        assert (await store.get(running))["status"] == "queued"
+
+    asyncio.run(run())
+
+
+def test_ttl_purges_terminal_tasks_only():
+    async def run():
+        store = InMemoryTaskStore(ttl_sec=0)
+        running = await store.create(user_id="u", req_json={})
+        tid = await store.create(user_id="u", req_json={})
+        await store.update(tid, status="failed", error="x")
+        await store.purge()
+        assert tid not in store.data
+        assert running in store.data
+
+    asyncio.run(run())
+
+
+def test_terminal_result_keeps_only_reference_when_large():
+    async def run():
+        store = InMemoryTaskStore(inline_result_max=10)
+        tid = await store.create(user_id="u", req_json={"big": "x" * 100})
+        await store.update(tid, status="finished", saved_id=7, result={"title": "t", "markdown": "#" * 50})
+        rec = await store.get(tid)
+        assert rec["req_json"] is None
+        assert rec["result"] == {"title": "t"} and rec["result_ref"] is True
+        small = await store.create(user_id="u", req_json={})
+        await store.update(small, status="finished", saved_id=8, result={"title": "t", "markdown": "# ok"})
+        assert (await store.get(small))["result"]["markdown"] == "# ok"
+
+    asyncio.run(run())
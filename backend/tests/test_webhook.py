@@ -0,0 +1,64 @@
+# tests/test_webhook.py
+import asyncio
+import json
+
+import httpx
+
+from infrastructure.webhook import WebhookConfig, WebhookDispatcher
+
+
+def test_bad_url_does_not_stop_delivery():
+    async def run():
+        got = []
+
+        def handler(req: httpx.Request) -> httpx.Response:
+            got.append(str(req.url))
+            return httpx.Response(200)
+
+        d = WebhookDispatcher(WebhookConfig(workers=1, batch_linger_sec=0.01), transport=httpx.MockTransport(handler))
+        await d.start()
+        d.submit("http://[::1", {"a": 1})
+        await asyncio.sleep(0.05)
+        d.submit("http://ok.example/hook", {"b": 2})
+        await d.stop(drain_timeout=2)
+        assert got == ["http://ok.example/hook"]
+        assert d.stats["delivered"] == 1 and d.stats["failed"] == 1
+
+    asyncio.run(run())
+
+
+def test_default_config_sends_one_payload_per_event():
+    async def run():
+        bodies = []
+
+        def handler(req: httpx.Request) -> httpx.Response:
+            bodies.append(json.loads(req.content))
+            return httpx.Response(200)
+
+        d = WebhookDispatcher(WebhookConfig(workers=1), transport=httpx.MockTransport(handler))
+        await d.start()
+        for i in range(3):
+            d.submit("http://ok.example/hook", {"i": i})
+        await d.stop(drain_timeout=2)
+        assert sorted(b["i"] for b in bodies) == [0, 1, 2]
+
+    asyncio.run(run())
+
+
+def test_batching_is_opt_in_envelope():
+    async def run():
+        bodies = []
+
+        def handler(req: httpx.Request) -> httpx.Response:
+            bodies.append(json.loads(req.content))
+            return httpx.Response(200)
+
+        cfg = WebhookConfig(workers=1, batch_max=3, batch_linger_sec=0.05)
+        d = WebhookDispatcher(cfg, transport=httpx.MockTransport(handler))
+        await d.start()
+        for i in range(3):
+            d.submit("http://ok.example/hook", {"i": i})
+        await d.stop(drain_timeout=2)
+        assert bodies == [{"events": [{"i": 0}, {"i": 1}, {"i": 2}], "count": 3}]
+
+    asyncio.run(run())